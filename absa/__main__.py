@@ -0,0 +1,54 @@
+# absa/__main__.py
+
+import sys
+import importlib
+
+# command -> (module, summary). Modules are imported only when their command runs,
+# so `python -m absa --help` and light commands never load sklearn/pandas/lxml.
+COMMANDS = {
+    "train": ("train", "train and compare the English aspect polarity models"),
+    "train-arabic": ("arabic_train", "train the Arabic sentence-polarity track"),
+    "pipeline": ("pipeline", "raw reviews -> (aspect, polarity) rows; train-polarity"),
+    "router": ("router", "train / benchmark the language and dialect router"),
+    "aggregate": ("aggregate", "merge pipeline shards into per-product aspect counts"),
+    "lexicon": ("aspect_lexicon", "build the aspect gazetteer"),
+    "tagger": ("aspect_tagger", "train / benchmark the aspect-term tagger"),
+    "stack": ("stacking", "stacking ensemble with cached out-of-fold scores"),
+    "calibrate": ("calibration", "calibrated soft-voting ensemble + threshold sweep"),
+    "hybrid": ("hybrid", "local ensemble + LLM for low-confidence aspects"),
+    "active": ("active", "select uncertain, diverse sentences for LLM labeling"),
+    "finetune": ("finetune", "build a token-budgeted fine-tuning dataset"),
+    "prompts": ("prompts", "prompt token cost: current layouts vs compact encoding"),
+    "llm": ("llm", "shared LLM client: selftest against mock servers, one-off chat"),
+    "jobs": ("jobs", "inspect / export the job journal of a labeling run"),
+    "synth": ("synth", "generate a synthetic SemEval-style corpus"),
+    "normalize": ("arabic", "benchmark Arabic normalization"),
+    "spacy": ("spacy_preprocess", "benchmark spaCy lemma preprocessing vs the regex cleaner"),
+    "bench": ("bench", "benchmarks: scale suite, compact features, CLI startup"),
+}
+
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = ["usage: python -m absa <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += ["", "python -m absa <command> --help shows the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"absa: unknown command {name!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(f"absa.{COMMANDS[name][0]}")
+    sys.argv[0] = f"python -m absa {name}"   # argparse prog in the command's --help
+    return module.main(rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# absa/active.py
+
+import os
+import sys
+import json
+import heapq
+import hashlib
+import argparse
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import ENGLISH_MODEL_PATH, RANDOM_STATE, WINDOW_SIZE, ASPECT_TAGGER_PATH, ASPECT_LEXICON_PATH
+from absa.preprocess import clean_text
+from absa.aspect_windows import char_to_token_window
+from absa.pipeline import read_reviews, batched, load_extractor
+
+SCORE_BATCH_SIZE = 8192
+PROJECTION_DIM = 64
+CANDIDATE_FACTOR = 10   # heap keeps CANDIDATE_FACTOR * k most uncertain sentences for the k-center step
+
+
+def _text_hash(text):
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).digest()[:8]
+
+
+def uncertainty(model, X):
+    """
+    1 - (top-1 minus top-2 probability), in [0, 1]; higher = less sure.
+    Uses predict_proba when the model has it (e.g. CalibratedVotingEnsemble),
+    otherwise a softmax over decision_function scores.
+    """
+    if hasattr(model, "predict_proba"):
+        P = model.predict_proba(X)
+    else:
+        S = model.decision_function(X)
+        if S.ndim == 1:
+            S = np.column_stack([-S, S])
+        S = S - S.max(axis=1, keepdims=True)
+        P = np.exp(S)
+        P /= P.sum(axis=1, keepdims=True)
+    P = np.sort(P, axis=1)
+    return 1.0 - (P[:, -1] - P[:, -2])
+
+
+def _project(X, projection):
+    V = np.asarray(X @ projection, dtype=np.float32)
+    norms = np.linalg.norm(V, axis=1, keepdims=True)
+    return V / np.where(norms > 0, norms, 1)
+
+
+def _score_texts(vectorizer, model, projection, texts, floor, extractor=None):
+    """
+    Uncertainty for every text; projected vectors only for rows above `floor`.
+
+    The polarity model is trained on aspect windows (WINDOW_SIZE tokens either
+    side of the term), so with an extractor each candidate span is scored as the
+    window the pipeline builds and a sentence gets its most uncertain aspect. Sentences without a
+    candidate span (or every sentence, without an extractor) are scored as a
+    whole, which is only a proxy: the model never saw untagged sentences.
+    """
+    X = vectorizer.transform([clean_text(t) for t in texts])
+    u = uncertainty(model, X)
+    if extractor is not None:
+        windows, owner = [], []
+        for i, t in enumerate(texts):
+            for span in extractor.predict_spans(t):
+                windows.append(clean_text(char_to_token_window(t, span["from"], span["to"], window_size=WINDOW_SIZE)))
+                owner.append(i)
+        if windows:
+            owner = np.asarray(owner)
+            per_text = np.full(len(texts), -1.0)
+            np.maximum.at(per_text, owner, uncertainty(model, vectorizer.transform(windows)))
+            u = np.where(per_text >= 0, per_text, u)
+    idx = np.flatnonzero(u > floor)
+    return u, idx, _project(X[idx], projection)
+
+
+class ActiveSelector:
+    """
+    Pick k sentences worth paying the LLM for from an unlabeled pool of any size:
+
+    1. stream the pool in batches, score each sentence's uncertainty with the
+       current polarity model (max over its aspect windows when an extractor is
+       given, see _score_texts) and keep the CANDIDATE_FACTOR * k most uncertain
+       in a bounded min-heap (memory does not grow with the pool);
+    2. project the candidates' TF-IDF rows to PROJECTION_DIM dims with a fixed
+       Gaussian random projection and pick k of them by greedy k-center
+       (farthest-first), seeded with already-labeled sentences so they count as
+       covered.
+
+    Scoring is stateless, so with n_jobs > 1 batches are scored in worker
+    processes while the heap stays in this one.
+    """
+
+    def __init__(self, vectorizer, model, k, candidate_factor=CANDIDATE_FACTOR,
+                 dim=PROJECTION_DIM, seed=RANDOM_STATE, extractor=None):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.extractor = extractor
+        self.k = k
+        self.capacity = max(k, k * candidate_factor)
+        n_features = len(vectorizer.get_feature_names_out())
+        rng = np.random.default_rng(seed)
+        self.projection = (rng.standard_normal((n_features, dim)) / np.sqrt(dim)).astype(np.float32)
+        self.heap = []          # (uncertainty, seq, id, text, vector)
+        self._in_heap = set()
+        self._seq = 0
+        self.exclude = set()
+        self.labeled_vectors = np.zeros((0, dim), dtype=np.float32)
+        self.stats = {"scored": 0, "excluded": 0, "duplicates": 0}
+
+    def project(self, X):
+        return _project(X, self.projection)
+
+    @property
+    def floor(self):
+        """Uncertainty a sentence must beat to enter the heap."""
+        return self.heap[0][0] if len(self.heap) >= self.capacity else -1.0
+
+    def push(self, records, u, idx, V):
+        self.stats["scored"] += len(records)
+        for j, i in enumerate(idx):
+            if u[i] <= self.floor:
+                continue
+            rec = records[i]
+            h = _text_hash(rec["text"])
+            if h in self.exclude:
+                self.stats["excluded"] += 1
+                continue
+            if h in self._in_heap:
+                self.stats["duplicates"] += 1
+                continue
+            item = (float(u[i]), self._seq, rec["id"], rec["text"], V[j])
+            self._seq += 1
+            if len(self.heap) < self.capacity:
+                heapq.heappush(self.heap, item)
+            else:
+                dropped = heapq.heapreplace(self.heap, item)
+                self._in_heap.discard(_text_hash(dropped[3]))
+            self._in_heap.add(h)
+
+    def score_batch(self, records):
+        u, idx, V = _score_texts(self.vectorizer, self.model, self.projection,
+                                 [r["text"] for r in records], self.floor, self.extractor)
+        self.push(records, u, idx, V)
+
+    def consume(self, records, batch_size=SCORE_BATCH_SIZE, n_jobs=1, progress_every=100_000):
+        t0 = time.perf_counter()
+        next_report = progress_every
+        if n_jobs == 1:
+            results = ((batch, None) for batch in batched(records, batch_size))
+        else:
+            from joblib import Parallel, delayed
+            batches = deque()   # records of dispatched batches, consumed in order
+
+            def tasks():
+                for batch in batched(records, batch_size):
+                    batches.append(batch)
+                    yield delayed(_score_texts)(self.vectorizer, self.model, self.projection,
+                                                [r["text"] for r in batch], self.floor, self.extractor)
+
+            scored = Parallel(n_jobs=n_jobs, return_as="generator", pre_dispatch="2*n_jobs")(tasks())
+            results = ((batches.popleft(), out) for out in scored)
+
+        for batch, out in results:
+            if out is None:
+                self.score_batch(batch)
+            else:
+                self.push(batch, *out)
+            if progress_every and self.stats["scored"] >= next_report:
+                rate = self.stats["scored"] / (time.perf_counter() - t0)
+                print(f"scored {self.stats['scored']:,} sentences ({rate:,.0f}/s), heap floor "
+                      f"{self.floor:.3f}")
+                next_report += progress_every
+        return self
+
+    def set_labeled(self, texts, batch_size=SCORE_BATCH_SIZE):
+        """Already-labeled sentences: never selected, and used as initial k-center centers."""
+        texts = list(texts)
+        self.exclude.update(_text_hash(t) for t in texts)
+        parts = [self.project(self.vectorizer.transform([clean_text(t) for t in texts[i:i + batch_size]]))
+                 for i in range(0, len(texts), batch_size)]
+        self.labeled_vectors = np.vstack(parts) if parts else np.zeros((0, self.projection.shape[1]), np.float32)
+
+    def select(self):
+        """Greedy k-center over the heap candidates; returns dicts ordered by pick."""
+        if not self.heap:
+            return []
+        cand = sorted(self.heap, key=lambda item: (-item[0], item[1]))
+        V = np.vstack([c[4] for c in cand])
+        min_dist = np.full(len(cand), np.inf, dtype=np.float32)
+        labeled = self.labeled_vectors
+        if len(labeled):
+            for i in range(0, len(labeled), 4096):
+                # unit vectors: squared distance = 2 - 2 cos
+                d = 2 - 2 * (V @ labeled[i:i + 4096].T)
+                min_dist = np.minimum(min_dist, d.min(axis=1))
+        picked = []
+        first = 0 if np.isinf(min_dist).all() else int(np.argmax(min_dist))
+        for _ in range(min(self.k, len(cand))):
+            j = first if not picked else int(np.argmax(min_dist))
+            if picked and min_dist[j] <= 0:
+                break   # everything left duplicates a picked/labeled sentence
+            picked.append(j)
+            min_dist = np.minimum(min_dist, 2 - 2 * (V @ V[j]))
+            min_dist[j] = -1
+        return [{"id": cand[j][2], "sentence": cand[j][3], "uncertainty": cand[j][0], "rank": r + 1}
+                for r, j in enumerate(picked)]
+
+
+def read_labeled_sentences(path):
+    """Sentences already labeled by label.py (aspect_results.jsonl)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                sentence = json.loads(line).get("sentence")
+            except json.JSONDecodeError:
+                continue
+            if sentence:
+                yield sentence
+
+
+def write_selection(selected, out_txt, out_jsonl=None):
+    """One sentence per line for label.py (INPUT_FILE), plus an optional scored sidecar."""
+    with open(out_txt, "w", encoding="utf-8") as f:
+        for s in selected:
+            f.write(" ".join(s["sentence"].split()) + "\n")
+    if out_jsonl:
+        with open(out_jsonl, "w", encoding="utf-8") as f:
+            for s in selected:
+                f.write(json.dumps(s, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Select uncertain, diverse sentences for LLM labeling")
+    parser.add_argument("pool", help="unlabeled pool: .txt (one per line) or .jsonl with text/sentence")
+    parser.add_argument("-k", type=int, default=1000, help="number of sentences to select")
+    parser.add_argument("--model", default=ENGLISH_MODEL_PATH,
+                        help="joblib dict with 'vectorizer' and 'model' (python -m absa.pipeline train-polarity)")
+    parser.add_argument("--extractor", choices=["auto", "tagger", "lexicon", "none"], default="auto",
+                        help="score aspect windows from this extractor (auto: tagger, else lexicon, else none); "
+                             "none scores whole sentences")
+    parser.add_argument("--tagger", default=ASPECT_TAGGER_PATH)
+    parser.add_argument("--lexicon", default=ASPECT_LEXICON_PATH)
+    parser.add_argument("--labeled", help="label.py output (aspect_results.jsonl) to exclude and cover")
+    parser.add_argument("--out", default="sentences_to_label.txt")
+    parser.add_argument("--scores-out", help="also write id/uncertainty/rank JSONL")
+    parser.add_argument("--candidate-factor", type=int, default=CANDIDATE_FACTOR)
+    parser.add_argument("--n-jobs", type=int, default=1, help="worker processes for scoring")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    args = parser.parse_args(argv)
+
+    artifact = joblib.load(args.model)
+    if args.extractor == "auto":
+        args.extractor = ("tagger" if os.path.exists(args.tagger) else
+                          "lexicon" if os.path.exists(args.lexicon) else "none")
+    if args.extractor == "none":
+        print("No aspect extractor; scoring whole sentences (a proxy: the model was trained on aspect windows)")
+    extractor = None if args.extractor == "none" else load_extractor(args.extractor, args.tagger, args.lexicon)
+    selector = ActiveSelector(artifact["vectorizer"], artifact["model"], args.k,
+                              candidate_factor=args.candidate_factor, seed=args.seed, extractor=extractor)
+    if args.labeled and os.path.exists(args.labeled):
+        selector.set_labeled(read_labeled_sentences(args.labeled))
+        print(f"Labeled sentences to cover/exclude: {len(selector.exclude)}")
+
+    t0 = time.perf_counter()
+    selector.consume(read_reviews(args.pool), n_jobs=args.n_jobs)
+    selected = selector.select()
+    elapsed = time.perf_counter() - t0
+    write_selection(selected, args.out, args.scores_out)
+    s = selector.stats
+    mean_u = np.mean([x["uncertainty"] for x in selected]) if selected else 0.0
+    print(f"Scored {s['scored']:,} sentences in {elapsed:.1f}s ({s['scored'] / max(elapsed, 1e-9):,.0f}/s); "
+          f"{s['excluded']} already labeled, {s['duplicates']} duplicates skipped")
+    print(f"Selected {len(selected)} sentences (mean uncertainty {mean_u:.3f}) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
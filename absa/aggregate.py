@@ -0,0 +1,302 @@
+# absa/aggregate.py
+
+import os
+import glob
+import json
+import hashlib
+import argparse
+
+import numpy as np
+
+from .config import AGGREGATE_STATE_PATH
+
+POLARITIES = ("positive", "neutral", "negative")
+POLARITY_INDEX = {p: i for i, p in enumerate(POLARITIES)}
+GENERAL_ASPECT = "<general>"   # sentence-level rows (Arabic track, no aspect term)
+NO_ASIN = "<none>"
+
+
+class AspectAggregator:
+    """
+    Per-(ASIN, aspect) polarity counters for both language tracks.
+
+    State is a handful of numpy arrays indexed by an interned (asin, aspect)
+    row id:
+      counts  (rows, 3)            positive / neutral / negative
+      samples (rows, max_samples)  first sample ids seen (interned), -1 = empty
+    Sentence ids are kept as given (int or str) in sample_ids; only the ids that
+    land in a sample slot are interned. merge_rows() updates the arrays with
+    np.add.at, then re-ranks only the rows of the ASINs it touched (asin_rows),
+    so a merge costs the size of those products, and top_aspects() is a lookup.
+    """
+
+    def __init__(self, max_samples: int = 5, top_k: int = 10):
+        self.max_samples = max_samples
+        self.top_k = top_k
+        self.asins = {}      # asin -> id
+        self.aspects = {}    # aspect -> id
+        self.aspect_names = []   # aspect id -> aspect
+        self.rows = {}       # (asin_id, aspect_id) -> row
+        self.asin_rows = {}  # asin_id -> [row, ...]
+        self.sample_ids = []     # interned sample id -> sentence id as given
+        self._sample_index = {}
+        self.row_asin = np.zeros(0, dtype=np.int32)
+        self.row_aspect = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros((0, 3), dtype=np.int64)
+        self.samples = np.full((0, max_samples), -1, dtype=np.int64)
+        self.n_rows = 0
+        self.sources = set()   # content hashes of the shards already merged
+        self._top = {}         # asin_id -> [(aspect, pos, neu, neg), ...]
+        self._global_top = []
+
+    # ---------- storage ----------
+
+    def _grow(self, needed):
+        cap = len(self.counts)
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2, 1024)
+        self.counts = np.vstack([self.counts, np.zeros((new_cap - cap, 3), dtype=np.int64)])
+        self.samples = np.vstack([self.samples, np.full((new_cap - cap, self.max_samples), -1, dtype=np.int64)])
+        self.row_asin = np.concatenate([self.row_asin, np.zeros(new_cap - cap, dtype=np.int32)])
+        self.row_aspect = np.concatenate([self.row_aspect, np.zeros(new_cap - cap, dtype=np.int32)])
+
+    def _row(self, asin, aspect):
+        a = self.asins.setdefault(asin, len(self.asins))
+        b = self.aspects.get(aspect)
+        if b is None:
+            b = self.aspects[aspect] = len(self.aspect_names)
+            self.aspect_names.append(aspect)
+        row = self.rows.get((a, b))
+        if row is None:
+            row = self.rows[(a, b)] = self.n_rows
+            self.n_rows += 1
+            self._grow(self.n_rows)
+            self.row_asin[row] = a
+            self.row_aspect[row] = b
+            self.asin_rows.setdefault(a, []).append(row)
+        return row
+
+    def _intern_sample(self, sid):
+        i = self._sample_index.get(sid)
+        if i is None:
+            i = self._sample_index[sid] = len(self.sample_ids)
+            self.sample_ids.append(sid)
+        return i
+
+    @staticmethod
+    def _norm_aspect(aspect):
+        if aspect is None:
+            return GENERAL_ASPECT
+        return " ".join(aspect.lower().split())
+
+    # ---------- updates ----------
+
+    def merge_rows(self, rows):
+        """
+        rows: iterable of pipeline output dicts
+        {"id": int|str, "asin"?: str, "aspect": str|None, "polarity": str}.
+        Rows without a known polarity are ignored.
+        """
+        idx, pol, ids = [], [], []
+        for r in rows:
+            p = POLARITY_INDEX.get(r.get("polarity"))
+            if p is None:
+                continue
+            idx.append(self._row(r.get("asin") or NO_ASIN, self._norm_aspect(r.get("aspect"))))
+            pol.append(p)
+            ids.append(r.get("id"))
+        if not idx:
+            return 0
+        idx = np.asarray(idx, dtype=np.int64)
+        np.add.at(self.counts, (idx, np.asarray(pol)), 1)
+        self._add_samples(idx, ids)
+        self._refresh_top(np.unique(self.row_asin[idx]))
+        return len(idx)
+
+    def _add_samples(self, idx, ids):
+        free = {}   # row -> empty sample slots left
+        for row, sid in zip(idx.tolist(), ids):
+            if sid is None:
+                continue
+            f = free.get(row)
+            if f is None:
+                f = int((self.samples[row] == -1).sum())
+            if f:
+                self.samples[row, self.max_samples - f] = self._intern_sample(sid)
+                f -= 1
+            free[row] = f
+
+    def merge(self, other):
+        """Fold another aggregator (e.g. the other language track) into this one."""
+        inv_asin = {v: k for k, v in other.asins.items()}
+        touched = set()
+        for (a, b), row in other.rows.items():
+            mine = self._row(inv_asin[a], other.aspect_names[b])
+            self.counts[mine] += other.counts[row]
+            extra = [self._intern_sample(other.sample_ids[s]) for s in other.samples[row] if s >= 0]
+            have = [s for s in self.samples[mine] if s >= 0]
+            merged = (have + [s for s in extra if s not in have])[:self.max_samples]
+            self.samples[mine, :len(merged)] = merged
+            touched.add(self.row_asin[mine])
+        self.sources |= other.sources
+        self._refresh_top(np.fromiter(touched, dtype=np.int32))
+
+    @staticmethod
+    def shard_key(path):
+        """Content hash of a shard: every pipeline run rewrites part-00000.jsonl, so paths repeat."""
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return "sha1:" + h.hexdigest()
+
+    def merge_shards(self, paths):
+        """Merge pipeline JSONL shards whose content has not been merged before."""
+        new = 0
+        for path in sorted(paths):
+            key = self.shard_key(path)
+            legacy = os.path.abspath(path)   # states saved before sources were content hashes
+            if key in self.sources:
+                continue
+            if legacy in self.sources:
+                print(f"⚠ {path} was merged under its path by an older version; "
+                      f"assuming unchanged and recording its content hash")
+                self.sources.discard(legacy)
+                self.sources.add(key)
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                new += self.merge_rows(json.loads(line) for line in f if line.strip())
+            self.sources.add(key)
+        return new
+
+    # ---------- queries ----------
+
+    def _refresh_top(self, asin_ids):
+        for a in asin_ids.tolist():
+            group = np.asarray(self.asin_rows.get(a, ()), dtype=np.int64)
+            if len(group) == 0:
+                continue
+            t = self.counts[group].sum(axis=1)
+            k = min(self.top_k, len(group))
+            best = np.argpartition(-t, k - 1)[:k]
+            best = group[best[np.argsort(-t[best], kind="stable")]]
+            self._top[a] = [(self.aspect_names[self.row_aspect[r]], *map(int, self.counts[r])) for r in best]
+        self._global_top = None   # recomputed lazily, once, on the next query
+
+    def top_aspects(self, asin=None, k=None):
+        """
+        Top aspects by mention count as [(aspect, pos, neu, neg), ...].
+        asin=None ranks aspects across all products. A k above top_k widens the
+        cached lists once (every ASIN is re-ranked), later queries are lookups.
+        """
+        k = self.top_k if k is None else k
+        if k > self.top_k:
+            self.top_k = k
+            self._refresh_top(np.fromiter(self.asin_rows, dtype=np.int64))
+            self._global_top = None
+        if asin is None:
+            if self._global_top is None:
+                self._global_top = self._compute_global_top()
+            return self._global_top[:k]
+        a = self.asins.get(asin)
+        return [] if a is None else self._top.get(a, [])[:k]
+
+    def _compute_global_top(self):
+        n = self.n_rows
+        per_aspect = np.zeros((len(self.aspects), 3), dtype=np.int64)
+        np.add.at(per_aspect, self.row_aspect[:n], self.counts[:n])
+        order = np.argsort(-per_aspect.sum(axis=1), kind="stable")[:self.top_k]
+        return [(self.aspect_names[b], *map(int, per_aspect[b])) for b in order]
+
+    def counts_for(self, asin, aspect):
+        row = self.rows.get((self.asins.get(asin), self.aspects.get(self._norm_aspect(aspect))))
+        if row is None:
+            return None
+        return {
+            **dict(zip(POLARITIES, map(int, self.counts[row]))),
+            "samples": [self.sample_ids[s] for s in self.samples[row] if s >= 0],
+        }
+
+    # ---------- persistence ----------
+
+    def save(self, path: str = AGGREGATE_STATE_PATH):
+        n = self.n_rows
+        meta = {
+            "max_samples": self.max_samples,
+            "top_k": self.top_k,
+            "asins": list(self.asins),
+            "aspects": self.aspect_names,
+            "sources": sorted(self.sources),
+            "sample_ids": self.sample_ids,
+        }
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            meta=np.array(json.dumps(meta, ensure_ascii=False)),
+            row_asin=self.row_asin[:n],
+            row_aspect=self.row_aspect[:n],
+            counts=self.counts[:n],
+            samples=self.samples[:n],
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = AGGREGATE_STATE_PATH):
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            agg = cls(max_samples=meta["max_samples"], top_k=meta["top_k"])
+            agg.asins = {a: i for i, a in enumerate(meta["asins"])}
+            agg.aspect_names = list(meta["aspects"])
+            agg.aspects = {a: i for i, a in enumerate(agg.aspect_names)}
+            agg.sources = set(meta["sources"])
+            agg.row_asin = z["row_asin"].copy()
+            agg.row_aspect = z["row_aspect"].copy()
+            agg.counts = z["counts"].copy()
+            agg.samples = z["samples"].copy()
+        if "sample_ids" in meta:
+            agg.sample_ids = meta["sample_ids"]
+        else:
+            # states saved before interning stored the (integer) sentence ids themselves
+            stored = agg.samples >= 0
+            agg.sample_ids = np.unique(agg.samples[stored]).tolist()
+            agg.samples[stored] = np.searchsorted(agg.sample_ids, agg.samples[stored])
+        agg._sample_index = {sid: i for i, sid in enumerate(agg.sample_ids)}
+        agg.n_rows = len(agg.counts)
+        agg.rows = {}
+        for i, (a, b) in enumerate(zip(agg.row_asin.tolist(), agg.row_aspect.tolist())):
+            agg.rows[(a, b)] = i
+            agg.asin_rows.setdefault(a, []).append(i)
+        agg._refresh_top(np.fromiter(agg.asin_rows, dtype=np.int64))
+        return agg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate pipeline output into per-product aspect counts")
+    parser.add_argument("--state", default=AGGREGATE_STATE_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_up = sub.add_parser("update", help="merge new pipeline shards into the saved state")
+    p_up.add_argument("inputs", nargs="+", help="shard files or directories of part-*.jsonl")
+
+    p_top = sub.add_parser("top", help="print the top aspects")
+    p_top.add_argument("--asin", default=None)
+    p_top.add_argument("-k", type=int, default=None, help="number of aspects (default: the state's top_k)")
+
+    args = parser.parse_args(argv)
+    agg = AspectAggregator.load(args.state) if os.path.exists(args.state) else AspectAggregator()
+
+    if args.cmd == "update":
+        paths = []
+        for p in args.inputs:
+            paths.extend(sorted(glob.glob(os.path.join(p, "part-*.jsonl"))) if os.path.isdir(p) else [p])
+        new = agg.merge_shards(paths)
+        agg.save(args.state)
+        print(f"Merged {new} rows; {agg.n_rows} (asin, aspect) pairs over {len(agg.asins)} products")
+    else:
+        for aspect, pos, neu, neg in agg.top_aspects(args.asin, k=args.k):
+            print(f"{aspect:<30} +{pos:<6} ={neu:<6} -{neg:<6}")
+
+
+if __name__ == "__main__":
+    main()
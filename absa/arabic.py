@@ -0,0 +1,191 @@
+# absa/arabic.py
+
+import re
+import json
+import time
+import argparse
+from multiprocessing import Pool
+
+import numpy as np
+
+from .config import ARABIC_PATH
+
+# Harakat (fathatan .. sukun), superscript alef, tatweel and Quranic marks.
+DIACRITICS = (
+    [chr(c) for c in range(0x064B, 0x0653)]
+    + [chr(0x0670), chr(0x0640)]
+    + [chr(c) for c in range(0x06D6, 0x06EE)]
+)
+
+# Orthographic normalization, as in CAMeL Tools' light MSA preprocessing.
+CHAR_MAP = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",    # Alef variants -> bare Alef
+    "ة": "ه",                                   # Taa Marbuta -> Haa
+    "ى": "ي",                                   # Alef Maqsura -> Yaa
+    "ؤ": "و", "ئ": "ي",                         # Hamza on carriers
+    "،": ",", "؛": ";", "؟": "?",               # Arabic punctuation
+}
+# Arabic-Indic and Extended Arabic-Indic digits -> ASCII
+for _i in range(10):
+    CHAR_MAP[chr(0x0660 + _i)] = str(_i)
+    CHAR_MAP[chr(0x06F0 + _i)] = str(_i)
+
+# Built once at import; str.translate does the whole mapping in one C pass.
+NORMALIZE_TABLE = str.maketrans({**CHAR_MAP, **{d: None for d in DIACRITICS}})
+DIACRITICS_TABLE = str.maketrans({d: None for d in DIACRITICS})
+
+# The same table as a code-point lookup array for whole-batch normalization.
+# Every character str.split() treats as whitespace is folded to a plain space
+# so runs can be collapsed with array ops; NUL is reserved as the text separator.
+_DELETE = np.uint32(0xFFFFFFFF)
+_SPACE = np.uint32(0x20)
+_SEP = np.uint32(0)
+_WHITESPACE = [c for c in range(0x10000) if chr(c).isspace()]
+NORMALIZE_LUT = np.arange(0x10000, dtype=np.uint32)
+for _src, _dst in NORMALIZE_TABLE.items():
+    NORMALIZE_LUT[_src] = _DELETE if _dst is None else ord(_dst)
+NORMALIZE_LUT[_WHITESPACE] = _SPACE
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def normalize_arabic(text: str, remove_diacritics: bool = True) -> str:
+    """
+    Arabic counterpart of clean_text():
+    - remove HTML-like tags
+    - unify Alef variants, Taa Marbuta, Alef Maqsura, Hamza carriers, digits
+    - remove diacritics and tatweel
+    - lowercase any Latin text and collapse whitespace
+    """
+    if "<" in text:
+        text = _TAG_RE.sub(" ", text)
+    table = NORMALIZE_TABLE if remove_diacritics else str.maketrans(CHAR_MAP)
+    return " ".join(text.translate(table).lower().split())
+
+
+def strip_diacritics(text: str) -> str:
+    return text.translate(DIACRITICS_TABLE)
+
+
+def _normalize_chunk(texts):
+    """
+    Vectorized normalize_arabic() over a list: join the chunk once, map every
+    code point through NORMALIZE_LUT, drop deleted characters and collapse
+    whitespace with boolean masks, then split back on the separator.
+    """
+    if not texts:
+        return []
+    joined = "\0".join(texts)
+    if "<" in joined or joined.count("\0") != len(texts) - 1:
+        return [normalize_arabic(t) for t in texts]
+
+    cp = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    bmp = cp < 0x10000
+    cp = np.where(bmp, NORMALIZE_LUT[np.where(bmp, cp, 0)], cp)
+    cp = cp[cp != _DELETE]
+    if cp.size == 0:
+        return [""] * len(texts)
+
+    # drop a space at the start of a text or right after another space ...
+    is_space = cp == _SPACE
+    prev = np.empty_like(cp)
+    prev[0] = _SEP
+    prev[1:] = cp[:-1]
+    cp = cp[~(is_space & ((prev == _SPACE) | (prev == _SEP)))]
+    # ... then the single space left at the end of a text, if any
+    is_space = cp == _SPACE
+    nxt = np.empty_like(cp)
+    nxt[-1:] = _SEP
+    nxt[:-1] = cp[1:]
+    cp = cp[~(is_space & (nxt == _SEP))]
+
+    return cp.tobytes().decode("utf-32-le").lower().split("\0")
+
+
+def normalize_batch(texts, n_jobs: int = 1, chunksize: int = 20000):
+    """
+    Normalize a list of texts; output matches [normalize_arabic(t) for t in texts].
+    Chunks are normalized with array ops. With n_jobs > 1 the chunks are fanned
+    out to a process pool; below a few chunks the pool start-up costs more than
+    it saves, so we stay in-process.
+    """
+    texts = texts if isinstance(texts, list) else list(texts)
+    if n_jobs <= 1 or len(texts) <= chunksize * 2:
+        if len(texts) > chunksize:
+            out = []
+            for i in range(0, len(texts), chunksize):
+                out.extend(_normalize_chunk(texts[i:i + chunksize]))
+            return out
+        return _normalize_chunk(texts)
+
+    chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+    with Pool(processes=n_jobs) as pool:
+        out = []
+        for part in pool.imap(_normalize_chunk, chunks):
+            out.extend(part)
+    return out
+
+
+# ------------------------------------------
+# Benchmark vs. the chained-regex approach
+# ------------------------------------------
+
+_REGEX_STEPS = [
+    (re.compile(r"<[^>]+>"), " "),
+    (re.compile(r"[إأآٱ]"), "ا"),
+    (re.compile(r"ة"), "ه"),
+    (re.compile(r"ى"), "ي"),
+    (re.compile(r"ؤ"), "و"),
+    (re.compile(r"ئ"), "ي"),
+    (re.compile(r"[\u064B-\u0652\u0670\u0640\u06D6-\u06ED]"), ""),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def _normalize_regex(text: str) -> str:
+    for pattern, repl in _REGEX_STEPS:
+        text = pattern.sub(repl, text)
+    return text.strip().lower()
+
+
+def benchmark(path: str = ARABIC_PATH, repeat: int = 50, n_jobs: int = 4):
+    with open(path, "r", encoding="utf-8") as f:
+        sentences = [json.loads(line)["sentence"] for line in f if line.strip()]
+    texts = sentences * repeat
+    n = len(texts)
+    print(f"Benchmarking on {len(sentences)} sentences x {repeat} = {n} texts")
+
+    results = {}
+
+    start = time.perf_counter()
+    [_normalize_regex(t) for t in texts]
+    results["regex"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    [normalize_arabic(t) for t in texts]
+    results["translate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalize_batch(texts, n_jobs=1)
+    results["batch"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalize_batch(texts, n_jobs=n_jobs)
+    results[f"batch_x{n_jobs}"] = time.perf_counter() - start
+
+    for name, secs in results.items():
+        print(f"{name:>14}: {secs:.3f}s ({n / secs:,.0f} texts/s)")
+    return {name: n / secs for name, secs in results.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Arabic normalization")
+    parser.add_argument("--path", default=ARABIC_PATH)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args(argv)
+    benchmark(args.path, repeat=args.repeat, n_jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# absa/arabic_train.py
+
+import os
+import sys
+import argparse
+from collections import Counter
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import ARABIC_PATH, ARABIC_MODEL_PATH, RANDOM_STATE, TEST_SIZE
+from absa.jsonl_loader import iter_labeled_sentences
+from absa.arabic import normalize_batch
+from absa.profiling import add_profile_args, report_from_args
+
+
+def load_arabic_dataset(path: str = ARABIC_PATH, chunksize: int = 20000):
+    """
+    Stream arabic_classification.jsonl and normalize it chunk by chunk.
+    Returns (texts, labels) as lists.
+    """
+    texts, labels = [], []
+    raw = []
+    for sentence, label in iter_labeled_sentences(path):
+        raw.append(sentence)
+        labels.append(label)
+        if len(raw) == chunksize:
+            texts.extend(normalize_batch(raw))
+            raw = []
+    if raw:
+        texts.extend(normalize_batch(raw))
+    return texts, labels
+
+
+# Linear base models: the artifact serves decision_function and shrinks coef_ on save
+EXPORTABLE_MODELS = ("logreg", "svm")
+
+
+class ArabicSentimentModel:
+    """
+    Serving artifact for the Arabic track: normalizer + TF-IDF + one linear model.
+    No LLM call at inference time.
+    """
+
+    def __init__(self, vectorizer, model):
+        self.vectorizer = vectorizer
+        self.model = model
+
+    def predict(self, texts, normalized: bool = False):
+        texts = list(texts) if normalized else normalize_batch(texts)
+        return self.model.predict(self.vectorizer.transform(texts))
+
+    def decision_function(self, texts, normalized: bool = False):
+        texts = list(texts) if normalized else normalize_batch(texts)
+        return self.model.decision_function(self.vectorizer.transform(texts))
+
+    def save(self, path: str = ARABIC_MODEL_PATH):
+        import joblib
+        from absa.features import strip_for_inference
+        from absa.models import shrink_linear_model
+
+        strip_for_inference(self.vectorizer)
+        shrink_linear_model(self.model)
+        joblib.dump({"vectorizer": self.vectorizer, "model": self.model}, path, compress=3)
+        return os.path.getsize(path)
+
+    @classmethod
+    def load(cls, path: str = ARABIC_MODEL_PATH):
+        import joblib
+
+        obj = joblib.load(path)
+        return cls(obj["vectorizer"], obj["model"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Arabic sentence-polarity track")
+    parser.add_argument("--data", default=ARABIC_PATH)
+    parser.add_argument("--out", default=ARABIC_MODEL_PATH)
+    parser.add_argument("--export", default="svm", choices=EXPORTABLE_MODELS,
+                        help="base model to export as the inference artifact")
+    add_profile_args(parser, default_report="arabic_train_report.json")
+    args = parser.parse_args(argv)
+
+    # sklearn loads here, after argument parsing, so --help stays instant
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score, classification_report
+    from absa.features import build_vectorizer
+    from absa.models import get_base_models, get_ensemble
+    from absa.evaluate import summarize_results
+    from absa.significance import bootstrap_ci, compare_models
+
+    report = report_from_args("arabic_train", args)
+
+    # ============================
+    # 1. Load (streamed) + normalize
+    # ============================
+    print(f"Loading Arabic sentences from: {args.data}")
+    with report.stage("load_normalize") as rec:
+        texts, labels = load_arabic_dataset(args.data)
+        rec["items"] = len(texts)
+    print(f"Loaded {len(texts)} sentences in {rec['wall_sec']:.2f}s")
+    print("Label counts:", dict(Counter(labels)))
+
+    X_train_texts, X_test_texts, y_train, y_test = train_test_split(
+        texts,
+        labels,
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
+        stratify=labels
+    )
+
+    # ============================
+    # 2. TF-IDF (word + char n-grams)
+    # ============================
+    print("\nFitting TF-IDF (word + char) on training data...")
+    vectorizer = build_vectorizer()
+    with report.stage("tfidf_fit", items=len(X_train_texts)) as fit_rec:
+        X_train_vec = vectorizer.fit_transform(X_train_texts)
+    with report.stage("tfidf_transform", items=len(X_test_texts)) as tr_rec:
+        X_test_vec = vectorizer.transform(X_test_texts)
+    vec_time = fit_rec["wall_sec"] + tr_rec["wall_sec"]
+    print(f"TF-IDF done in {vec_time:.2f}s, {X_train_vec.shape[1]} features")
+
+    # ============================
+    # 3. Base models + ensemble (held-out test set)
+    # ============================
+    base_models = get_base_models()
+    results = []
+    for name, model in list(base_models.items()) + [("ensemble", get_ensemble(base_models))]:
+        print(f"\n===== {name} =====")
+        with report.stage(f"fit:{name}", items=len(y_train)) as rec:
+            model.fit(X_train_vec, y_train)
+        train_time = rec["wall_sec"]
+        with report.stage(f"predict:{name}", items=len(y_test)) as rec:
+            y_pred = model.predict(X_test_vec)
+        pred_time = rec["wall_sec"]
+        acc, ci_low, ci_high = bootstrap_ci(y_test, y_pred)
+        print(f"Accuracy: {acc:.4f}  (95% CI {ci_low:.4f}–{ci_high:.4f}; "
+              f"train {train_time:.2f}s, predict {pred_time:.3f}s)")
+        print(classification_report(y_test, y_pred, digits=4))
+        results.append({
+            "model": name,
+            "accuracy": acc,
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            "y_pred": y_pred,
+            "train_sec": train_time,
+            "predict_per_sec": len(y_test) / pred_time if pred_time > 0 else float("inf"),
+        })
+
+    summarize_results(results)
+    with report.stage("significance", items=len(y_test)):
+        compare_models(y_test, {r["model"]: r["y_pred"] for r in results})
+
+    # ============================
+    # 4. Export compact artifact + end-to-end throughput
+    # ============================
+    artifact = ArabicSentimentModel(vectorizer, base_models[args.export])
+    size = artifact.save(args.out)
+    print(f"\nSaved {args.export} artifact to {args.out} ({size / 1024:.0f} KiB)")
+
+    served = ArabicSentimentModel.load(args.out)
+    with report.stage("serve", items=len(X_test_texts)) as rec:
+        y_served = served.predict(X_test_texts, normalized=True)
+    serve_time = rec["wall_sec"]
+    print(f"Artifact accuracy: {accuracy_score(y_test, y_served):.4f}")
+    print(f"Artifact throughput: {len(X_test_texts) / serve_time:,.0f} sentences/s")
+
+    if args.profile is not None:
+        report.write_json(args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# absa/aspect_lexicon.py
+
+import json
+import time
+import argparse
+from collections import Counter
+
+from .config import DATA_PATH, AMAZON_PATH, ASPECT_LEXICON_PATH
+from .aspect_tagger import tokenize_with_offsets
+
+_END = None   # trie key marking "a term ends here"; never a token
+
+
+class AspectLexicon:
+    """
+    Gazetteer of known aspect terms compiled into a token trie.
+
+    Matching walks the trie from each token position and keeps the longest
+    match (leftmost-longest, non-overlapping), so a batch is scanned in
+    O(tokens x longest term) — terms are at most a few tokens long.
+    add() inserts into the live trie, so new labeled terms never force a rebuild.
+    """
+
+    def __init__(self, min_count: int = 1):
+        self.min_count = min_count
+        self.counts = Counter()   # normalized term -> times seen as a gold/LLM aspect
+        self.root = {}
+        self.max_len = 0
+
+    @staticmethod
+    def _key(term: str):
+        return tuple(t.lower() for t in tokenize_with_offsets(term)[0])
+
+    def add(self, term: str, count: int = 1):
+        """Count one more occurrence of term; insert it once it reaches min_count."""
+        key = self._key(term)
+        if not key:
+            return
+        self.counts[key] += count
+        if self.counts[key] < self.min_count:
+            return
+        node = self.root
+        for tok in key:
+            node = node.setdefault(tok, {})
+        node[_END] = key
+        self.max_len = max(self.max_len, len(key))
+
+    def update(self, terms):
+        for term in terms:
+            self.add(term)
+        return self
+
+    def __contains__(self, term):
+        node = self.root
+        for tok in self._key(term):
+            node = node.get(tok)
+            if node is None:
+                return False
+        return _END in node
+
+    def __len__(self):
+        return sum(1 for c in self.counts.values() if c >= self.min_count)
+
+    @classmethod
+    def from_parsed(cls, *parsed_lists, min_count: int = 1):
+        """Mine terms from load_semeval_xml / load_jsonl_aspects outputs."""
+        lex = cls(min_count=min_count)
+        for parsed in parsed_lists:
+            for item in parsed:
+                for asp in item["aspects"]:
+                    lex.add(asp["term"])
+        return lex
+
+    # ---------- matching ----------
+
+    def find(self, text: str):
+        """Return [{"term", "from", "to"}, ...] for every lexicon hit in text."""
+        tokens, starts, ends = tokenize_with_offsets(text)
+        low = [t.lower() for t in tokens]
+        root = self.root
+        spans = []
+        i, n = 0, len(low)
+        while i < n:
+            node = root.get(low[i])
+            best = -1
+            j = i
+            while node is not None:
+                if _END in node:
+                    best = j
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(low[j])
+            if best >= 0:
+                s, e = starts[i], ends[best]
+                spans.append({"term": text[s:e], "from": s, "to": e})
+                i = best + 1
+            else:
+                i += 1
+        return spans
+
+    def predict_spans(self, text: str):
+        """AspectTagger.predict_spans() counterpart, so either can be a Pipeline extractor."""
+        return self.find(text)
+
+    def extract(self, items):
+        """
+        Same contract as AspectTagger.extract(): items of {"id", "text"} in,
+        load_semeval_xml() structure with candidate spans (polarity None) out.
+        """
+        out = []
+        for item in items:
+            aspects = [dict(span, polarity=None) for span in self.find(item["text"])]
+            out.append({"id": item.get("id"), "text": item["text"], "aspects": aspects})
+        return out
+
+    # ---------- persistence ----------
+
+    def save(self, path: str = ASPECT_LEXICON_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "min_count": self.min_count,
+                "terms": [[" ".join(k), c] for k, c in self.counts.most_common()],
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str = ASPECT_LEXICON_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        lex = cls(min_count=obj["min_count"])
+        for term, count in obj["terms"]:
+            lex.add(term, count=count)
+        return lex
+
+
+def main(argv=None):
+    import os
+    from .data_loader import load_semeval_xml
+    from .jsonl_loader import load_jsonl_aspects
+
+    parser = argparse.ArgumentParser(description="Build the aspect gazetteer and time batch matching")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--llm", default=AMAZON_PATH, help="cleaned LLM output JSONL (optional)")
+    parser.add_argument("--min-count", type=int, default=2)
+    parser.add_argument("--out", default=ASPECT_LEXICON_PATH)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    gold = load_semeval_xml(args.data)
+    sources = [gold]
+    if args.llm and os.path.exists(args.llm):
+        sources.append(load_jsonl_aspects(args.llm))
+    else:
+        print(f"No LLM output at {args.llm}; mining gold terms only.")
+
+    lex = AspectLexicon.from_parsed(*sources, min_count=args.min_count)
+    print(f"Lexicon: {len(lex)} terms (min_count={args.min_count}), longest {lex.max_len} tokens")
+
+    items = gold * args.repeat
+    t0 = time.perf_counter()
+    found = lex.extract(items)
+    elapsed = time.perf_counter() - t0
+    n_spans = sum(len(x["aspects"]) for x in found)
+    print(f"Matched {n_spans} candidate spans in {len(items)} sentences "
+          f"({len(items) / elapsed:,.0f} sentences/s)")
+
+    lex.save(args.out)
+    print(f"Saved lexicon to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# absa/aspect_tagger.py
+
+import re
+import time
+import random
+import argparse
+
+import numpy as np
+import joblib
+
+from .config import ASPECT_TAGGER_PATH, DATA_PATH, RANDOM_STATE, TEST_SIZE, WINDOW_SIZE
+
+TAGS = ("O", "B", "I")
+O, B, I = 0, 1, 2
+_NEG_INF = -1e9
+
+TOKEN_RE = re.compile(r"\w+(?:[-']\w+)*|[^\w\s]")
+
+def tokenize_with_offsets(text: str):
+    """Return (tokens, starts, ends) with character offsets into text."""
+    tokens, starts, ends = [], [], []
+    for m in TOKEN_RE.finditer(text):
+        tokens.append(m.group())
+        starts.append(m.start())
+        ends.append(m.end())
+    return tokens, starts, ends
+
+
+def bio_tags(starts, ends, aspects):
+    """BIO tag ids for one sentence from its aspectTerms from/to offsets."""
+    tags = [O] * len(starts)
+    for asp in aspects:
+        a_from, a_to = asp["from"], asp["to"]
+        first = True
+        for i, (s, e) in enumerate(zip(starts, ends)):
+            if s < a_to and e > a_from:
+                tags[i] = B if first else I
+                first = False
+    return tags
+
+
+def _shape(tok):
+    if tok.isdigit():
+        return "D"
+    if tok.isupper():
+        return "U"
+    if tok[:1].isupper():
+        return "T"
+    if tok.isalpha():
+        return "L"
+    return "X"
+
+
+def token_features(tokens):
+    """Hand-crafted sparse features, one list of strings per token."""
+    low = [t.lower() for t in tokens]
+    padded = ["<s>", "<s>"] + low + ["</s>", "</s>"]
+    feats = []
+    for i, (tok, w) in enumerate(zip(tokens, low)):
+        j = i + 2
+        feats.append([
+            "b",
+            "w=" + w,
+            "p3=" + w[:3],
+            "s3=" + w[-3:],
+            "s2=" + w[-2:],
+            "sh=" + _shape(tok),
+            "w-1=" + padded[j - 1],
+            "w-2=" + padded[j - 2],
+            "w+1=" + padded[j + 1],
+            "w+2=" + padded[j + 2],
+            "w-1w=" + padded[j - 1] + "|" + w,
+            "ww+1=" + w + "|" + padded[j + 1],
+        ])
+    return feats
+
+
+class AspectTagger:
+    """
+    BIO aspect-term tagger: averaged structured perceptron over sparse
+    features with first-order Viterbi decoding. Weights are a dense
+    (n_features, 3) array, so scoring a sentence is one fancy-indexed sum.
+    """
+
+    def __init__(self, epochs: int = 10, seed: int = RANDOM_STATE):
+        self.epochs = epochs
+        self.seed = seed
+        self.vocab = {}
+        self.W = None
+        self.T = None   # (4, 3): rows O, B, I, START -> cols O, B, I
+
+    # ---------- features ----------
+
+    def _feature_ids(self, tokens, grow=False):
+        vocab = self.vocab
+        ids = []
+        for fs in token_features(tokens):
+            row = []
+            for f in fs:
+                k = vocab.get(f)
+                if k is None and grow:
+                    k = vocab[f] = len(vocab)
+                if k is not None:
+                    row.append(k)
+            ids.append(row)
+        return ids
+
+    # ---------- decoding ----------
+
+    def _viterbi(self, feat_ids, W, T):
+        n = len(feat_ids)
+        if n == 0:
+            return []
+        flat = [k for row in feat_ids for k in row]
+        offsets = np.cumsum([0] + [len(row) for row in feat_ids[:-1]])
+        emit = np.add.reduceat(W[flat], offsets, axis=0)
+        back = np.zeros((n, 3), dtype=np.int8)
+        score = T[3] + emit[0]
+        trans = T[:3]
+        for t in range(1, n):
+            cand = score[:, None] + trans
+            back[t] = cand.argmax(axis=0)
+            score = cand.max(axis=0) + emit[t]
+        path = [int(score.argmax())]
+        for t in range(n - 1, 0, -1):
+            path.append(int(back[t, path[-1]]))
+        return path[::-1]
+
+    # ---------- training ----------
+
+    def fit(self, parsed):
+        """parsed: output of load_semeval_xml / load_jsonl_aspects."""
+        data = []
+        for item in parsed:
+            tokens, starts, ends = tokenize_with_offsets(item["text"])
+            if not tokens:
+                continue
+            data.append((self._feature_ids(tokens, grow=True),
+                         bio_tags(starts, ends, item["aspects"])))
+
+        F = len(self.vocab)
+        W = np.zeros((F, 3))
+        W_acc = np.zeros((F, 3))
+        T = np.zeros((4, 3))
+        T_acc = np.zeros((4, 3))
+        mask = self._transition_mask()
+        c = 1
+        rng = random.Random(self.seed)
+
+        for epoch in range(self.epochs):
+            rng.shuffle(data)
+            errors = 0
+            for feat_ids, gold in data:
+                pred = self._viterbi(feat_ids, W, T + mask)
+                if pred != gold:
+                    errors += 1
+                    prev_g = prev_p = 3
+                    for row, g, p in zip(feat_ids, gold, pred):
+                        if g != p:
+                            W[row, g] += 1
+                            W[row, p] -= 1
+                            W_acc[row, g] += c
+                            W_acc[row, p] -= c
+                        if g != p or prev_g != prev_p:
+                            T[prev_g, g] += 1
+                            T[prev_p, p] -= 1
+                            T_acc[prev_g, g] += c
+                            T_acc[prev_p, p] -= c
+                        prev_g, prev_p = g, p
+                c += 1
+            print(f"  epoch {epoch + 1}/{self.epochs}: {errors} sentences mis-tagged")
+
+        self.W = (W - W_acc / c).astype(np.float32)
+        self.T = (T - T_acc / c).astype(np.float32) + mask
+        return self
+
+    @staticmethod
+    def _transition_mask():
+        """I may only follow B or I."""
+        mask = np.zeros((4, 3), dtype=np.float32)
+        mask[O, I] = _NEG_INF
+        mask[3, I] = _NEG_INF
+        return mask
+
+    # ---------- inference ----------
+
+    def predict_spans(self, text: str):
+        """Return [{"term", "from", "to"}, ...] for one sentence."""
+        tokens, starts, ends = tokenize_with_offsets(text)
+        tags = self._viterbi(self._feature_ids(tokens), self.W, self.T)
+        spans = []
+        cur = None
+        for tag, s, e in zip(tags, starts, ends):
+            if tag == B or (tag == I and cur is None):
+                if cur is not None:
+                    spans.append(cur)
+                cur = [s, e]
+            elif tag == I:
+                cur[1] = e
+            else:
+                if cur is not None:
+                    spans.append(cur)
+                cur = None
+        if cur is not None:
+            spans.append(cur)
+        return [{"term": text[s:e], "from": s, "to": e} for s, e in spans]
+
+    def extract(self, items):
+        """
+        items: iterable of {"id", "text"} dicts.
+        Returns the load_semeval_xml() structure with predicted aspects
+        (polarity None), ready for build_apc_dataset_with_windows().
+        """
+        out = []
+        for item in items:
+            aspects = [dict(span, polarity=None) for span in self.predict_spans(item["text"])]
+            out.append({"id": item.get("id"), "text": item["text"], "aspects": aspects})
+        return out
+
+    def save(self, path: str = ASPECT_TAGGER_PATH):
+        joblib.dump({"vocab": self.vocab, "W": self.W, "T": self.T}, path, compress=3)
+
+    @classmethod
+    def load(cls, path: str = ASPECT_TAGGER_PATH):
+        obj = joblib.load(path)
+        tagger = cls()
+        tagger.vocab, tagger.W, tagger.T = obj["vocab"], obj["W"], obj["T"]
+        return tagger
+
+
+def span_prf(gold_parsed, pred_parsed):
+    """Exact-match span precision / recall / F1 on (from, to)."""
+    tp = fp = fn = 0
+    for g, p in zip(gold_parsed, pred_parsed):
+        gs = {(a["from"], a["to"]) for a in g["aspects"]}
+        ps = {(a["from"], a["to"]) for a in p["aspects"]}
+        tp += len(gs & ps)
+        fp += len(ps - gs)
+        fn += len(gs - ps)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train / benchmark the local aspect-term tagger")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--out", default=ASPECT_TAGGER_PATH)
+    parser.add_argument("--epochs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from sklearn.model_selection import train_test_split
+    from .data_loader import load_semeval_xml
+    from .aspect_windows import build_apc_dataset_with_windows
+
+    parsed = load_semeval_xml(args.data)
+    train, test = train_test_split(parsed, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    print(f"Training aspect tagger on {len(train)} sentences...")
+
+    t0 = time.perf_counter()
+    tagger = AspectTagger(epochs=args.epochs).fit(train)
+    print(f"Trained in {time.perf_counter() - t0:.2f}s ({len(tagger.vocab)} features)")
+
+    t0 = time.perf_counter()
+    pred = tagger.extract(test)
+    elapsed = time.perf_counter() - t0
+    p, r, f1 = span_prf(test, pred)
+    print(f"Held-out spans: P={p:.4f} R={r:.4f} F1={f1:.4f}")
+    print(f"Throughput: {len(test) / elapsed:,.0f} sentences/s")
+
+    windows = build_apc_dataset_with_windows([x for x in pred if x["aspects"]], window_size=WINDOW_SIZE)
+    print(f"Built {len(windows)} aspect windows from predicted spans")
+
+    tagger.save(args.out)
+    print(f"Saved tagger to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
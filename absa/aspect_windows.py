@@ -1,7 +1,6 @@
 # absa/aspect_windows.py
 
 import re
-import pandas as pd
 from .preprocess import clean_text
 
 def char_to_token_window(text: str, start_char: int, end_char: int, window_size: int = 5) -> str:
@@ -52,7 +51,21 @@ def char_to_token_window(text: str, start_char: int, end_char: int, window_size:
     return " ".join(window_tokens)
 
 
-def build_apc_dataset_with_windows(parsed_xml, window_size: int = 5) -> pd.DataFrame:
+def apc_raw_texts(parsed_xml, window_size: int = 5):
+    """
+    Yield every raw string build_apc_dataset_with_windows passes to clean_fn
+    (sentence, then window and term per aspect), so a batch cleaner can be
+    warmed up before the per-text calls.
+    """
+    for item in parsed_xml:
+        raw_text = item["text"]
+        yield raw_text
+        for asp in item["aspects"]:
+            yield char_to_token_window(raw_text, asp["from"], asp["to"], window_size=window_size)
+            yield asp["term"]
+
+
+def build_apc_dataset_with_windows(parsed_xml, window_size: int = 5, clean_fn=clean_text) -> "pandas.DataFrame":
     """
     Build a DataFrame with columns:
       - sentence: original sentence text (cleaned)
@@ -60,12 +73,14 @@ def build_apc_dataset_with_windows(parsed_xml, window_size: int = 5) -> pd.DataF
       - polarity: label
       - window: aspect-centered window with <ASP> tags
       - input_full: aspect + [SEP] + full sentence (for comparison)
+    clean_fn: cleaner for sentence/window/aspect (clean_text for English,
+    absa.arabic.normalize_arabic for the Arabic track).
     """
     rows = []
 
     for item in parsed_xml:
         raw_text = item["text"]
-        text = clean_text(raw_text)
+        text = clean_fn(raw_text)
 
         for asp in item["aspects"]:
             term = asp["term"]
@@ -75,8 +90,8 @@ def build_apc_dataset_with_windows(parsed_xml, window_size: int = 5) -> pd.DataF
 
             # Build window using original text (for offsets)
             window_raw = char_to_token_window(raw_text, start, end, window_size=window_size)
-            window = clean_text(window_raw)
-            aspect_clean = clean_text(term)
+            window = clean_fn(window_raw)
+            aspect_clean = clean_fn(term)
 
             input_full = f"{aspect_clean} [SEP] {text}"
 
@@ -89,6 +104,8 @@ def build_apc_dataset_with_windows(parsed_xml, window_size: int = 5) -> pd.DataF
                 "input_full": input_full,
             })
 
+    import pandas as pd   # only the dataset builder needs pandas; char_to_token_window stays light
+
     df = pd.DataFrame(rows)
     return df
 
@@ -0,0 +1,433 @@
+# absa/bench.py
+
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from statistics import median
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import DATA_PATH, RANDOM_STATE, TEST_SIZE, WINDOW_SIZE
+from absa.data_loader import load_semeval_xml
+from absa.jsonl_loader import load_jsonl_aspects
+from absa.preprocess import clean_text
+from absa.aspect_windows import char_to_token_window, build_apc_dataset_with_windows
+from absa.features import build_vectorizer, csr_nbytes, transform_to_memmap, MAX_CHAR_NGRAMS
+from absa.models import get_base_models
+from absa.fasttext_model import build_fasttext_matrix
+from absa.synth import CorpusSynthesizer, write_semeval_xml, write_aspect_jsonl
+
+SCALES = (1, 10, 100)
+RESULTS_DIR = "bench_results"
+REGRESSION_THRESHOLD = 0.10   # flag cases whose median got >10% slower
+STARTUP_BUDGET_MS = 300       # import time allowed for `python -m absa <command> --help`
+STARTUP_EXEMPT = ("bench",)   # benchmark harness: loads the whole stack by design
+
+
+class StubEmbedding:
+    """
+    Stand-in for a fastText model in benchmarks: get_sentence_vector averages
+    L2-normalized per-word vectors, like fastText does, but the word vectors are
+    seeded from a crc32 of the word instead of read from cc.en.300.bin.
+    """
+
+    def __init__(self, dim=300):
+        self.dim = dim
+        self._vectors = {}
+
+    def _word_vector(self, word):
+        v = self._vectors.get(word)
+        if v is None:
+            rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+            v = rng.standard_normal(self.dim).astype(np.float32)
+            v /= np.linalg.norm(v)
+            self._vectors[word] = v
+        return v
+
+    def get_sentence_vector(self, text):
+        words = text.split()
+        if not words:
+            return np.zeros(self.dim, dtype=np.float32)
+        return np.mean([self._word_vector(w) for w in words], axis=0)
+
+
+# ---------- datasets ----------
+
+def scale_dataset(parsed, factor, synthetic=False, seed=RANDOM_STATE):
+    """
+    Grow the parsed sentences `factor` times. Default: replicate them with unique
+    ids (offsets stay valid). synthetic=True: recombine templates and aspect terms
+    with CorpusSynthesizer, so vocabulary and n-gram counts grow like real data.
+    """
+    if factor == 1:
+        return parsed
+    if synthetic:
+        return list(CorpusSynthesizer(parsed, seed=seed).generate(len(parsed) * factor))
+    out = []
+    for k in range(factor):
+        for item in parsed:
+            out.append({"id": f"{item['id']}_{k}", "text": item["text"], "aspects": item["aspects"]})
+    return out
+
+
+# ---------- timing ----------
+
+def _time(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, times
+
+
+def _record(results, case, scale, n_items, times):
+    med = median(times)
+    rec = {
+        "case": case,
+        "scale": scale,
+        "n_items": n_items,
+        "repeat": len(times),
+        "min_sec": min(times),
+        "median_sec": med,
+        "items_per_sec": n_items / med if med > 0 else None,
+    }
+    results.append(rec)
+    print(f"{case:<24} x{scale:<4} n={n_items:<9} median {med:8.3f}s  "
+          f"{rec['items_per_sec'] or 0:>12,.0f} items/s")
+    return rec
+
+
+def run_scale(base_parsed, scale, repeat, workdir, cases=None, synthetic=False):
+    """Run every benchmark case on the dataset grown `scale` times."""
+    want = (lambda name: True) if not cases else (lambda name: any(name.startswith(c) for c in cases))
+    parsed = scale_dataset(base_parsed, scale, synthetic=synthetic)
+    n_sent = len(parsed)
+    n_asp = sum(len(p["aspects"]) for p in parsed)
+    results = []
+
+    xml_path = os.path.join(workdir, f"bench_x{scale}.xml")
+    jsonl_path = os.path.join(workdir, f"bench_x{scale}.jsonl")
+    write_semeval_xml(parsed, xml_path)
+    write_aspect_jsonl(parsed, jsonl_path)
+
+    if want("load_semeval_xml"):
+        _, t = _time(lambda: load_semeval_xml(xml_path), repeat)
+        _record(results, "load_semeval_xml", scale, n_sent, t)
+    if want("load_jsonl_aspects"):
+        _, t = _time(lambda: load_jsonl_aspects(jsonl_path), repeat)
+        _record(results, "load_jsonl_aspects", scale, n_sent, t)
+
+    texts = [p["text"] for p in parsed]
+    if want("clean_text"):
+        _, t = _time(lambda: [clean_text(s) for s in texts], repeat)
+        _record(results, "clean_text", scale, n_sent, t)
+
+    spans = [(p["text"], a["from"], a["to"]) for p in parsed for a in p["aspects"]]
+    if want("char_to_token_window"):
+        _, t = _time(lambda: [char_to_token_window(s, a, b, WINDOW_SIZE) for s, a, b in spans], repeat)
+        _record(results, "char_to_token_window", scale, n_asp, t)
+
+    df, t = _time(lambda: build_apc_dataset_with_windows(parsed, window_size=WINDOW_SIZE), repeat)
+    if want("build_apc_dataset"):
+        _record(results, "build_apc_dataset", scale, n_asp, t)
+
+    windows = df["window"].values
+    labels = df["polarity"].values
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(windows))
+    n_test = int(len(order) * TEST_SIZE)
+    test_idx, train_idx = order[:n_test], order[n_test:]
+
+    if want("tfidf_fit_transform") or want("fit:") or want("predict:"):
+        def fit_vectorizer():
+            vec = build_vectorizer()
+            return vec, vec.fit_transform(windows[train_idx])
+
+        (vectorizer, X_train), t = _time(fit_vectorizer, repeat)
+        if want("tfidf_fit_transform"):
+            _record(results, "tfidf_fit_transform", scale, len(train_idx), t)
+        X_test = vectorizer.transform(windows[test_idx])
+        y_train = labels[train_idx]
+
+        for name, model in get_base_models().items():
+            if want(f"fit:{name}"):
+                _, t = _time(lambda: model.fit(X_train, y_train), repeat)
+                _record(results, f"fit:{name}", scale, len(train_idx), t)
+            if want(f"predict:{name}"):
+                if not hasattr(model, "classes_"):
+                    model.fit(X_train, y_train)
+                _, t = _time(lambda: model.predict(X_test), repeat)
+                _record(results, f"predict:{name}", scale, len(test_idx), t)
+
+    if want("build_fasttext_matrix"):
+        raw = df["sentence_raw"].values
+        # fresh stub per repeat so the word-vector cache doesn't carry over between runs
+        _, t = _time(lambda: build_fasttext_matrix(raw, StubEmbedding()), repeat)
+        _record(results, "build_fasttext_matrix", scale, len(raw), t)
+
+    os.remove(xml_path)
+    os.remove(jsonl_path)
+    return results
+
+
+def feature_mode_report(parsed, max_char_ngrams=MAX_CHAR_NGRAMS, workdir=None):
+    """
+    Default (float64) vs compact (float32, capped char n-grams) TF-IDF on the same
+    split: fit time, peak traced allocation during fit_transform, matrix bytes and
+    LinearSVC accuracy, plus the cost of spilling the compact test matrix to a memmap.
+    """
+    from sklearn.svm import LinearSVC
+    from sklearn.metrics import accuracy_score
+
+    df = build_apc_dataset_with_windows(parsed, window_size=WINDOW_SIZE)
+    windows, labels = df["window"].values, df["polarity"].values
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(windows))
+    n_test = int(len(order) * TEST_SIZE)
+    test_idx, train_idx = order[:n_test], order[n_test:]
+
+    rows = []
+    for mode, compact in (("default", False), ("compact", True)):
+        vec = build_vectorizer(compact=compact, max_char_ngrams=max_char_ngrams)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        X_train = vec.fit_transform(windows[train_idx])
+        fit_sec = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        X_test = vec.transform(windows[test_idx])
+        clf = LinearSVC(C=1.0).fit(X_train, labels[train_idx])
+        acc = accuracy_score(labels[test_idx], clf.predict(X_test))
+        rows.append({
+            "mode": mode,
+            "n_train": len(train_idx),
+            "fit_sec": fit_sec,
+            "fit_peak_mb": peak / 2**20,
+            "matrix_mb": (csr_nbytes(X_train) + csr_nbytes(X_test)) / 2**20,
+            "nnz_per_row": X_train.nnz / X_train.shape[0],
+            "dtype": X_train.dtype.name,
+            "accuracy": acc,
+        })
+        if compact:
+            with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+                t0 = time.perf_counter()
+                X_mm = transform_to_memmap(vec, windows[test_idx], tmp)
+                rows[-1]["spill_sec"] = time.perf_counter() - t0
+                rows[-1]["memmap_accuracy"] = accuracy_score(labels[test_idx], clf.predict(X_mm))
+                del X_mm
+
+    base, comp = rows
+    print(f"{'mode':<8} {'fit s':>7} {'fit peak MB':>12} {'matrix MB':>10} {'nnz/row':>8} {'accuracy':>9}")
+    for r in rows:
+        print(f"{r['mode']:<8} {r['fit_sec']:7.2f} {r['fit_peak_mb']:12.1f} {r['matrix_mb']:10.1f} "
+              f"{r['nnz_per_row']:8.1f} {r['accuracy']:9.4f}")
+    print(f"compact vs default: matrix {comp['matrix_mb'] / base['matrix_mb'] - 1:+.0%}, "
+          f"fit peak {comp['fit_peak_mb'] / base['fit_peak_mb'] - 1:+.0%}, "
+          f"fit time {comp['fit_sec'] / base['fit_sec']:.2f}x, "
+          f"accuracy {comp['accuracy'] - base['accuracy']:+.4f}; "
+          f"memmap spill of the test split {comp['spill_sec']:.2f}s")
+    return rows
+
+
+# ---------- CLI startup ----------
+
+def _import_times(stderr):
+    """Parse `python -X importtime` output into [(module, cumulative_us)] for top-level imports."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):          # nested imports are indented further
+            rows.append((name.strip(), int(cumulative)))
+    return rows
+
+
+def startup_report(commands=None, repeat=3, budget_ms=STARTUP_BUDGET_MS, top=3):
+    """
+    Cold start of `python -m absa <command> --help` per command: best wall time of
+    `repeat` runs, plus the total import time and the heaviest imports from
+    `python -X importtime`. Returns (rows, commands over budget).
+    """
+    from absa.__main__ import COMMANDS
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+
+    def run(*flags, command):
+        args = [sys.executable, *flags, "-m", "absa", *([command] if command else []), "--help"]
+        t0 = time.perf_counter()
+        out = subprocess.run(args, capture_output=True, text=True, env=env)
+        return time.perf_counter() - t0, out
+
+    rows = []
+    over = []
+    for command in [""] + list(commands or COMMANDS):
+        wall = min(run(command=command)[0] for _ in range(repeat))
+        _, out = run("-X", "importtime", command=command)
+        imports = _import_times(out.stderr)
+        import_ms = sum(us for _, us in imports) / 1000
+        heaviest = sorted(imports, key=lambda r: -r[1])[:top]
+        name = command or "(usage)"
+        exempt = command in STARTUP_EXEMPT
+        flag = ""
+        if import_ms > budget_ms:
+            flag = "  (exempt)" if exempt else "  <-- over budget"
+            if not exempt:
+                over.append(name)
+        print(f"{name:<14} {wall * 1000:7.0f} ms wall {import_ms:7.0f} ms imports  "
+              + ", ".join(f"{m} {us / 1000:.0f}" for m, us in heaviest) + flag)
+        rows.append({"command": name, "wall_ms": round(wall * 1000, 1), "import_ms": round(import_ms, 1),
+                     "heaviest": [[m, round(us / 1000, 1)] for m, us in heaviest], "exit_code": out.returncode})
+    print(f"\n{len(over)} command(s) over the {budget_ms} ms import budget")
+    return rows, over
+
+
+# ---------- results ----------
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    import sklearn
+    import pandas as pd
+    return {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def run_suite(data_path=DATA_PATH, scales=SCALES, repeat=3, cases=None, workdir=None, synthetic=False):
+    base = load_semeval_xml(data_path)
+    print(f"Base dataset: {data_path} ({len(base)} sentences, "
+          f"{sum(len(p['aspects']) for p in base)} aspects)")
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for scale in scales:
+            print(f"\n=== scale x{scale} ===")
+            # big scales run long enough that one pass is already a stable number
+            results.extend(run_scale(base, scale, repeat if scale < 100 else 1, tmp, cases, synthetic))
+    return {"env": environment(), "data": os.path.basename(data_path),
+            "scaling": "synthetic" if synthetic else "replicate", "results": results}
+
+
+def save_results(report, out=None):
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        tag = report["env"]["revision"] or time.strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"bench_{tag}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+    return out
+
+
+def compare_results(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Print per-case median ratios new/old for cases present in both files.
+    Returns the list of (case, scale, ratio) that regressed by more than `threshold`.
+    """
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    old_idx = {(r["case"], r["scale"]): r for r in old["results"]}
+    print(f"{old['env'].get('revision')} -> {new['env'].get('revision')}")
+    if old.get("scaling") != new.get("scaling"):
+        print(f"warning: comparing {old.get('scaling')} against {new.get('scaling')} scaling")
+    regressions = []
+    for r in new["results"]:
+        prev = old_idx.get((r["case"], r["scale"]))
+        if prev is None or not prev["median_sec"]:
+            continue
+        ratio = r["median_sec"] / prev["median_sec"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- slower"
+            regressions.append((r["case"], r["scale"], ratio))
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{r['case']:<24} x{r['scale']:<4} {prev['median_sec']:8.3f}s -> {r['median_sec']:8.3f}s "
+              f"({ratio:5.2f}x){flag}")
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the absa hot paths at several data scales.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="run the suite and write a results JSON")
+    p_run.add_argument("--data", default=DATA_PATH)
+    p_run.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    p_run.add_argument("--repeat", type=int, default=3)
+    p_run.add_argument("--cases", nargs="+", help="only run cases whose name starts with one of these")
+    p_run.add_argument("--synthetic", action="store_true",
+                       help="grow the data with absa.synth instead of replicating it")
+    p_run.add_argument("--out", help=f"results file (default: {RESULTS_DIR}/bench_<revision>.json)")
+
+    p_feat = sub.add_parser("features", help="memory/time/accuracy of the compact TF-IDF mode")
+    p_feat.add_argument("--data", default=DATA_PATH)
+    p_feat.add_argument("--scale", type=int, default=1,
+                        help="grow the data with absa.synth; synthetic labels are drawn independently "
+                             "of the text, so only the scale-1 accuracy delta is meaningful")
+    p_feat.add_argument("--max-char-ngrams", type=int, default=MAX_CHAR_NGRAMS)
+    p_feat.add_argument("--out", help="also write the rows as JSON")
+
+    p_start = sub.add_parser("startup", help="cold-start time of `python -m absa <command> --help`")
+    p_start.add_argument("commands", nargs="*", help="commands to time (default: all)")
+    p_start.add_argument("--repeat", type=int, default=3)
+    p_start.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    p_start.add_argument("--out", help="also write the rows as JSON")
+
+    p_cmp = sub.add_parser("compare", help="compare two results files")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.cmd == "run":
+        report = run_suite(args.data, args.scales, args.repeat, args.cases, synthetic=args.synthetic)
+        save_results(report, args.out)
+    elif args.cmd == "features":
+        parsed = scale_dataset(load_semeval_xml(args.data), args.scale, synthetic=True)
+        rows = feature_mode_report(parsed, args.max_char_ngrams)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"env": environment(), "scale": args.scale, "rows": rows}, f, indent=2)
+    elif args.cmd == "startup":
+        rows, over = startup_report(args.commands, args.repeat, args.budget_ms)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"env": environment(), "budget_ms": args.budget_ms, "rows": rows}, f, indent=2)
+        sys.exit(1 if over else 0)
+    else:
+        regressions = compare_results(args.old, args.new, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
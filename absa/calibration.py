@@ -0,0 +1,244 @@
+# absa/calibration.py
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import RANDOM_STATE, ESCALATE_CONFIDENCE
+from absa.stacking import StackingEngine, N_FOLDS, _scores
+
+_NEWTON_STEPS = 100
+
+
+def _platt_fit(S, T):
+    """
+    Platt scaling for every column of S at once: p = 1 / (1 + exp(-(a*s + b))),
+    fitted by Newton's method on the log loss against Platt's smoothed targets T.
+    Returns (a, b), each of shape (k,).
+    """
+    n_pos = T.sum(axis=0)
+    n_neg = T.shape[0] - n_pos
+    t = np.where(T, ((n_pos + 1) / (n_pos + 2))[None, :], (1 / (n_neg + 2))[None, :])
+    a = np.zeros(S.shape[1])
+    b = np.log((n_neg + 1) / (n_pos + 1))
+    for _ in range(_NEWTON_STEPS):
+        p = 1 / (1 + np.exp(-(S * a + b)))
+        r = p - t
+        w = np.maximum(p * (1 - p), 1e-12)
+        g_a, g_b = (r * S).sum(axis=0), r.sum(axis=0)
+        h_aa, h_ab, h_bb = (w * S * S).sum(axis=0) + 1e-9, (w * S).sum(axis=0), w.sum(axis=0) + 1e-9
+        det = h_aa * h_bb - h_ab * h_ab
+        da = (h_bb * g_a - h_ab * g_b) / det
+        db = (h_aa * g_b - h_ab * g_a) / det
+        a -= da
+        b -= db
+        if max(np.abs(da).max(), np.abs(db).max()) < 1e-8:
+            break
+    return a, b
+
+
+class ScoreCalibrator:
+    """
+    Map a learner's decision scores (n, k) to class probabilities (n, n_classes),
+    one-vs-rest per class column, then renormalize rows, as sklearn's
+    CalibratedClassifierCV does. method: "sigmoid" (Platt) or "isotonic".
+    Prediction is pure numpy (an affine map + sigmoid, or np.interp per class).
+    """
+
+    def __init__(self, method="sigmoid"):
+        if method not in ("sigmoid", "isotonic"):
+            raise ValueError(f"Unknown calibration method: {method!r}")
+        self.method = method
+
+    def fit(self, S, y, classes):
+        S = np.asarray(S, dtype=np.float64)
+        y = np.asarray(y)
+        self.classes_ = np.asarray(classes)
+        self.binary_ = S.shape[1] == 1 and len(self.classes_) == 2
+        T = (y[:, None] == self.classes_[[1]][None, :]) if self.binary_ else (y[:, None] == self.classes_[None, :])
+        if self.method == "sigmoid":
+            self.a_, self.b_ = _platt_fit(S, T)
+        else:
+            from sklearn.isotonic import IsotonicRegression
+            self.curves_ = []
+            for c in range(S.shape[1]):
+                iso = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0).fit(S[:, c], T[:, c])
+                self.curves_.append((iso.X_thresholds_, iso.y_thresholds_))
+        return self
+
+    def predict_proba(self, S):
+        S = np.asarray(S, dtype=np.float64)
+        if self.method == "sigmoid":
+            P = 1 / (1 + np.exp(-(S * self.a_ + self.b_)))
+        else:
+            P = np.column_stack([np.interp(S[:, c], xs, ys) for c, (xs, ys) in enumerate(self.curves_)])
+        if self.binary_:
+            return np.column_stack([1 - P[:, 0], P[:, 0]])
+        total = P.sum(axis=1, keepdims=True)
+        return np.where(total > 0, P / np.where(total > 0, total, 1), 1.0 / P.shape[1])
+
+
+class CalibratedVotingEnsemble:
+    """
+    Soft-voting ensemble over calibrated linear learners (LinearSVC has no
+    predict_proba, which is why get_ensemble() had to vote hard).
+
+    Calibration is fitted once, on the out-of-fold decision scores that
+    StackingEngine computes (and caches), so no extra fits are needed; the
+    full-data refits from the same run do the scoring at predict time.
+
+        ens = CalibratedVotingEnsemble(get_stacking_models()).fit(X_train, y_train)
+        labels, conf = ens.predict_with_confidence(X)
+        sure_idx, unsure_idx, labels, conf = ens.split_by_confidence(X, threshold=0.6)
+    """
+
+    def __init__(self, base_models, method="sigmoid", weights=None, cv=N_FOLDS, n_jobs=-1,
+                 cache_dir=None, threshold=ESCALATE_CONFIDENCE, random_state=RANDOM_STATE):
+        self.engine = StackingEngine(base_models, cv=cv, n_jobs=n_jobs, cache_dir=cache_dir,
+                                     random_state=random_state)
+        self.method = method
+        self.weights = weights
+        self.threshold = threshold
+
+    @property
+    def names(self):
+        return list(self.engine.base_models)
+
+    def fit(self, X, y):
+        self.engine.fit_base(X, y)
+        return self.fit_calibration()
+
+    def fit_calibration(self, method=None):
+        """(Re)fit the calibrators on the cached OOF scores; base learners are not retrained."""
+        if method is not None:
+            self.method = method
+        self.classes_ = self.engine.classes_
+        self.calibrators_ = {
+            n: ScoreCalibrator(self.method).fit(self.engine.oof_[n], self.engine.y_, self.classes_)
+            for n in self.names
+        }
+        return self
+
+    def _weights(self):
+        w = np.array([1.0 if self.weights is None else self.weights.get(n, 0.0) for n in self.names])
+        return w / w.sum()
+
+    def predict_proba(self, X):
+        w = self._weights()
+        P = np.zeros((X.shape[0], len(self.classes_)))
+        for wi, n in zip(w, self.names):
+            if wi:
+                P += wi * self.calibrators_[n].predict_proba(_scores(self.engine.fitted_[n], X))
+        return P
+
+    def oof_proba(self):
+        """Calibrated soft-vote probabilities for the training rows, from the OOF scores."""
+        w = self._weights()
+        return sum(wi * self.calibrators_[n].predict_proba(self.engine.oof_[n]) for wi, n in zip(w, self.names))
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def predict_with_confidence(self, X):
+        """(labels, confidence) where confidence is the winning class probability."""
+        P = self.predict_proba(X)
+        best = P.argmax(axis=1)
+        return self.classes_[best], P[np.arange(len(best)), best]
+
+    def margin(self, X):
+        """Top-1 minus top-2 probability per row."""
+        P = np.sort(self.predict_proba(X), axis=1)
+        return P[:, -1] - P[:, -2]
+
+    def split_by_confidence(self, X, threshold=None):
+        """
+        Indices of rows to trust vs. escalate, plus the local labels/confidence:
+        (confident_idx, uncertain_idx, labels, confidence).
+        """
+        threshold = self.threshold if threshold is None else threshold
+        labels, conf = self.predict_with_confidence(X)
+        uncertain = conf < threshold
+        return np.flatnonzero(~uncertain), np.flatnonzero(uncertain), labels, conf
+
+    def save(self, path):
+        import joblib
+        joblib.dump(self, path, compress=3)
+
+    @staticmethod
+    def load(path):
+        import joblib
+        return joblib.load(path)
+
+
+def calibration_report(y_true, proba, classes, n_bins=10):
+    """Accuracy, multiclass Brier score and expected calibration error of the top class."""
+    y_true = np.asarray(y_true)
+    Y = (y_true[:, None] == np.asarray(classes)[None, :]).astype(float)
+    conf = proba.max(axis=1)
+    correct = (np.asarray(classes)[proba.argmax(axis=1)] == y_true).astype(float)
+    bins = np.minimum((conf * n_bins).astype(int), n_bins - 1)
+    count = np.bincount(bins, minlength=n_bins)
+    gap = np.abs(np.bincount(bins, weights=correct, minlength=n_bins)
+                 - np.bincount(bins, weights=conf, minlength=n_bins))
+    return {
+        "accuracy": float(correct.mean()),
+        "brier": float(((proba - Y) ** 2).sum(axis=1).mean()),
+        "ece": float(gap.sum() / max(count.sum(), 1)),
+    }
+
+
+def main(argv=None):
+    from absa.config import DATA_PATH, TEST_SIZE, WINDOW_SIZE, STACKING_CACHE_DIR
+
+    parser = argparse.ArgumentParser(description="Calibrated soft-voting ensemble + confidence threshold sweep")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--cache-dir", default=STACKING_CACHE_DIR)
+    parser.add_argument("--out", help="save the fitted ensemble (joblib)")
+    args = parser.parse_args(argv)
+
+    from absa.data_loader import load_semeval_xml
+    from absa.aspect_windows import build_apc_dataset_with_windows
+    from absa.features import build_vectorizer
+    from absa.models import get_stacking_models
+    from sklearn.model_selection import train_test_split
+
+    df = build_apc_dataset_with_windows(load_semeval_xml(args.data), window_size=WINDOW_SIZE)
+    df = df[df["polarity"] != "conflict"].reset_index(drop=True)
+    X_train_texts, X_test_texts, y_train, y_test = train_test_split(
+        df["window"].values, df["polarity"].values,
+        test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=df["polarity"].values,
+    )
+    vectorizer = build_vectorizer()
+    X_train = vectorizer.fit_transform(X_train_texts)
+    X_test = vectorizer.transform(X_test_texts)
+
+    ens = CalibratedVotingEnsemble(get_stacking_models(), n_jobs=args.n_jobs, cache_dir=args.cache_dir)
+    ens.fit(X_train, y_train)
+    print(f"{'method':<9} {'accuracy':>9} {'brier':>7} {'ece':>7}")
+    for method in ("sigmoid", "isotonic"):
+        ens.fit_calibration(method)
+        r = calibration_report(y_test, ens.predict_proba(X_test), ens.classes_)
+        print(f"{method:<9} {r['accuracy']:9.4f} {r['brier']:7.4f} {r['ece']:7.4f}")
+
+    ens.fit_calibration("sigmoid")
+    labels, conf = ens.predict_with_confidence(X_test)
+    print(f"\n{'threshold':>9} {'escalated':>10} {'acc (kept)':>11}")
+    for t in (0.4, 0.5, 0.6, 0.7, 0.8, 0.9):
+        keep = conf >= t
+        acc = (labels[keep] == y_test[keep]).mean() if keep.any() else float("nan")
+        print(f"{t:9.2f} {1 - keep.mean():10.1%} {acc:11.4f}")
+
+    if args.out:
+        ens.save(args.out)
+        print(f"Saved calibrated ensemble to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,33 @@ RANDOM_STATE = 42
 TEST_SIZE = 0.2
 WINDOW_SIZE = 5 
 DROP_CONFLICT = True
+ARABIC_PATH = "arabic_classification.jsonl"
+ROUTER_PATH = "router.joblib"
+ROUTER_BATCH_SIZE = 4096
+ARABIC_MODEL_PATH = "arabic_sentiment.joblib"
+QWEN_BASE_URL = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+QWEN_MODEL = "qwen-plus-2025-04-28"
+TRANSLATION_CACHE_PATH = "translation_cache.sqlite"
+TRANSLATE_BATCH_SIZE = 20
+TRANSLATE_CONCURRENCY = 4
+ROUTER_CONFIDENCE = 0.9   # above this, trust the router and skip dialect translation
+ASPECT_TAGGER_PATH = "aspect_tagger.joblib"
+ASPECT_LEXICON_PATH = "aspect_lexicon.json"
+ENGLISH_MODEL_PATH = "english_polarity.joblib"
+AGGREGATE_STATE_PATH = "aggregate_state.npz"
+STACKING_CACHE_DIR = "stacking_cache"
+ESCALATE_CONFIDENCE = 0.6   # calibrated ensemble confidence below this goes to the LLM
+LLM_LABEL_CACHE_PATH = "llm_labels.sqlite"
+SPACY_MODEL = "en_core_web_sm"
+SPACY_CACHE_PATH = "spacy_clean.sqlite"
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENAI_MODEL = "gpt-4.1"
+# Shared LLM client (absa/llm.py): per-provider connection pool size / concurrency and
+# rate budgets (requests and estimated tokens per minute). Order = failover order.
+LLM_PROVIDERS = {
+    "openai": {"base_url": OPENAI_BASE_URL, "model": OPENAI_MODEL, "api_key_env": "OPENAI_API_KEY",
+               "max_concurrency": 4, "rpm": 500, "tpm": 30000},
+    "qwen": {"base_url": QWEN_BASE_URL, "model": QWEN_MODEL, "api_key_env": "QWEN_API_KEY",
+             "max_concurrency": 4, "rpm": 600, "tpm": 1000000},
+}
+LLM_PROVIDER_ORDER = ("openai", "qwen")
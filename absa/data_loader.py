@@ -46,3 +46,31 @@ def load_semeval_xml(path: str):
 
     return data
 
+
+
+def iter_semeval_xml(path: str):
+    """
+    Streaming version of load_semeval_xml(): yields the same dicts one sentence
+    at a time with iterparse, clearing parsed elements, so memory stays flat.
+    """
+    for _, sentence in etree.iterparse(path, events=("end",), tag="sentence"):
+        text_elem = sentence.find("text")
+        if text_elem is not None and text_elem.text is not None:
+            aspects = []
+            aspect_terms = sentence.find("aspectTerms")
+            if aspect_terms is not None:
+                for term in aspect_terms.findall("aspectTerm"):
+                    aspects.append({
+                        "term": term.get("term"),
+                        "polarity": term.get("polarity"),
+                        "from": int(term.get("from")),
+                        "to": int(term.get("to")),
+                    })
+            yield {
+                "id": sentence.get("id"),
+                "text": text_elem.text.strip(),
+                "aspects": aspects,
+            }
+        sentence.clear()
+        while sentence.getprevious() is not None:
+            del sentence.getparent()[0]
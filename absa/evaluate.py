@@ -1,26 +1,34 @@
 # absa/evaluate.py
 
-from sklearn.metrics import classification_report, accuracy_score
+from sklearn.metrics import classification_report
 import pandas as pd
 
+from .significance import bootstrap_ci
+
+
 def evaluate_model(name, model, X_train, y_train, X_test, y_test):
+    """
+    Fit on the training split and score on the held-out split,
+    with a 95% bootstrap CI on accuracy.
+    """
     print(f"\n===== {name} =====")
     model.fit(X_train, y_train)
-    #y_pred = model.predict(X_test)
+    y_pred = model.predict(X_test)
 
-    #acc = accuracy_score(y_test, y_pred)
-    #print(f"Accuracy: {acc:.4f}")
-    #print(classification_report(y_test, y_pred, digits=4))
-    acc = model.score(X_train,y_train)
-    print(f"Accuracy: {acc:.4f}")
+    acc, ci_low, ci_high = bootstrap_ci(y_test, y_pred)
+    print(f"Accuracy: {acc:.4f}  (95% CI {ci_low:.4f}–{ci_high:.4f})")
+    print(classification_report(y_test, y_pred, digits=4))
     return {
         "model": name,
         "accuracy": acc,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "y_pred": y_pred,   # kept for paired comparisons; not shown in the summary
     }
 
 
 def summarize_results(results_list):
-    df = pd.DataFrame(results_list)
+    df = pd.DataFrame([{k: v for k, v in r.items() if k != "y_pred"} for r in results_list])
     print("\n=== SUMMARY (classical models) ===")
     print(df.sort_values("accuracy", ascending=False))
     return df
@@ -2,8 +2,6 @@
 
 import os
 import numpy as np
-import fasttext
-import fasttext.util
 from sklearn.svm import LinearSVC
 from sklearn.metrics import classification_report, accuracy_score
 
@@ -14,7 +12,11 @@ FASTTEXT_BIN = "cc.en.300.bin"
 def load_fasttext_model():
     """
     Load (or download) pretrained FastText English model.
+    fasttext is imported here so the rest of this module works without it.
     """
+    import fasttext
+    import fasttext.util
+
     if not os.path.exists(FASTTEXT_BIN):
         print("Downloading FastText English model (cc.en.300.bin)...")
         fasttext.util.download_model('en', if_exists='ignore')  # creates cc.en.300.bin
@@ -1,28 +1,48 @@
 # absa/features.py
 
+import os
+import json
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.pipeline import FeatureUnion
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import normalize
+
+MAX_CHAR_NGRAMS = 64        # per-row cap on char n-gram non-zeros in compact mode
+SPILL_BATCH_SIZE = 50000
+_TOPK_BLOCK = 8192
 
-def build_vectorizer():
+
+def build_vectorizer(compact=False, max_char_ngrams=MAX_CHAR_NGRAMS):
     """
     Build a FeatureUnion of:
       - word-level TF-IDF (1–2 grams)
       - char-level TF-IDF (3–5 char grams)
     Input: one string per sample (we'll feed "window" column).
+
+    compact=True emits float32 and keeps only the max_char_ngrams highest-weighted
+    char n-grams per row (re-normalized), which is where almost all non-zeros are.
     """
+    dtype = np.float32 if compact else np.float64
     word_tfidf = TfidfVectorizer(
         ngram_range=(1, 2),
         max_features=10000,
         sublinear_tf=True,
-        analyzer="word"
+        analyzer="word",
+        dtype=dtype,
     )
 
     char_tfidf = TfidfVectorizer(
         ngram_range=(3, 5),
         max_features=20000,
         sublinear_tf=True,
-        analyzer="char"
+        analyzer="char",
+        dtype=dtype,
     )
+    if compact and max_char_ngrams:
+        char_tfidf = Pipeline([("tfidf", char_tfidf), ("cap", TopKPerRow(max_char_ngrams))])
 
     vectorizer = FeatureUnion([
         ("word", word_tfidf),
@@ -31,3 +51,107 @@ def build_vectorizer():
 
     return vectorizer
 
+
+class TopKPerRow(BaseEstimator, TransformerMixin):
+    """Keep the k largest values in each CSR row, then L2-normalize the rows again."""
+
+    def __init__(self, k=MAX_CHAR_NGRAMS):
+        self.k = k
+
+    def fit(self, X, y=None):
+        return self
+
+    def __sklearn_is_fitted__(self):
+        return True   # stateless
+
+    def transform(self, X):
+        X = sp.csr_matrix(X)
+        if np.diff(X.indptr).max(initial=0) <= self.k:
+            return X
+        # row blocks keep the int64 sort temporaries small next to X itself
+        blocks = [self._cap(X[start:start + _TOPK_BLOCK]) for start in range(0, X.shape[0], _TOPK_BLOCK)]
+        return blocks[0] if len(blocks) == 1 else sp.vstack(blocks, format="csr")
+
+    def _cap(self, X):
+        counts = np.diff(X.indptr)
+        rows = np.repeat(np.arange(X.shape[0]), counts)
+        # sort by row, then by descending value; rank within the row = position - row start
+        order = np.lexsort((-X.data, rows))
+        rank = np.arange(X.nnz) - X.indptr[rows[order]]
+        keep = np.sort(order[rank < self.k])
+        indptr = np.concatenate([[0], np.cumsum(np.minimum(counts, self.k))]).astype(X.indptr.dtype)
+        out = sp.csr_matrix((X.data[keep], X.indices[keep], indptr), shape=X.shape)
+        return normalize(out, copy=False)
+
+
+def compact_csr(X):
+    """CSR with float32 data and int32 indices/indptr (when nnz fits)."""
+    X = sp.csr_matrix(X, dtype=np.float32)
+    if X.nnz < np.iinfo(np.int32).max:
+        X.indices = X.indices.astype(np.int32, copy=False)
+        X.indptr = X.indptr.astype(np.int32, copy=False)
+    return X
+
+
+def csr_nbytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def transform_to_memmap(vectorizer, texts, out_dir, batch_size=SPILL_BATCH_SIZE):
+    """
+    Transform texts in batches with a fitted vectorizer and spill the result to
+    out_dir as raw data/indices/indptr files, so the full matrix never has to
+    fit in RAM. Returns the memory-mapped CSR (see load_memmap_csr).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    indptr = [np.zeros(1, dtype=np.int64)]
+    nnz = 0
+    n_cols = None
+    with open(os.path.join(out_dir, "data.f32"), "wb") as f_data, \
+            open(os.path.join(out_dir, "indices.i32"), "wb") as f_idx:
+        for start in range(0, len(texts), batch_size):
+            X = compact_csr(vectorizer.transform(texts[start:start + batch_size]))
+            n_cols = X.shape[1]
+            X.data.tofile(f_data)
+            X.indices.astype(np.int32, copy=False).tofile(f_idx)
+            indptr.append(X.indptr[1:].astype(np.int64) + nnz)
+            nnz += X.nnz
+    indptr = np.concatenate(indptr)
+    index_dtype = np.int32 if nnz < np.iinfo(np.int32).max else np.int64
+    indptr.astype(index_dtype).tofile(os.path.join(out_dir, "indptr.bin"))
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"shape": [len(indptr) - 1, n_cols or 0], "nnz": int(nnz),
+                   "indptr_dtype": np.dtype(index_dtype).name}, f)
+    return load_memmap_csr(out_dir)
+
+
+def load_memmap_csr(out_dir):
+    """Open a matrix written by transform_to_memmap without reading it into RAM."""
+    with open(os.path.join(out_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def _mm(name, dtype, n):
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(out_dir, name), dtype=dtype, mode="r", shape=(n,))
+
+    data = _mm("data.f32", np.float32, meta["nnz"])
+    indices = _mm("indices.i32", np.int32, meta["nnz"])
+    indptr = _mm("indptr.bin", np.dtype(meta["indptr_dtype"]), meta["shape"][0] + 1)
+    return sp.csr_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+
+
+
+def strip_for_inference(vectorizer):
+    """
+    Drop fit-time state that transform() never reads, so a pickled vectorizer
+    stays small. TfidfVectorizer keeps every n-gram cut by max_features in
+    `stop_words_`, which is usually far larger than the vocabulary itself.
+    """
+    parts = vectorizer.transformer_list if isinstance(vectorizer, FeatureUnion) else [("", vectorizer)]
+    for _, vec in parts:
+        if isinstance(vec, Pipeline):
+            vec = vec.steps[0][1]
+        if hasattr(vec, "stop_words_"):
+            vec.stop_words_ = None
+    return vectorizer
@@ -0,0 +1,242 @@
+# absa/finetune.py
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import DATA_PATH, RANDOM_STATE
+from absa.data_loader import iter_semeval_xml
+from absa.prompts import estimate_tokens, exact_counter, MESSAGE_OVERHEAD, EXAMPLE_OVERHEAD
+
+SYSTEM_PROMPT = """
+You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
+Your task is to identify all explicit aspect terms in each sentence and assign
+their sentiment polarity.
+
+Return exactly one JSON array called "results", with one item per sentence.
+""".strip()
+
+BATCH_SIZES = (2, 3, 4, 5, 6)
+TOKEN_BUDGET = 1024          # max estimated tokens per training example
+SHARD_SIZE = 5000            # examples per output shard
+def iter_items(xml_path=None, jsonl_paths=()):
+    """
+    Stream {"id", "sentence", "aspect_terms": [{"term", "polarity"}]} from SemEval XML
+    and/or label.py-style JSONL, in the output format of the fine-tune examples.
+    """
+    if xml_path:
+        for s in iter_semeval_xml(xml_path):
+            yield {"id": str(s["id"]), "sentence": s["text"],
+                   "aspect_terms": [{"term": a["term"], "polarity": a["polarity"]} for a in s["aspects"]]}
+    for path in jsonl_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                yield {"id": str(obj["id"]), "sentence": obj["sentence"],
+                       "aspect_terms": [{"term": a["term"], "polarity": a["polarity"]}
+                                        for a in obj.get("aspect_terms", [])]}
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False)
+
+
+class FineTuneBuilder:
+    """
+    Deterministic batched fine-tuning examples in OpenAI chat format
+    (same prompt/JSON layout as second_training.py).
+
+    Every sentence is used exactly once per epoch (a seeded permutation, so no
+    sentence repeats across examples), batch sizes are drawn from batch_sizes
+    with the same seed, and a batch is closed early when adding the next
+    sentence would push the example over token_budget. Token costs are computed
+    once per sentence, so packing is O(n).
+    """
+
+    def __init__(self, batch_sizes=BATCH_SIZES, token_budget=TOKEN_BUDGET, seed=RANDOM_STATE,
+                 system_prompt=SYSTEM_PROMPT, estimator=estimate_tokens):
+        self.batch_sizes = tuple(batch_sizes)
+        self.token_budget = token_budget
+        self.seed = seed
+        self.system_prompt = system_prompt
+        self.estimate = estimator
+        self.items = []        # (user_json, assistant_json) per sentence
+        self.costs = []
+        self.seen = set()
+        self.duplicates = 0
+        self.over_budget = 0   # single sentences that alone exceed token_budget
+        # fixed cost of an example: system message, the JSON wrappers and chat overhead
+        empty = self._render([], [])
+        self.base_cost = sum(self.estimate(m["content"]) for m in empty["messages"]) \
+            + MESSAGE_OVERHEAD * 3 + EXAMPLE_OVERHEAD
+
+    def add(self, items):
+        """Stream items in; exact duplicate sentences are kept once."""
+        for item in items:
+            key = hashlib.sha1(" ".join(item["sentence"].split()).encode("utf-8")).digest()[:8]
+            if key in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(key)
+            user = _dumps({"id": item["id"], "sentence": item["sentence"]})
+            assistant = _dumps(item)
+            self.items.append((user, assistant))
+            # +1 per item for the ", " separator in each array
+            self.costs.append(self.estimate(user) + self.estimate(assistant) + 2)
+        return self
+
+    def _render(self, users, assistants):
+        return {
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": '{"batch": [' + ", ".join(users) + "]}"},
+                {"role": "assistant", "content": '{"results": [' + ", ".join(assistants) + "]}"},
+            ]
+        }
+
+    def split(self, val_fraction=0.0):
+        """Seeded, disjoint train/validation index sets over the added sentences."""
+        order = np.random.default_rng(self.seed).permutation(len(self.items))
+        n_val = int(round(len(order) * val_fraction))
+        return order[n_val:], order[:n_val]
+
+    def pack(self, indices, epochs=1):
+        """Yield (example, estimated_tokens, n_sentences), covering `indices` once per epoch."""
+        rng = np.random.default_rng(self.seed + 1)
+        costs = self.costs
+        for _ in range(epochs):
+            order = indices[rng.permutation(len(indices))]
+            sizes = rng.choice(self.batch_sizes, size=len(order))   # at most one batch per sentence
+            pos = 0
+            b = 0
+            while pos < len(order):
+                target = int(sizes[b])
+                b += 1
+                batch = [order[pos]]
+                tokens = self.base_cost + costs[order[pos]]
+                pos += 1
+                if tokens > self.token_budget:
+                    self.over_budget += 1
+                while len(batch) < target and pos < len(order) and tokens + costs[order[pos]] <= self.token_budget:
+                    tokens += costs[order[pos]]
+                    batch.append(order[pos])
+                    pos += 1
+                users = [self.items[i][0] for i in batch]
+                assistants = [self.items[i][1] for i in batch]
+                yield self._render(users, assistants), tokens, len(batch)
+
+
+def write_shards(examples, out_dir, prefix="train", shard_size=SHARD_SIZE, counter=None):
+    """
+    Write examples to out_dir/<prefix>-00000.jsonl, ... and return a summary with
+    per-shard counts/sha1 and token statistics (exact if counter is given).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shards = []
+    f = None
+    h = None
+    n_shard = 0
+    tokens = []
+    n_sentences = 0
+
+    def close():
+        if f is not None:
+            f.close()
+            shards[-1]["sha1"] = h.hexdigest()
+
+    try:
+        for example, est, n in examples:
+            if f is None or n_shard >= shard_size:
+                close()
+                path = os.path.join(out_dir, f"{prefix}-{len(shards):05d}.jsonl")
+                f = open(path, "w", encoding="utf-8")
+                h = hashlib.sha1()
+                shards.append({"file": os.path.basename(path), "examples": 0})
+                n_shard = 0
+            line = _dumps(example) + "\n"
+            f.write(line)
+            h.update(line.encode("utf-8"))
+            n_shard += 1
+            shards[-1]["examples"] += 1
+            n_sentences += n
+            if counter is not None:
+                est = sum(counter(m["content"]) + MESSAGE_OVERHEAD for m in example["messages"]) + EXAMPLE_OVERHEAD
+            tokens.append(est)
+    finally:
+        close()
+    t = np.asarray(tokens, dtype=np.int64)
+    return {
+        "shards": shards,
+        "examples": int(len(t)),
+        "sentences": int(n_sentences),
+        "tokens": int(t.sum()),
+        "tokens_mean": float(t.mean()) if len(t) else 0.0,
+        "tokens_max": int(t.max()) if len(t) else 0,
+        "exact_tokens": counter is not None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a deterministic, token-budgeted fine-tuning dataset")
+    parser.add_argument("--xml", default=DATA_PATH, help="SemEval XML source ('' to skip)")
+    parser.add_argument("--jsonl", nargs="*", default=[], help="label.py-style aspect JSONL sources")
+    parser.add_argument("--out-dir", default="finetune_data")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--epochs", type=int, default=1, help="passes over the data (one permutation each)")
+    parser.add_argument("--val-fraction", type=float, default=0.0)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--exact", action="store_true", help="count tokens with tiktoken (if installed)")
+    parser.add_argument("--price-per-1m", type=float, default=None,
+                        help="training price per 1M tokens, to print a cost estimate")
+    args = parser.parse_args(argv)
+
+    counter = exact_counter() if args.exact else None
+    if args.exact and counter is None:
+        print("tiktoken is not installed; reporting estimated token counts")
+
+    builder = FineTuneBuilder(args.batch_sizes, args.token_budget, args.seed)
+    builder.add(iter_items(args.xml or None, args.jsonl))
+    train_idx, val_idx = builder.split(args.val_fraction)
+    print(f"Sentences: {len(builder.items)} ({builder.duplicates} duplicates dropped); "
+          f"train {len(train_idx)}, validation {len(val_idx)}")
+
+    manifest = {"seed": args.seed, "token_budget": args.token_budget, "batch_sizes": args.batch_sizes,
+                "epochs": args.epochs}
+    for name, idx, epochs in (("train", train_idx, args.epochs), ("validation", val_idx, 1)):
+        if not len(idx):
+            continue
+        summary = write_shards(builder.pack(idx, epochs), args.out_dir, prefix=name,
+                               shard_size=args.shard_size, counter=counter)
+        summary["over_budget"] = builder.over_budget
+        manifest[name] = summary
+        kind = "exact" if summary["exact_tokens"] else "estimated"
+        print(f"{name}: {summary['examples']} examples / {summary['sentences']} sentences in "
+              f"{len(summary['shards'])} shard(s); {summary['tokens']:,} {kind} tokens "
+              f"(mean {summary['tokens_mean']:.0f}, max {summary['tokens_max']})")
+        if builder.over_budget:
+            print(f"⚠ {builder.over_budget} sentence(s) exceed the token budget on their own; "
+                  f"written as single-sentence examples")
+            builder.over_budget = 0
+        if name == "train" and args.price_per_1m is not None:
+            print(f"Estimated training cost: ${summary['tokens'] / 1e6 * args.price_per_1m:.2f}")
+
+    with open(os.path.join(args.out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {os.path.join(args.out_dir, 'manifest.json')}")
+
+
+if __name__ == "__main__":
+    main()
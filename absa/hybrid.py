@@ -0,0 +1,235 @@
+# absa/hybrid.py
+
+import os
+import sys
+import time
+import zlib
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import (
+    RANDOM_STATE, ESCALATE_CONFIDENCE, TRANSLATE_BATCH_SIZE, TRANSLATE_CONCURRENCY, LLM_LABEL_CACHE_PATH,
+)
+from absa.translate import KeyValueCache
+from absa.prompts import parse_batch
+from absa.llm import get_client
+
+LABELS = ("positive", "negative", "neutral")
+
+SYSTEM_PROMPT = """
+You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
+For each numbered line "<n>: <sentence> ||| <aspect term>", decide the sentiment
+the writer expresses towards that aspect term in that sentence.
+Answer with the same numbers, one line each, using only positive, negative or neutral:
+<n>: <polarity>
+"""
+
+
+def format_pairs(pairs):
+    return "\n".join(f"{i}: {' '.join(s.split())} ||| {' '.join(t.split())}" for i, (s, t) in enumerate(pairs))
+
+
+class LLMPolarityLabeler:
+    """
+    Aspect polarity from the LLM for (sentence, aspect term) pairs, batched into
+    numbered prompts, sent with bounded concurrency and cached by
+    sha1(model, sentence, term) so a pair is never paid for twice.
+    """
+
+    def __init__(self, endpoint=None, cache=None, batch_size: int = TRANSLATE_BATCH_SIZE,
+                 max_concurrency: int = TRANSLATE_CONCURRENCY, offline: bool = False):
+        self.endpoint = endpoint if endpoint is not None else get_client()
+        self.cache = cache if cache is not None else KeyValueCache(LLM_LABEL_CACHE_PATH, table="polarity")
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.offline = offline
+        self.stats = {"pairs": 0, "cache_hits": 0, "requests": 0, "failed_requests": 0, "llm_sec": 0.0}
+
+    def _key(self, sentence, term):
+        raw = f"{getattr(self.endpoint, 'model', '')}\x00{' '.join(sentence.split())}\x00{term.strip().lower()}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _request(self, pairs):
+        try:
+            content = self.endpoint.complete(SYSTEM_PROMPT, format_pairs(pairs))
+        except Exception as e:
+            print(f"⚠ LLM labeling request failed ({len(pairs)} pairs): {e}")
+            return None
+        return [p.lower() if p and p.lower() in LABELS else None for p in parse_batch(content, len(pairs))]
+
+    def label(self, pairs):
+        """pairs: list of (sentence, term). Returns labels aligned with pairs (None where unanswered)."""
+        start = time.perf_counter()
+        keys = [self._key(s, t) for s, t in pairs]
+        found = self.cache.get_many(keys)
+        self.stats["pairs"] += len(pairs)
+        self.stats["cache_hits"] += sum(k in found for k in keys)
+
+        pending = {}
+        for k, pair in zip(keys, pairs):
+            if k not in found:
+                pending.setdefault(k, pair)
+        if pending and not self.offline:
+            pending_keys = list(pending)
+            batches = [pending_keys[j:j + self.batch_size] for j in range(0, len(pending_keys), self.batch_size)]
+            new = []
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                for batch_keys, answers in zip(batches, pool.map(
+                        lambda b: self._request([pending[k] for k in b]), batches)):
+                    self.stats["requests"] += 1
+                    if answers is None:
+                        self.stats["failed_requests"] += 1
+                        continue
+                    new.extend((k, a) for k, a in zip(batch_keys, answers) if a)
+            if new:
+                self.cache.put_many(new)
+                found.update(new)
+        self.stats["llm_sec"] += time.perf_counter() - start
+        return [found.get(k) for k in keys]
+
+
+class FakeLLM:
+    """
+    Local stand-in for the LLM client, for sweeps and tests without network or cost.
+    Answers each numbered "<sentence> ||| <term>" line from `answers` (the gold
+    label), flipped to another label with probability 1 - accuracy (deterministic
+    per line), and sleeps latency + per_item * n_lines to mimic a real request.
+    """
+
+    model = "fake-llm"
+
+    def __init__(self, answers, accuracy=0.9, latency=0.5, per_item=0.01):
+        self.answers = answers
+        self.accuracy = accuracy
+        self.latency = latency
+        self.per_item = per_item
+        self.calls = 0
+
+    def complete(self, system, user):
+        self.calls += 1
+        lines = [line.partition(": ") for line in user.splitlines()]
+        time.sleep(self.latency + self.per_item * len(lines))
+        out = []
+        for head, _, body in lines:
+            gold = self.answers.get(body, "neutral")
+            if (zlib.crc32(body.encode("utf-8")) % 1000) / 1000 >= self.accuracy:
+                gold = LABELS[(LABELS.index(gold) + 1) % len(LABELS)] if gold in LABELS else "neutral"
+            out.append(f"{head}: {gold}")
+        return "\n".join(out)
+
+
+class HybridClassifier:
+    """
+    Local TF-IDF + calibrated soft-voting ensemble first; only aspects whose
+    confidence is below `threshold` go to the LLM labeler. LLM answers replace
+    the local label; unanswered pairs keep it.
+    """
+
+    def __init__(self, vectorizer, ensemble, labeler, threshold=ESCALATE_CONFIDENCE):
+        self.vectorizer = vectorizer
+        self.ensemble = ensemble
+        self.labeler = labeler
+        self.threshold = threshold
+
+    def predict(self, windows, sentences, terms, threshold=None):
+        """Returns (labels, escalated mask)."""
+        X = self.vectorizer.transform(windows)
+        _, unsure, labels, _ = self.ensemble.split_by_confidence(X, threshold if threshold is not None
+                                                                   else self.threshold)
+        labels = labels.astype(object)
+        if len(unsure):
+            answers = self.labeler.label([(sentences[i], terms[i]) for i in unsure])
+            for i, a in zip(unsure, answers):
+                if a is not None:
+                    labels[i] = a
+        escalated = np.zeros(len(labels), dtype=bool)
+        escalated[unsure] = True
+        return labels, escalated
+
+
+def sweep(hybrid, windows, sentences, terms, y_true, thresholds, fresh_cache=None):
+    """
+    Escalated fraction, LLM requests, end-to-end latency and accuracy per threshold.
+    fresh_cache: factory for an empty cache per threshold, so earlier thresholds
+    don't hide the LLM cost of later ones.
+    """
+    y_true = np.asarray(y_true)
+    rows = []
+    for t in thresholds:
+        if fresh_cache is not None:
+            hybrid.labeler.cache = fresh_cache()
+        before = dict(hybrid.labeler.stats)
+        t0 = time.perf_counter()
+        labels, escalated = hybrid.predict(windows, sentences, terms, threshold=t)
+        elapsed = time.perf_counter() - t0
+        rows.append({
+            "threshold": t,
+            "escalated": float(escalated.mean()),
+            "requests": hybrid.labeler.stats["requests"] - before["requests"],
+            "latency_sec": elapsed,
+            "accuracy": float((labels == y_true).mean()),
+        })
+    print(f"{'threshold':>9} {'escalated':>10} {'requests':>9} {'latency s':>10} {'accuracy':>9}")
+    for r in rows:
+        print(f"{r['threshold']:9.2f} {r['escalated']:10.1%} {r['requests']:9d} "
+              f"{r['latency_sec']:10.2f} {r['accuracy']:9.4f}")
+    return rows
+
+
+def main(argv=None):
+    from absa.config import DATA_PATH, TEST_SIZE, WINDOW_SIZE, STACKING_CACHE_DIR
+
+    parser = argparse.ArgumentParser(description="Confidence-gated hybrid: local ensemble + LLM for hard aspects")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 1.01])
+    parser.add_argument("--fake-llm", action="store_true", help="use the local FakeLLM instead of the API")
+    parser.add_argument("--fake-accuracy", type=float, default=0.9)
+    parser.add_argument("--fake-latency", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=TRANSLATE_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=TRANSLATE_CONCURRENCY)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args(argv)
+
+    from absa.data_loader import load_semeval_xml
+    from absa.aspect_windows import build_apc_dataset_with_windows
+    from absa.features import build_vectorizer
+    from absa.models import get_stacking_models
+    from absa.calibration import CalibratedVotingEnsemble
+    from sklearn.model_selection import train_test_split
+
+    df = build_apc_dataset_with_windows(load_semeval_xml(args.data), window_size=WINDOW_SIZE)
+    df = df[df["polarity"] != "conflict"].reset_index(drop=True)
+    train_df, test_df = train_test_split(df, test_size=TEST_SIZE, random_state=RANDOM_STATE,
+                                         stratify=df["polarity"].values)
+    vectorizer = build_vectorizer()
+    X_train = vectorizer.fit_transform(train_df["window"].values)
+    ensemble = CalibratedVotingEnsemble(get_stacking_models(), n_jobs=args.n_jobs, cache_dir=STACKING_CACHE_DIR)
+    ensemble.fit(X_train, train_df["polarity"].values)
+
+    sentences = test_df["sentence_raw"].tolist()
+    terms = test_df["aspect"].tolist()
+    if args.fake_llm:
+        answers = {f"{' '.join(s.split())} ||| {' '.join(t.split())}": y
+                   for s, t, y in zip(sentences, terms, test_df["polarity"])}
+        endpoint = FakeLLM(answers, accuracy=args.fake_accuracy, latency=args.fake_latency)
+        fresh_cache = lambda: KeyValueCache(":memory:", table="polarity")
+    else:
+        endpoint = get_client()
+        fresh_cache = None   # keep paid answers between thresholds
+    labeler = LLMPolarityLabeler(endpoint, cache=fresh_cache() if fresh_cache else None,
+                                 batch_size=args.batch_size, max_concurrency=args.concurrency)
+    hybrid = HybridClassifier(vectorizer, ensemble, labeler)
+    print(f"Test aspects: {len(test_df)}  (LLM: {'fake, accuracy %.2f' % args.fake_accuracy if args.fake_llm else endpoint.model})")
+    sweep(hybrid, test_df["window"].values, sentences, terms, test_df["polarity"].values,
+          args.thresholds, fresh_cache=fresh_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# absa/jobs.py
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+MAX_ATTEMPTS = 3
+
+
+def journal_path(out_path):
+    return out_path + ".journal.sqlite"
+
+
+def items_fingerprint(items):
+    h = hashlib.sha1()
+    for item in items:
+        h.update(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+class JobJournal:
+    """
+    SQLite journal of a batched LLM labeling run, keyed by batch id:
+
+        batches(batch_id, start, end, status, attempts, error, updated)
+        results(batch_id, seq, line)
+
+    A batch's result lines and its "done" status are written in one transaction,
+    so a crash can never leave a batch half-recorded or recorded twice; the
+    output file is rebuilt from the journal with an atomic rename (export()).
+    recover() puts batches left in flight by a crash and failed batches back to
+    pending; `attempts` keeps counting across runs.
+    Safe to share between the worker threads of one run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id INTEGER PRIMARY KEY, start INTEGER NOT NULL, "end" INTEGER NOT NULL,
+                status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                batch_id INTEGER NOT NULL, seq INTEGER NOT NULL, line TEXT NOT NULL,
+                PRIMARY KEY (batch_id, seq)
+            );
+        """)
+        self._conn.commit()
+
+    def planned(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] > 0
+
+    def plan(self, n_items, batch_size, fingerprint):
+        """Create the batch rows for a new job; refuse to resume a journal made for other input."""
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+            expected = {"fingerprint": fingerprint, "n_items": str(n_items), "batch_size": str(batch_size)}
+            if meta and meta != expected:
+                raise ValueError(
+                    f"Journal {self.path} belongs to a different job ({meta['n_items']} items, batch size "
+                    f"{meta['batch_size']}); delete it or write to another output file"
+                )
+            if not meta:
+                with self._conn:
+                    self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", expected.items())
+                    self._conn.executemany(
+                        'INSERT INTO batches (batch_id, start, "end", status) VALUES (?, ?, ?, ?)',
+                        [(i, s, min(s + batch_size, n_items), PENDING)
+                         for i, s in enumerate(range(0, n_items, batch_size))],
+                    )
+
+    def recover(self):
+        """Re-queue batches a crashed run left in flight and all failed batches."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("UPDATE batches SET status = ? WHERE status IN (?, ?)",
+                                     (PENDING, IN_FLIGHT, FAILED))
+            return cur.rowcount
+
+    def requeue(self, batch_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE batches SET status = ? WHERE batch_id = ? AND status = ?",
+                                   [(PENDING, b, FAILED) for b in batch_ids])
+
+    def claim(self, limit=None):
+        """Mark up to `limit` pending batches in flight; returns [(batch_id, start, end)]."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                'SELECT batch_id, start, "end" FROM batches WHERE status = ? ORDER BY batch_id LIMIT ?',
+                (PENDING, -1 if limit is None else limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE batches SET status = ?, attempts = attempts + 1, updated = ? WHERE batch_id = ?",
+                [(IN_FLIGHT, time.time(), r[0]) for r in rows],
+            )
+        return rows
+
+    def seed(self, records, item_index, batch_size, n_items, done_before=None):
+        """
+        Adopt the output of a run made before the journal existed: records are
+        grouped into batches by item_index(record) (0-based item position) and
+        those batches marked done, so only the rest is labeled again. Records
+        at or after done_before (the old checkpoint) and ones without a usable
+        index are not adopted. Returns (batches adopted, records adopted).
+        """
+        limit = n_items if done_before is None else min(done_before, n_items)
+        by_batch = {}
+        for r in records:
+            try:
+                i = int(item_index(r))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= i < limit:
+                by_batch.setdefault(i // batch_size, []).append(r)
+        for batch_id, batch in by_batch.items():
+            self.complete(batch_id, batch)
+        return len(by_batch), sum(map(len, by_batch.values()))
+
+    def complete(self, batch_id, records):
+        lines = [(batch_id, i, json.dumps(r, ensure_ascii=False)) for i, r in enumerate(records)]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE batch_id = ?", (batch_id,))
+            self._conn.executemany("INSERT INTO results (batch_id, seq, line) VALUES (?, ?, ?)", lines)
+            self._conn.execute("UPDATE batches SET status = ?, error = NULL, updated = ? WHERE batch_id = ?",
+                               (DONE, time.time(), batch_id))
+
+    def fail(self, batch_id, error):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE batches SET status = ?, error = ?, updated = ? WHERE batch_id = ?",
+                               (FAILED, str(error)[:500], time.time(), batch_id))
+
+    def counts(self):
+        with self._lock:
+            found = dict(self._conn.execute("SELECT status, COUNT(*) FROM batches GROUP BY status").fetchall())
+        return {s: found.get(s, 0) for s in (PENDING, IN_FLIGHT, DONE, FAILED)}
+
+    def failures(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT batch_id, attempts, error FROM batches WHERE status = ? ORDER BY batch_id", (FAILED,)
+            ).fetchall()
+
+    def export(self, out_path):
+        """Write every done batch's lines, in batch order, to out_path via tmp file + rename."""
+        tmp = out_path + ".tmp"
+        n = 0
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            for (line,) in self._conn.execute("SELECT line FROM results ORDER BY batch_id, seq"):
+                f.write(line + "\n")
+                n += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, out_path)
+        return n
+
+    def close(self):
+        self._conn.close()
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    return int(text) if text.isdigit() else None
+
+
+def _adopt_existing_output(journal, out_path, n_items, batch_size, legacy_index, checkpoint_path):
+    """
+    out_path exists but the journal is new (a run from before journaling, or
+    another tool's file): keep a copy, since export() replaces out_path, and seed
+    the journal from its lines when they can be mapped back to items.
+    """
+    backup = out_path + ".pre-journal"
+    if not os.path.exists(backup):
+        shutil.copy2(out_path, backup)
+    print(f"💾 {out_path} predates the job journal; copied to {backup}")
+    if legacy_index is None:
+        print("  Its lines cannot be matched to batches; every batch will be labeled again")
+        return
+    records = []
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    done_before = _read_checkpoint(checkpoint_path)
+    n_batches, n_records = journal.seed(records, legacy_index, batch_size, n_items, done_before)
+    where = f" (checkpoint {checkpoint_path}: {done_before})" if done_before is not None else ""
+    print(f"  Adopted {n_records}/{len(records)} existing lines as {n_batches} done batches{where}")
+
+
+def run_batches(items, process, out_path, batch_size, journal=None, n_workers=1,
+                max_attempts=MAX_ATTEMPTS, export_every=50, legacy_index=None, checkpoint_path=None):
+    """
+    Label `items` in batches with `process(batch_items, start) -> list of records`
+    (raise on failure), journaling every batch so the run can be killed and
+    restarted at any point. Batches that failed in an earlier run are retried on
+    resume; within a run a batch is tried up to max_attempts times. The output
+    file is re-exported atomically every `export_every` finished batches and at
+    the end.
+
+    An existing out_path without a journal is backed up to out_path.pre-journal
+    first; with legacy_index(record) -> 0-based item position (and optionally the
+    old checkpoint file) its lines are adopted so they are not paid for again.
+    """
+    journal = journal or JobJournal(journal_path(out_path))
+    fresh = not journal.planned()
+    journal.plan(len(items), batch_size, items_fingerprint(items))
+    if fresh and os.path.exists(out_path) and os.path.getsize(out_path) > 0:
+        _adopt_existing_output(journal, out_path, len(items), batch_size, legacy_index, checkpoint_path)
+    requeued = journal.recover()
+    counts = journal.counts()
+    total = sum(counts.values())
+    if counts[DONE] or requeued:
+        print(f"🔄 Resuming: {counts[DONE]}/{total} batches done, {counts[PENDING]} to run")
+
+    def work(batch):
+        batch_id, start, end = batch
+        try:
+            records = process(items[start:end], start)
+        except Exception as e:
+            journal.fail(batch_id, e)
+            return batch_id, e
+        journal.complete(batch_id, records)
+        return batch_id, None
+
+    tries = {}
+    finished = 0
+    pool = ThreadPoolExecutor(max_workers=n_workers)
+    try:
+        while True:
+            batches = journal.claim()
+            if not batches:
+                retry = [b for b, _, _ in journal.failures() if tries.get(b, 0) < max_attempts]
+                if not retry:
+                    break
+                journal.requeue(retry)
+                continue
+            for batch_id, _, _ in batches:
+                tries[batch_id] = tries.get(batch_id, 0) + 1
+            for batch_id, error in pool.map(work, batches):
+                finished += 1
+                if error is not None:
+                    print(f"⚠ Batch {batch_id} failed: {error}")
+                else:
+                    print(f"✓ Batch {batch_id} done")
+                if export_every and finished % export_every == 0:
+                    journal.export(out_path)
+    except BaseException:
+        # Ctrl-C etc.: drop the queued batches (they stay in flight and are re-queued on resume)
+        pool.shutdown(wait=True, cancel_futures=True)
+        journal.export(out_path)
+        raise
+    pool.shutdown()
+
+    n_lines = journal.export(out_path)
+    counts = journal.counts()
+    print(f"✔ {counts[DONE]}/{total} batches done, {counts[FAILED]} failed; {n_lines} lines in {out_path}")
+    if counts[FAILED]:
+        print(f"  Run again to retry them; errors: python -m absa.jobs status {out_path}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect / reset the job journal of a labeling run")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("status", "batch counts and failures"),
+                            ("export", "rewrite the output file from the journal")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("output", help="the run's output file (journal is <output>.journal.sqlite)")
+    args = parser.parse_args(argv)
+
+    path = journal_path(args.output)
+    if not os.path.exists(path):
+        parser.error(f"No journal at {path}")
+    journal = JobJournal(path)
+    if args.command == "export":
+        print(f"Wrote {journal.export(args.output)} lines to {args.output}")
+    print(journal.counts())
+    for batch_id, attempts, error in journal.failures():
+        print(f"  batch {batch_id}: {attempts} attempt(s): {error}")
+
+
+if __name__ == "__main__":
+    main()
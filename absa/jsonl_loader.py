@@ -37,3 +37,22 @@ def load_jsonl_aspects(path: str):
             })
 
     return data
+
+
+def iter_labeled_sentences(path: str):
+    """
+    Stream a sentence-level JSONL file, one dict per line:
+    {"sentence": str, "label": str}
+    (the format test3.py writes to arabic_classification.jsonl).
+    Yields (sentence, label); blank or unlabeled lines are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            sentence = obj.get("sentence", "").strip()
+            label = obj.get("label")
+            if sentence and label:
+                yield sentence, label
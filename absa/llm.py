@@ -0,0 +1,336 @@
+# absa/llm.py
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import LLM_PROVIDERS, LLM_PROVIDER_ORDER
+
+# Status codes worth trying again / on another provider; anything else is a bad request.
+# 401/403 are not here: a wrong or missing key is a configuration error, not an outage.
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+MAX_COOLDOWN = 30.0
+_STALE_CONNECTION = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class LLMError(Exception):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _approx_tokens(messages):
+    return sum(len(m["content"]) for m in messages) // 4 + 1
+
+
+class RateBudget:
+    """
+    Requests-per-minute and tokens-per-minute token buckets, refilled continuously.
+    acquire() never blocks: it takes the budget and returns 0, or returns how long
+    to wait before the request would fit (so the caller can try another provider).
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm or 0)
+        self.tokens = float(tpm or 0)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.last
+            self.last = now
+            if self.rpm:
+                self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+            if self.tpm:
+                self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+                tokens = min(tokens, self.tpm)
+            wait = 0.0
+            if self.rpm and self.requests < 1:
+                wait = (1 - self.requests) * 60 / self.rpm
+            if self.tpm and self.tokens < tokens:
+                wait = max(wait, (tokens - self.tokens) * 60 / self.tpm)
+            if wait > 0:
+                return wait
+            if self.rpm:
+                self.requests -= 1
+            if self.tpm:
+                self.tokens -= tokens
+            return 0.0
+
+
+class Provider:
+    """
+    One OpenAI-compatible /chat/completions endpoint with a pool of keep-alive
+    HTTP connections (at most max_concurrency, which also bounds in-flight
+    requests), a RateBudget, and a cooldown after failures.
+    """
+
+    def __init__(self, name, base_url, model, api_key=None, api_key_env=None, max_concurrency=4,
+                 rpm=None, tpm=None, timeout=60.0):
+        self.name = name
+        self.model = model
+        self.api_key = api_key if api_key is not None else os.getenv(api_key_env or "", "")
+        parts = urlsplit(base_url.rstrip("/"))
+        self.scheme, self.host, self.port = parts.scheme, parts.hostname, parts.port
+        self.path = parts.path + "/chat/completions"
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.idle = queue.LifoQueue()
+        self.budget = RateBudget(rpm, tpm)
+        self.down_until = 0.0
+        self.failures_in_row = 0
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0, "connections": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0, "sec": 0.0}
+
+    @property
+    def configured(self):
+        return bool(self.api_key) or self.host in ("localhost", "127.0.0.1")
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self.down_until
+
+    def mark_down(self, retry_after=None):
+        with self.lock:
+            self.stats["failures"] += 1
+            self.failures_in_row += 1
+            cooldown = retry_after if retry_after is not None else min(MAX_COOLDOWN, 0.5 * 2 ** self.failures_in_row)
+            self.down_until = time.monotonic() + cooldown
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        with self.lock:
+            self.stats["connections"] += 1
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _send(self, conn, body):
+        conn.request("POST", self.path, body=body, headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        })
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    def request(self, payload):
+        body = json.dumps({"model": self.model, **payload}).encode("utf-8")
+        start = time.perf_counter()
+        with self.slots:
+            try:
+                conn = self.idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            try:
+                try:
+                    resp, data = self._send(conn, body)
+                except _STALE_CONNECTION:
+                    if not reused:
+                        raise
+                    # the server dropped an idle keep-alive connection; one retry on a fresh one
+                    conn.close()
+                    conn = self._connect()
+                    resp, data = self._send(conn, body)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise LLMError(f"{self.name}: {type(e).__name__}: {e}") from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self.idle.put(conn)
+
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["sec"] += time.perf_counter() - start
+        if resp.status != 200:
+            retry_after = resp.getheader("Retry-After")
+            raise LLMError(f"{self.name}: HTTP {resp.status}: {data[:200].decode('utf-8', 'replace')}",
+                           status=resp.status,
+                           retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        try:
+            out = json.loads(data.decode("utf-8"))
+            out["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            # a 200 with a truncated / non-JSON body (proxy error page, etc.): fail over like a 5xx
+            raise LLMError(f"{self.name}: undecodable response: {data[:200].decode('utf-8', 'replace')}") from e
+        usage = out.get("usage") or {}
+        with self.lock:
+            self.failures_in_row = 0
+            self.stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            self.stats["completion_tokens"] += usage.get("completion_tokens", 0)
+        return out
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class LLMClient:
+    """
+    Chat completions over an ordered list of providers: the first healthy one
+    with rate budget left takes the request; on a connection error, 429 or 5xx
+    that provider cools down (Retry-After if given) and the request fails over
+    to the next. Thread-safe; share one client (see get_client()).
+
+    complete(system, user) is the endpoint interface of translate.Translator and
+    hybrid.LLMPolarityLabeler.
+    """
+
+    def __init__(self, providers, max_attempts=None):
+        if not providers:
+            raise ValueError("LLMClient needs at least one provider")
+        self.providers = list(providers)
+        self.max_attempts = max_attempts or 2 * len(self.providers) + 1
+
+    @property
+    def model(self):
+        return self.providers[0].model
+
+    def _pick(self, tokens):
+        now = time.monotonic()
+        waits = []
+        for p in self.providers:
+            if not p.healthy(now):
+                waits.append(p.down_until - now)
+                continue
+            wait = p.budget.acquire(tokens)
+            if wait == 0:
+                return p, 0.0
+            waits.append(wait)
+        return None, max(min(waits), 0.01)
+
+    def chat(self, messages, temperature=0, max_tokens=None, response_format=None):
+        payload = {"messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if response_format is not None:
+            payload["response_format"] = response_format
+        tokens = _approx_tokens(messages) + (max_tokens or 0)
+
+        errors = []
+        attempts = 0
+        while attempts < self.max_attempts:
+            provider, wait = self._pick(tokens)
+            if provider is None:
+                time.sleep(wait)
+                continue
+            attempts += 1
+            try:
+                out = provider.request(payload)
+            except LLMError as e:
+                if e.status is not None and e.status not in RETRYABLE_STATUS:
+                    raise
+                errors.append(str(e))
+                provider.mark_down(e.retry_after)
+                continue
+            return out["choices"][0]["message"]["content"]
+        raise LLMError(f"All providers failed after {attempts} attempts: " + " | ".join(errors[-3:]))
+
+    def complete(self, system, user):
+        return self.chat([{"role": "system", "content": system}, {"role": "user", "content": user}])
+
+    def report(self):
+        for p in self.providers:
+            s = p.stats
+            print(f"  {p.name:<10} {s['requests']:6d} requests, {s['failures']:4d} failures, "
+                  f"{s['connections']:4d} connections, {s['prompt_tokens'] + s['completion_tokens']:,} tokens")
+
+
+_providers = {}
+_registry_lock = threading.Lock()
+
+
+def get_provider(name):
+    """Process-wide Provider for a name in LLM_PROVIDERS (created on first use, after .env is loaded)."""
+    with _registry_lock:
+        if name not in _providers:
+            _providers[name] = Provider(name, **LLM_PROVIDERS[name])
+        return _providers[name]
+
+
+def get_client(order=LLM_PROVIDER_ORDER, max_attempts=None):
+    """
+    Client over the named providers, skipping ones without an API key; raises
+    LLMError if none has one. Providers are shared, so every client in the
+    process uses the same connection pools and rate budgets.
+    """
+    providers = [get_provider(n) for n in order]
+    configured = [p for p in providers if p.configured]
+    if not configured:
+        keys = ", ".join(LLM_PROVIDERS[n].get("api_key_env") or n for n in order)
+        raise LLMError(f"No LLM provider configured for {', '.join(order)}: set {keys} (e.g. in .env)")
+    return LLMClient(configured, max_attempts=max_attempts)
+
+
+def selftest(n=400, concurrency=8, fail_rate=0.3, latency=0.01):
+    """
+    Against local mock servers: failover from a flaky primary, then throughput
+    and connection reuse of one pooled provider.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from absa.testing import MockLLMServer
+
+    with MockLLMServer(fail_rate=fail_rate, latency=latency) as flaky, MockLLMServer(latency=latency) as good:
+        client = LLMClient([
+            Provider("flaky", flaky.base_url, "mock", api_key="x", max_concurrency=concurrency),
+            Provider("good", good.base_url, "mock", api_key="x", max_concurrency=concurrency),
+        ])
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            answers = list(pool.map(lambda i: client.complete("s", f"q{i}"), range(n)))
+        elapsed = time.perf_counter() - t0
+        ok = sum(a == "ok" for a in answers)
+        print(f"Failover: {ok}/{n} answered in {elapsed:.2f}s with primary fail rate {fail_rate:.0%}")
+        client.report()
+        print(f"  server side: flaky {flaky.stats['connections']} connections / {flaky.stats['requests']} requests "
+              f"({flaky.stats['failed']} failed), good {good.stats['connections']} / {good.stats['requests']}")
+
+    with MockLLMServer(latency=latency) as server:
+        pooled = LLMClient([Provider("pooled", server.base_url, "mock", api_key="x", max_concurrency=concurrency)])
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda i: pooled.complete("s", f"q{i}"), range(n)))
+        elapsed = time.perf_counter() - t0
+        print(f"\nPooled: {n / elapsed:.0f} req/s, {server.stats['connections']} connections for {n} requests")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared multi-provider LLM client")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("selftest", help="failover / pooling check against local mock servers")
+    p.add_argument("-n", type=int, default=400)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--fail-rate", type=float, default=0.3)
+    p.add_argument("--latency", type=float, default=0.01)
+    p = sub.add_parser("chat", help="send one prompt through the configured providers")
+    p.add_argument("prompt")
+    p.add_argument("--providers", nargs="+", default=list(LLM_PROVIDER_ORDER))
+    args = parser.parse_args(argv)
+
+    if args.command == "selftest":
+        selftest(args.n, args.concurrency, args.fail_rate, args.latency)
+    else:
+        client = get_client(args.providers)
+        print(client.chat([{"role": "user", "content": args.prompt}]))
+        client.report()
+
+
+if __name__ == "__main__":
+    main()
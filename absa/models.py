@@ -1,6 +1,7 @@
 # absa/models.py
 
-from sklearn.linear_model import LogisticRegression
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier, RidgeClassifier
 from sklearn.svm import LinearSVC
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
@@ -41,14 +42,40 @@ def get_base_models():
     return models
 
 
-def get_ensemble(models_dict):
+def get_ensemble(models_dict, voting="hard", calibration="sigmoid"):
     """
-    Build a soft voting ensemble (where possible).
-    For LinearSVC (no predict_proba), we use hard voting.
+    Build a voting ensemble.
+    voting="hard": sklearn VotingClassifier (LinearSVC has no predict_proba).
+    voting="soft": absa.calibration.CalibratedVotingEnsemble, which calibrates each
+    learner's decision scores on out-of-fold predictions and averages probabilities.
     """
+    if voting == "soft":
+        from .calibration import CalibratedVotingEnsemble
+        return CalibratedVotingEnsemble(models_dict, method=calibration)
     estimators = [(name, m) for name, m in models_dict.items()]
     ensemble = VotingClassifier(
         estimators=estimators,
         voting="hard"   # soft requires predict_proba; LinearSVC doesn't have it
     )
     return ensemble
+
+
+def get_stacking_models():
+    """
+    Base learners of the stacking ensemble described in the README:
+    LinearSVC, LogisticRegression, SGD and Ridge (all expose decision_function).
+    """
+    return {
+        "svm": LinearSVC(C=1.0),
+        "logreg": LogisticRegression(max_iter=1000, C=1.0, random_state=RANDOM_STATE),
+        "sgd": SGDClassifier(loss="modified_huber", alpha=1e-4, random_state=RANDOM_STATE),
+        "ridge": RidgeClassifier(alpha=1.0),
+    }
+
+
+def shrink_linear_model(model):
+    """Store linear weights as float32; halves a saved artifact and scores the same."""
+    if hasattr(model, "coef_"):
+        model.coef_ = model.coef_.astype(np.float32)
+        model.intercept_ = model.intercept_.astype(np.float32)
+    return model
@@ -0,0 +1,426 @@
+# absa/pipeline.py
+
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+
+import joblib
+
+from .config import (
+    DATA_PATH, WINDOW_SIZE, ROUTER_PATH, ASPECT_TAGGER_PATH, ASPECT_LEXICON_PATH,
+    ARABIC_MODEL_PATH, ENGLISH_MODEL_PATH,
+)
+from .preprocess import clean_text
+from .arabic import normalize_batch
+from .aspect_windows import char_to_token_window
+from .router import LanguageRouter, arabic_mask, EN, MSA
+
+PIPELINE_BATCH_SIZE = 512
+QUEUE_SIZE = 8            # batches buffered between two stages
+SHARD_SIZE = 100000       # output rows per shard
+_DONE = object()
+
+
+class _StageError:
+    """Travels down the queues in place of a batch when a stage (or the reader) raised."""
+
+    def __init__(self, stage, exc):
+        self.stage = stage
+        self.exc = exc
+
+
+# ==========================================
+# Input
+# ==========================================
+def read_reviews(path: str):
+    """
+    Stream raw reviews as {"id", "text"[, "asin"]} dicts.
+    - .txt: one review per line (amazon_reviews.txt)
+    - .jsonl: scraper output ({"asin", "page", "text"}) or any {"id"?, "text"|"sentence"}
+    """
+    is_jsonl = path.endswith(".jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if not is_jsonl:
+                yield {"id": line_no, "text": line}
+                continue
+            obj = json.loads(line)
+            text = obj.get("text") or obj.get("sentence") or ""
+            if not text.strip():
+                continue
+            rec = {"id": obj.get("id", line_no), "text": text}
+            if "asin" in obj:
+                rec["asin"] = obj["asin"]
+            yield rec
+
+
+def batched(records, size):
+    batch = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==========================================
+# Stages (each maps a batch of records -> batch of records)
+# ==========================================
+class Pipeline:
+    """
+    routing -> normalization -> aspect extraction -> windows -> polarity.
+    Missing optional artifacts degrade gracefully: without a router only the
+    script pre-check runs (Arabic -> msa); without an Arabic model Arabic
+    rows get no polarity.
+    """
+
+    def __init__(self, router=None, extractor=None, en_model=None, ar_model=None,
+                 window_size: int = WINDOW_SIZE):
+        self.router = router
+        self.extractor = extractor
+        self.en_model = en_model      # {"vectorizer", "model"}
+        self.ar_model = ar_model      # ArabicSentimentModel
+        self.window_size = window_size
+
+    def route(self, batch):
+        texts = [r["text"] for r in batch]
+        if self.router is not None:
+            labels, conf = self.router.predict_with_confidence(texts)
+        else:
+            mask = arabic_mask(texts)
+            labels = [MSA if m else EN for m in mask]
+            conf = [1.0] * len(texts)
+        for r, label, c in zip(batch, labels, conf):
+            r["lang"] = str(label)
+            r["lang_conf"] = float(c)
+        return batch
+
+    def normalize(self, batch):
+        ar = [r for r in batch if r["lang"] != EN]
+        for r, clean in zip(ar, normalize_batch([r["text"] for r in ar])):
+            r["clean"] = clean
+        for r in batch:
+            if r["lang"] == EN:
+                r["clean"] = clean_text(r["text"])
+        return batch
+
+    def extract(self, batch):
+        for r in batch:
+            # offsets refer to the raw text, as in the SemEval XML
+            r["aspects"] = self.extractor.predict_spans(r["text"]) if r["lang"] == EN else []
+        return batch
+
+    def windows(self, batch):
+        for r in batch:
+            for asp in r["aspects"]:
+                raw = char_to_token_window(r["text"], asp["from"], asp["to"], window_size=self.window_size)
+                asp["window"] = clean_text(raw)
+        return batch
+
+    def polarity(self, batch):
+        en_aspects = [a for r in batch if r["lang"] == EN for a in r["aspects"]]
+        if en_aspects and self.en_model is not None:
+            X = self.en_model["vectorizer"].transform([a["window"] for a in en_aspects])
+            for a, p in zip(en_aspects, self.en_model["model"].predict(X)):
+                a["polarity"] = str(p)
+
+        ar = [r for r in batch if r["lang"] != EN]
+        if ar and self.ar_model is not None:
+            preds = self.ar_model.predict([r["clean"] for r in ar], normalized=True)
+            for r, p in zip(ar, preds):
+                r["polarity"] = str(p)
+        return batch
+
+    def stages(self):
+        return [
+            ("route", self.route),
+            ("normalize", self.normalize),
+            ("extract", self.extract),
+            ("windows", self.windows),
+            ("polarity", self.polarity),
+        ]
+
+
+def to_rows(batch):
+    """One output row per (sentence, aspect); Arabic sentences get one sentence-level row."""
+    rows = []
+    for r in batch:
+        base = {"id": r["id"], "lang": r["lang"]}
+        if "asin" in r:
+            base["asin"] = r["asin"]
+        if r["lang"] == EN:
+            for a in r["aspects"]:
+                rows.append(dict(base, aspect=a["term"], **{"from": a["from"], "to": a["to"]},
+                                 polarity=a.get("polarity")))
+        else:
+            rows.append(dict(base, aspect=None, **{"from": None, "to": None},
+                             polarity=r.get("polarity")))
+    return rows
+
+
+# ==========================================
+# Output
+# ==========================================
+class ShardWriter:
+    def __init__(self, out_dir: str, fmt: str = "jsonl", shard_size: int = SHARD_SIZE):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.shard_size = shard_size
+        self.shard = 0
+        self.buffer = []
+        self.rows = 0
+        self.paths = []
+        self._f = None
+        self._in_shard = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _path(self):
+        return os.path.join(self.out_dir, f"part-{self.shard:05d}.{self.fmt}")
+
+    def write(self, rows):
+        for row in rows:
+            if self.fmt == "jsonl":
+                if self._f is None:
+                    self.paths.append(self._path())
+                    self._f = open(self.paths[-1], "w", encoding="utf-8")
+                self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                self._in_shard += 1
+                if self._in_shard >= self.shard_size:
+                    self._roll()
+            else:
+                self.buffer.append(row)
+                if len(self.buffer) >= self.shard_size:
+                    self._flush_parquet()
+            self.rows += 1
+
+    def _roll(self):
+        self._f.close()
+        self._f = None
+        self._in_shard = 0
+        self.shard += 1
+
+    def _flush_parquet(self):
+        import pandas as pd
+        if not self.buffer:
+            return
+        self.paths.append(self._path())
+        pd.DataFrame(self.buffer).to_parquet(self.paths[-1], index=False)
+        self.buffer = []
+        self.shard += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        if self.fmt == "parquet":
+            self._flush_parquet()
+
+
+# ==========================================
+# Concurrent runner
+# ==========================================
+def _stage_worker(name, fn, in_q, out_q, stats):
+    busy = 0.0
+    rows = 0
+    failed = False
+    try:
+        while True:
+            batch = in_q.get()
+            if batch is _DONE:
+                break
+            if failed:
+                continue        # keep draining so upstream never blocks on a full queue
+            if isinstance(batch, _StageError):
+                out_q.put(batch)
+                failed = True
+                continue
+            try:
+                t0 = time.perf_counter()
+                batch = fn(batch)
+                busy += time.perf_counter() - t0
+                rows += len(batch)
+            except Exception as e:
+                out_q.put(_StageError(name, e))
+                failed = True
+                continue
+            out_q.put(batch)
+    finally:
+        stats[name] = {"rows": rows, "busy_sec": busy}
+        out_q.put(_DONE)
+
+
+def run(pipeline, records, writer, batch_size: int = PIPELINE_BATCH_SIZE, queue_size: int = QUEUE_SIZE):
+    """
+    Every stage runs in its own thread, connected by bounded queues so a slow
+    stage applies back-pressure instead of buffering the whole input.
+    If the reader or a stage raises, the error is passed down in place of a
+    batch, every thread still finishes, and run() re-raises it after closing
+    the writer.
+    Returns per-stage stats plus end-to-end totals.
+    """
+    stages = pipeline.stages()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    stats = {}
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_stage_worker, args=(name, fn, queues[i], queues[i + 1], stats), daemon=True)
+        for i, (name, fn) in enumerate(stages)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    def feed():
+        try:
+            for batch in batched(records, batch_size):
+                if stop.is_set():
+                    break
+                queues[0].put(batch)
+        except Exception as e:
+            queues[0].put(_StageError("read", e))
+        finally:
+            queues[0].put(_DONE)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    n_in = 0
+    write_busy = 0.0
+    error = None
+    try:
+        while True:
+            batch = queues[-1].get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, _StageError):
+                error = error or batch
+                stop.set()      # stop reading input; the stages drain what is queued
+                continue
+            if error is not None:
+                continue
+            n_in += len(batch)
+            t0 = time.perf_counter()
+            writer.write(to_rows(batch))
+            write_busy += time.perf_counter() - t0
+    finally:
+        writer.close()
+    feeder.join()
+    for t in threads:
+        t.join()
+    if error is not None:
+        print(f"⚠ Pipeline stage {error.stage!r} failed: {error.exc!r}")
+        raise error.exc
+    elapsed = time.perf_counter() - start
+
+    stats["write"] = {"rows": writer.rows, "busy_sec": write_busy}
+    stats["total"] = {"reviews": n_in, "rows": writer.rows, "sec": elapsed}
+    return stats
+
+
+def print_stats(stats):
+    print("\n=== Pipeline throughput ===")
+    for name, s in stats.items():
+        if name == "total":
+            continue
+        rate = s["rows"] / s["busy_sec"] if s["busy_sec"] > 0 else float("inf")
+        print(f"{name:>10}: {s['rows']:>9} rows, busy {s['busy_sec']:7.2f}s, {rate:>12,.0f} rows/s")
+    t = stats["total"]
+    print(f"{'total':>10}: {t['reviews']} reviews -> {t['rows']} rows in {t['sec']:.2f}s "
+          f"({t['reviews'] / t['sec']:,.0f} reviews/s end-to-end)")
+
+
+# ==========================================
+# Artifacts
+# ==========================================
+def train_english_polarity(data_path: str = DATA_PATH, out: str = ENGLISH_MODEL_PATH):
+    """Fit the window TF-IDF + LinearSVC on SemEval data and save it for the pipeline."""
+    from .data_loader import load_semeval_xml
+    from .aspect_windows import build_apc_dataset_with_windows
+    from .features import build_vectorizer, strip_for_inference
+    from .models import get_base_models, shrink_linear_model
+
+    df = build_apc_dataset_with_windows(load_semeval_xml(data_path), window_size=WINDOW_SIZE)
+    df = df[df["polarity"] != "conflict"].reset_index(drop=True)
+    vectorizer = build_vectorizer()
+    X = vectorizer.fit_transform(df["window"].values)
+    model = get_base_models()["svm"].fit(X, df["polarity"].values)
+    joblib.dump({"vectorizer": strip_for_inference(vectorizer), "model": shrink_linear_model(model)},
+                out, compress=3)
+    print(f"Saved English polarity model ({len(df)} aspects) to {out}")
+
+
+def load_extractor(extractor="auto", tagger_path=ASPECT_TAGGER_PATH, lexicon_path=ASPECT_LEXICON_PATH):
+    """AspectTagger or AspectLexicon ("auto": the tagger if it was trained, else the lexicon)."""
+    if extractor == "auto":
+        extractor = "tagger" if os.path.exists(tagger_path) else "lexicon"
+    if extractor == "tagger":
+        from .aspect_tagger import AspectTagger
+        return AspectTagger.load(tagger_path)
+    from .aspect_lexicon import AspectLexicon
+    return AspectLexicon.load(lexicon_path)
+
+
+def load_pipeline(router_path=ROUTER_PATH, extractor="auto", tagger_path=ASPECT_TAGGER_PATH,
+                  lexicon_path=ASPECT_LEXICON_PATH, en_model_path=ENGLISH_MODEL_PATH,
+                  ar_model_path=ARABIC_MODEL_PATH):
+    router = LanguageRouter.load(router_path) if os.path.exists(router_path) else None
+    if router is None:
+        print(f"No router at {router_path}; using the script pre-check only.")
+
+    ext = load_extractor(extractor, tagger_path, lexicon_path)
+
+    if not os.path.exists(en_model_path):
+        raise FileNotFoundError(f"{en_model_path} not found; run `python -m absa.pipeline train-polarity`")
+    en_model = joblib.load(en_model_path)
+
+    ar_model = None
+    if os.path.exists(ar_model_path):
+        from .arabic_train import ArabicSentimentModel
+        ar_model = ArabicSentimentModel.load(ar_model_path)
+    else:
+        print(f"No Arabic model at {ar_model_path}; Arabic rows get no polarity.")
+
+    return Pipeline(router=router, extractor=ext, en_model=en_model, ar_model=ar_model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Raw reviews -> (aspect, polarity) rows")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="stream reviews through the pipeline")
+    p_run.add_argument("input", help="amazon_reviews.txt or scraper .jsonl")
+    p_run.add_argument("--out-dir", default="absa_output")
+    p_run.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    p_run.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    p_run.add_argument("--batch-size", type=int, default=PIPELINE_BATCH_SIZE)
+    p_run.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    p_run.add_argument("--extractor", choices=["auto", "tagger", "lexicon"], default="auto")
+
+    p_train = sub.add_parser("train-polarity", help="fit the English window polarity model")
+    p_train.add_argument("--data", default=DATA_PATH)
+    p_train.add_argument("--out", default=ENGLISH_MODEL_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "train-polarity":
+        train_english_polarity(args.data, args.out)
+        return
+
+    pipeline = load_pipeline(extractor=args.extractor)
+    writer = ShardWriter(args.out_dir, fmt=args.format, shard_size=args.shard_size)
+    stats = run(pipeline, read_reviews(args.input), writer,
+                batch_size=args.batch_size, queue_size=args.queue_size)
+    print_stats(stats)
+    print(f"Wrote {len(writer.paths)} shard(s) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# absa/profiling.py
+
+import os
+import sys
+import json
+import time
+import platform
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class RunReport:
+    """
+    Lightweight per-stage instrumentation:
+
+        report = RunReport("train", profile_stage="tfidf_fit")
+        with report.stage("load_xml") as rec:
+            parsed = load_semeval_xml(path)
+            rec["items"] = len(parsed)
+        report.write_json("run_report.json")
+
+    Every stage records wall time, CPU time, peak RSS after the stage and an
+    optional item count (pass items= or set rec["items"] inside the block). The one stage named by profile_stage additionally
+    runs under cProfile (or pyinstrument) and its profile is dumped next to
+    the report.
+    """
+
+    def __init__(self, command, profile_stage=None, profiler="cprofile", profile_dir="."):
+        self.command = command
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name, items=None):
+        rec = {"name": name, "items": items}
+        prof = self._start_profiler(name)
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec["wall_sec"] = time.perf_counter() - wall0
+            rec["cpu_sec"] = time.process_time() - cpu0
+            rec["peak_rss_mb"] = peak_rss_mb()
+            if rec.get("items") and rec["wall_sec"] > 0:
+                rec["items_per_sec"] = rec["items"] / rec["wall_sec"]
+            if prof is not None:
+                rec["profile"] = self._stop_profiler(name, prof)
+            self.stages.append(rec)
+            rate = f", {rec['items_per_sec']:,.0f} items/s" if "items_per_sec" in rec else ""
+            print(f"[{name}] {rec['wall_sec']:.2f}s wall, {rec['cpu_sec']:.2f}s cpu{rate}")
+
+    def timed(self, name=None):
+        """Decorator form of stage()."""
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or fn.__name__):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    # ---------- profilers ----------
+
+    def _start_profiler(self, name):
+        if self.profile_stage != name:
+            return None
+        if self.profiler == "pyinstrument":
+            from pyinstrument import Profiler
+            prof = Profiler()
+            prof.start()
+            return prof
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+
+    def _stop_profiler(self, name, prof):
+        base = os.path.join(self.profile_dir, f"{self.command}_{name.replace(':', '_')}")
+        if self.profiler == "pyinstrument":
+            prof.stop()
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(prof.output_html())
+        else:
+            prof.disable()
+            path = base + ".prof"
+            prof.dump_stats(path)
+        print(f"[{name}] profile written to {path}")
+        return path
+
+    # ---------- output ----------
+
+    def to_dict(self):
+        return {
+            "command": self.command,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "python": platform.python_version(),
+            "total_wall_sec": time.perf_counter() - self._t0,
+            "total_cpu_sec": time.process_time() - self._c0,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Run report written to {path}")
+
+
+def add_profile_args(parser, default_report):
+    """Shared --profile / --profiler / --report flags for the train and evaluation commands."""
+    parser.add_argument(
+        "--profile", nargs="?", const="", default=None, metavar="STAGE",
+        help="write a JSON run report; with STAGE, also dump a profile of that stage",
+    )
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile")
+    parser.add_argument("--report", default=default_report, help="path of the JSON run report")
+    return parser
+
+
+def report_from_args(command, args):
+    return RunReport(command, profile_stage=args.profile or None, profiler=args.profiler,
+                     profile_dir=os.path.dirname(os.path.abspath(args.report)))
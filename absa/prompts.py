@@ -0,0 +1,351 @@
+# absa/prompts.py
+
+import os
+import sys
+import re
+import json
+import argparse
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import DATA_PATH, TRANSLATE_BATCH_SIZE
+
+ABSA_GUIDELINES = """
+You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
+Your task is to identify all explicit aspect terms in each sentence and assign
+their sentiment polarity.
+
+An "aspect term" is any product feature, component, service, or entity that
+the writer is directly evaluating. Use natural, meaningful noun phrases,
+not artificially reduced terms.
+
+Guidelines:
+
+1. Only extract explicit aspects that appear literally in the text.
+2. Use natural noun phrases:
+   - Good: “battery life”, “customer service”, “build quality”
+   - Bad: “life”, “service”, “quality” (too minimal and unclear)
+3. Ignore vague nouns by themselves:
+   - “problem”, “issue”, “experience”, “thing”, etc.
+   unless they refer to a specific concrete target.
+4. Do NOT extract aspects that are only implied.
+5. Polarity must be one of: "positive", "negative", "neutral".
+6. A sentence may contain multiple aspects.
+7. If a sentence contains no explicit aspects, return an empty list.
+8. The extracted term MUST be a literal substring of the sentence. Do NOT remove or add quotes. Do NOT remove or add quotes.
+"""
+
+JSON_FORMAT = """
+Return the output in this exact JSON format:
+
+[
+  {
+    "id": <sentence_id>,
+    "sentence": "<text>",
+    "aspect_terms": [
+        {"term": "...", "polarity": "..."},
+        {"term": "...", "polarity": "..."}
+    ]
+  }
+]
+
+If a sentence has no aspects, return:
+
+"aspect_terms": []
+
+"""
+
+LINES_FORMAT = """
+You receive numbered lines "<n>: <sentence>". Answer with the same numbers, one line each,
+giving the aspect terms as a JSON array of [term, polarity] pairs:
+<n>: [["battery life", "positive"], ["screen", "negative"]]
+<n>: []
+"""
+
+# The long prompt test.py / label_automation.py used (guidelines + JSON output format)
+ABSA_SYSTEM_PROMPT = ABSA_GUIDELINES + JSON_FORMAT
+
+# Short system prompt for test.py's one-sentence fine-tuning lines (opt-in with
+# --compact-prompt; the deployed fine-tune uses ABSA_SYSTEM_PROMPT): a tuned model
+# learns the guidelines from the examples, so repeating them in every line only adds
+# training tokens. Prompt a model tuned this way with this same text.
+SENTENCE_SYSTEM_PROMPT = """
+You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
+Identify the explicit aspect terms in the sentence and their sentiment polarity.
+Return {"aspect_terms": [{"term": "...", "polarity": "positive|negative|neutral"}]}.
+""".strip()
+
+ENCODINGS = ("json_indent", "json", "lines")
+
+
+# ---------- numbered-line batches, token counts (translate, hybrid, finetune) ----------
+
+def format_batch(texts):
+    return "\n".join(f"{i}: {' '.join(t.split())}" for i, t in enumerate(texts))
+
+
+def parse_batch(content: str, n: int):
+    """Parse "<i>: <text>" lines back into a list; missing lines come back as None."""
+    out = [None] * n
+    for line in content.splitlines():
+        head, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        try:
+            i = int(head.strip())
+        except ValueError:
+            continue
+        if 0 <= i < n:
+            out[i] = rest.strip()
+    return out
+
+
+MESSAGE_OVERHEAD = 4         # chat-format tokens per message
+EXAMPLE_OVERHEAD = 3         # reply priming
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d{1,3}|\n[ \t]*| {2,}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast BPE-length estimate without a tokenizer: common English words are one
+    token, long words one per ~8 letters, digits in groups of three, each
+    punctuation/JSON character its own token, and a newline plus its indentation
+    (or a run of spaces) one token. Close to cl100k/o200k on this data
+    (JSON-heavy, short sentences); pass --exact to count with tiktoken instead.
+    """
+    n = 0
+    for p in _PIECE_RE.findall(text):
+        n += 1 + (len(p) - 1) // 8 if p[0].isalpha() else 1
+    return n
+
+
+def exact_counter(encoding="o200k_base"):
+    """tiktoken counter if tiktoken is installed, else None."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    enc = tiktoken.get_encoding(encoding)
+    return lambda text: len(enc.encode(text))
+
+
+def add_offsets(sentence, aspects):
+    """Adds 'from'/'to' character offsets (first case-insensitive match, -1 if absent)."""
+    lowered = sentence.lower()
+    for asp in aspects:
+        idx = lowered.find(asp["term"].lower())
+        asp["from"] = idx
+        asp["to"] = idx + len(asp["term"]) if idx != -1 else -1
+    return aspects
+
+
+class PromptBuilder:
+    """
+    Builds the LLM labeling prompt for a batch of sentences and parses the reply
+    back into label.py-style records {"id", "sentence", "aspect_terms"}.
+
+    encoding:
+      "lines"       - guidelines in a fixed system message (byte-identical for every
+                      request, so provider prefix caching applies once it is
+                      long enough, e.g. 1024 tokens on OpenAI), sentences as
+                      numbered lines, reply as "<n>: [[term, polarity], ...]" without
+                      echoing the sentence back. The default.
+      "json"        - label.py's layout: guidelines + JSON format + compact JSON batch
+                      in a single user message, sentence echoed in the reply.
+      "json_indent" - label_automation.py's layout (same, batch pretty-printed).
+    """
+
+    def __init__(self, encoding="lines", guidelines=ABSA_GUIDELINES):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown prompt encoding: {encoding!r}")
+        self.encoding = encoding
+        self.guidelines = guidelines
+
+    @property
+    def system(self):
+        """Static prefix shared by every request ("" for the single-message layouts)."""
+        return (self.guidelines + LINES_FORMAT).strip() if self.encoding == "lines" else ""
+
+    def user(self, sentences, start_id=1):
+        if self.encoding == "lines":
+            return format_batch(sentences)
+        numbered = [{"id": start_id + i, "sentence": s} for i, s in enumerate(sentences)]
+        batch = json.dumps(numbered, ensure_ascii=False, indent=2 if self.encoding == "json_indent" else None)
+        return self.guidelines + JSON_FORMAT + "\n\nSentences:\n" + batch
+
+    def messages(self, sentences, start_id=1):
+        msgs = [{"role": "system", "content": self.system}] if self.system else []
+        msgs.append({"role": "user", "content": self.user(sentences, start_id)})
+        return msgs
+
+    def reply(self, sentences, aspect_lists, start_id=1):
+        """The answer this encoding expects, e.g. from gold labels (benchmarks, training lines)."""
+        if self.encoding == "lines":
+            return "\n".join(
+                f"{i}: " + json.dumps([[a["term"], a["polarity"]] for a in aspects], ensure_ascii=False)
+                for i, aspects in enumerate(aspect_lists)
+            )
+        return json.dumps([
+            {"id": start_id + i, "sentence": s,
+             "aspect_terms": [{"term": a["term"], "polarity": a["polarity"]} for a in aspects]}
+            for i, (s, aspects) in enumerate(zip(sentences, aspect_lists))
+        ], ensure_ascii=False)
+
+    def parse(self, content, sentences, start_id=1):
+        """Records aligned with sentences (None where the reply has no usable answer), with offsets."""
+        if self.encoding == "lines":
+            out = []
+            for i, (s, raw) in enumerate(zip(sentences, parse_batch(content, len(sentences)))):
+                try:
+                    pairs = json.loads(raw) if raw is not None else None
+                except json.JSONDecodeError:
+                    pairs = None
+                if not isinstance(pairs, list):
+                    out.append(None)
+                    continue
+                aspects = [{"term": p[0], "polarity": p[1]} for p in pairs
+                           if isinstance(p, list) and len(p) == 2]
+                out.append({"id": start_id + i, "sentence": s, "aspect_terms": add_offsets(s, aspects)})
+            return out
+
+        content = content.strip()
+        try:
+            parsed = json.loads(content)
+        except json.JSONDecodeError:
+            parsed = json.loads(content[content.find("["): content.rfind("]") + 1])
+        by_id = {entry.get("id"): entry for entry in parsed if isinstance(entry, dict)}
+        out = []
+        for i, s in enumerate(sentences):
+            entry = by_id.get(start_id + i)
+            if entry is None:
+                out.append(None)
+                continue
+            out.append({"id": start_id + i, "sentence": s,
+                        "aspect_terms": add_offsets(s, list(entry.get("aspect_terms", [])))})
+        return out
+
+
+def message_tokens(messages, counter=estimate_tokens):
+    return sum(counter(m["content"]) + MESSAGE_OVERHEAD for m in messages) + EXAMPLE_OVERHEAD
+
+
+def sentence_tokens(sentences, counter=estimate_tokens):
+    """Tokens each sentence adds to a "lines" prompt (its numbered line + newline)."""
+    return np.array([counter(format_batch([s])) + 1 for s in sentences], dtype=np.int64)
+
+
+def token_cost(builder, sentences, aspect_lists, batch_size=TRANSLATE_BATCH_SIZE, counter=estimate_tokens):
+    """
+    Per-sentence token cost of labeling `sentences` with `builder`, batch by batch:
+    input (split into the static prefix and the per-batch part) and output
+    (the reply for the given aspects).
+    """
+    prefix = counter(builder.system) + MESSAGE_OVERHEAD if builder.system else 0
+    n_batches = 0
+    input_tokens = output_tokens = 0
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start:start + batch_size]
+        aspects = aspect_lists[start:start + batch_size]
+        input_tokens += message_tokens(builder.messages(batch, start + 1), counter)
+        output_tokens += counter(builder.reply(batch, aspects, start + 1))
+        n_batches += 1
+    n = max(len(sentences), 1)
+    return {
+        "encoding": builder.encoding,
+        "prefix_per_request": prefix,
+        "input_per_sentence": input_tokens / n,
+        "prefix_per_sentence": prefix * n_batches / n,
+        "output_per_sentence": output_tokens / n,
+        "total_per_sentence": (input_tokens + output_tokens) / n,
+        "requests": n_batches,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+    }
+
+
+def training_line(system, sentence, aspects):
+    """test.py's fine-tuning line (user = sentence, assistant = {"aspect_terms": [...]})."""
+    return {
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": sentence},
+            {"role": "assistant", "content": json.dumps(
+                {"aspect_terms": [{"term": a["term"], "polarity": a["polarity"]} for a in aspects]},
+                ensure_ascii=False)},
+        ]
+    }
+
+
+def benchmark(xml_path=DATA_PATH, batch_size=TRANSLATE_BATCH_SIZE, counter=estimate_tokens,
+              input_price=None, cached_price=None, output_price=None):
+    """
+    Before/after token cost on a SemEval XML file: the label.py / label_automation.py
+    prompt layouts vs the "lines" encoding (labeling), and test.py's training lines
+    with the full vs the short system prompt (fine-tuning).
+    Prices are per 1M tokens; cached_price applies to the static prefix.
+    """
+    from absa.data_loader import iter_semeval_xml
+
+    sentences, aspect_lists = [], []
+    for s in iter_semeval_xml(xml_path):
+        sentences.append(s["text"])
+        aspect_lists.append(s["aspects"])
+
+    per_sentence = sentence_tokens(sentences, counter)
+    print(f"{len(sentences)} sentences; tokens per sentence line: mean {per_sentence.mean():.1f}, "
+          f"p95 {np.percentile(per_sentence, 95):.0f}, max {per_sentence.max()}")
+
+    rows = [token_cost(PromptBuilder(enc), sentences, aspect_lists, batch_size, counter)
+            for enc in ("json_indent", "json", "lines")]
+    base = rows[0]["total_per_sentence"]
+    print(f"\nLabeling, batches of {batch_size}: tokens per sentence")
+    print(f"{'encoding':<12} {'prefix/req':>10} {'input':>8} {'(prefix)':>9} {'output':>8} {'total':>8} {'vs before':>10}")
+    for r in rows:
+        print(f"{r['encoding']:<12} {r['prefix_per_request']:10d} {r['input_per_sentence']:8.1f} "
+              f"{r['prefix_per_sentence']:9.1f} {r['output_per_sentence']:8.1f} {r['total_per_sentence']:8.1f} "
+              f"{r['total_per_sentence'] / base - 1:+10.1%}")
+    if input_price is not None and output_price is not None:
+        cached = input_price if cached_price is None else cached_price
+        print(f"\nCost per 1k sentences (input ${input_price}/1M, cached prefix ${cached}/1M, "
+              f"output ${output_price}/1M):")
+        for r in rows:
+            fresh = r["input_per_sentence"] - r["prefix_per_sentence"]
+            cost = (fresh * input_price + r["prefix_per_sentence"] * cached
+                    + r["output_per_sentence"] * output_price) * 1000 / 1e6
+            print(f"  {r['encoding']:<12} ${cost:.4f}")
+
+    train = {}
+    for name, system in (("full prompt", ABSA_SYSTEM_PROMPT), ("short prompt", SENTENCE_SYSTEM_PROMPT)):
+        train[name] = sum(message_tokens(training_line(system, s, a)["messages"], counter)
+                          for s, a in zip(sentences, aspect_lists))
+    print("\nFine-tuning lines (test.py layout): tokens per line")
+    for name, total in train.items():
+        print(f"  {name:<13} {total / len(sentences):8.1f}  ({total:,} total, "
+              f"{total / train['full prompt'] - 1:+.1%})")
+    return {"labeling": rows, "training": train, "sentence_tokens_mean": float(per_sentence.mean())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt token cost: current layouts vs compact encoding")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--batch-size", type=int, default=TRANSLATE_BATCH_SIZE)
+    parser.add_argument("--exact", action="store_true", help="count tokens with tiktoken (if installed)")
+    parser.add_argument("--input-price", type=float, help="per 1M input tokens")
+    parser.add_argument("--cached-price", type=float, help="per 1M cached input tokens")
+    parser.add_argument("--output-price", type=float, help="per 1M output tokens")
+    args = parser.parse_args(argv)
+
+    counter = exact_counter() if args.exact else None
+    if args.exact and counter is None:
+        print("tiktoken is not installed; reporting estimated token counts")
+    benchmark(args.data, args.batch_size, counter or estimate_tokens,
+              args.input_price, args.cached_price, args.output_price)
+
+
+if __name__ == "__main__":
+    main()
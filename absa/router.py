@@ -0,0 +1,269 @@
+# absa/router.py
+
+import re
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import RANDOM_STATE, ROUTER_PATH, ROUTER_BATCH_SIZE, DATA_PATH, ARABIC_PATH
+
+EN = "en"
+MSA = "msa"
+DIALECT = "dialect"
+LABELS = (EN, MSA, DIALECT)
+
+# Arabic, Arabic Supplement, Arabic Extended-A and the two presentation-form blocks.
+# Same idea as is_arabic() in web_scrapper.py, widened to the full script.
+ARABIC_CHARS_RE = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]")
+
+
+def is_arabic(text: str) -> bool:
+    return ARABIC_CHARS_RE.search(text) is not None
+
+
+def arabic_mask(texts) -> np.ndarray:
+    """Boolean mask: True where the text contains any Arabic-script character."""
+    search = ARABIC_CHARS_RE.search
+    return np.fromiter((search(t) is not None for t in texts), dtype=bool, count=len(texts))
+
+
+def build_router_vectorizer():
+    """
+    Char n-grams inside word boundaries: short enough to survive dialect spelling
+    variation, and cheap to compute for the short texts the router sees.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(
+        analyzer="char_wb",
+        ngram_range=(2, 4),
+        max_features=50000,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+
+
+class LanguageRouter:
+    """
+    Splits a stream of reviews into English / MSA / dialectal Arabic.
+
+    The Unicode pre-check sends everything without Arabic script straight to
+    "en"; only Arabic-script texts are vectorized and scored by the Logistic
+    Regression, once per distinct text. Scores are kept in a bounded LRU cache
+    because short reviews ("ممتاز", "جيد جدا") repeat constantly in the stream.
+    """
+
+    def __init__(self, vectorizer=None, model=None, cache_size=100000):
+        if model is None:
+            from sklearn.linear_model import LogisticRegression
+            model = LogisticRegression(max_iter=1000, C=4.0, random_state=RANDOM_STATE)
+        self.vectorizer = vectorizer if vectorizer is not None else build_router_vectorizer()
+        self.model = model
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # text -> (label, confidence)
+
+    def fit(self, texts, labels):
+        texts = list(texts)
+        labels = np.asarray(labels)
+        X = self.vectorizer.fit_transform(texts)
+        self.model.fit(X, labels)
+        self._cache.clear()
+        return self
+
+    def _score_arabic(self, texts):
+        """Return (labels, confidence) for Arabic-script texts, scoring each distinct text once."""
+        cache = self._cache
+        missing = list(dict.fromkeys(t for t in texts if t not in cache))
+        if missing:
+            proba = self.model.predict_proba(self.vectorizer.transform(missing))
+            best = proba.argmax(axis=1)
+            classes = self.model.classes_[best]
+            best_conf = proba[np.arange(len(missing)), best]
+            for t, label, c in zip(missing, classes, best_conf):
+                cache[t] = (label, float(c))
+        labels = np.empty(len(texts), dtype=object)
+        conf = np.empty(len(texts), dtype=np.float32)
+        for i, t in enumerate(texts):
+            labels[i], conf[i] = cache[t]
+            cache.move_to_end(t)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return labels, conf
+
+    def predict_with_confidence(self, texts):
+        """
+        Returns (labels, confidence) as numpy arrays aligned with texts.
+        Texts decided by the script pre-check get confidence 1.0.
+        """
+        texts = texts if isinstance(texts, list) else list(texts)
+        n = len(texts)
+        labels = np.full(n, EN, dtype=object)
+        conf = np.ones(n, dtype=np.float32)
+
+        mask = arabic_mask(texts)
+        if mask.any():
+            idx = np.flatnonzero(mask)
+            ar_labels, ar_conf = self._score_arabic([texts[i] for i in idx])
+            labels[idx] = ar_labels
+            conf[idx] = ar_conf
+        return labels, conf
+
+    def predict(self, texts):
+        return self.predict_with_confidence(texts)[0]
+
+    def route(self, texts):
+        """
+        Partition a batch into per-language queues:
+            {"en": [(i, text), ...], "msa": [...], "dialect": [...]}
+        where i is the position in the input batch.
+        """
+        texts = texts if isinstance(texts, list) else list(texts)
+        labels = self.predict(texts)
+        queues = {label: [] for label in LABELS}
+        for label in np.unique(labels):
+            idx = np.flatnonzero(labels == label)
+            queues.setdefault(label, []).extend((int(i), texts[i]) for i in idx)
+        return queues
+
+    def route_stream(self, texts, batch_size=ROUTER_BATCH_SIZE):
+        """Yield route() results for consecutive batches; indices are global."""
+        batch = []
+        offset = 0
+        for t in texts:
+            batch.append(t)
+            if len(batch) == batch_size:
+                yield _shift(self.route(batch), offset)
+                offset += len(batch)
+                batch = []
+        if batch:
+            yield _shift(self.route(batch), offset)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def save(self, path=ROUTER_PATH):
+        import joblib
+
+        joblib.dump({"vectorizer": self.vectorizer, "model": self.model}, path)
+
+    @classmethod
+    def load(cls, path=ROUTER_PATH):
+        import joblib
+
+        obj = joblib.load(path)
+        return cls(vectorizer=obj["vectorizer"], model=obj["model"])
+
+
+def _shift(queues, offset):
+    if offset == 0:
+        return queues
+    return {label: [(i + offset, t) for i, t in items] for label, items in queues.items()}
+
+
+def load_router_corpus(path: str):
+    """
+    Stream a JSONL router corpus, one {"text": str, "label": "en"|"msa"|"dialect"} per line.
+    Yields (text, label).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            yield obj["text"], obj["label"]
+
+
+def _benchmark_texts(n):
+    """Mix of the shipped English and Arabic sentences, repeated up to n texts."""
+    from .data_loader import load_semeval_xml
+
+    english = [item["text"] for item in load_semeval_xml(DATA_PATH)]
+    with open(ARABIC_PATH, "r", encoding="utf-8") as f:
+        arabic = [json.loads(line)["sentence"] for line in f if line.strip()]
+    pool = english + arabic
+    reps = n // len(pool) + 1
+    return (pool * reps)[:n], english, arabic
+
+
+def _time_routing(router, texts, batch_size):
+    start = time.perf_counter()
+    counts = {}
+    for queues in router.route_stream(texts, batch_size=batch_size):
+        for label, items in queues.items():
+            counts[label] = counts.get(label, 0) + len(items)
+    elapsed = time.perf_counter() - start
+    return elapsed, counts
+
+
+def benchmark(router=None, n=500000, batch_size=ROUTER_BATCH_SIZE):
+    """
+    Time route() over n texts built by repeating the shipped corpora.
+    Reports three numbers separately:
+      - precheck: the Unicode script mask alone
+      - cold: every Arabic text scored by the model (cache cleared)
+      - stream: the repeated stream, where duplicates hit the score cache
+    Without a trained router, fit a throwaway model on the shipped corpora
+    (English vs Arabic) — throughput only.
+    """
+    texts, english, arabic = _benchmark_texts(n)
+    if router is None:
+        router = LanguageRouter().fit(english + arabic, [EN] * len(english) + [MSA] * len(arabic))
+
+    start = time.perf_counter()
+    arabic_mask(texts)
+    t_mask = time.perf_counter() - start
+
+    distinct = english + arabic
+    router.clear_cache()
+    t_cold, _ = _time_routing(router, distinct, batch_size)
+
+    router.clear_cache()
+    t_stream, counts = _time_routing(router, texts, batch_size)
+
+    print(f"Pre-check:  {n} texts in {t_mask:.3f}s ({n / t_mask:,.0f} texts/s)")
+    print(f"Cold:       {len(distinct)} distinct texts in {t_cold:.3f}s ({len(distinct) / t_cold:,.0f} texts/s)")
+    print(f"Stream:     {n} texts in {t_stream:.3f}s ({n / t_stream:,.0f} texts/s)")
+    print(f"Queue sizes: {counts}")
+    return {
+        "texts": n,
+        "precheck_per_sec": n / t_mask,
+        "cold_per_sec": len(distinct) / t_cold,
+        "stream_per_sec": n / t_stream,
+        "counts": counts,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Language / dialect router")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_train = sub.add_parser("train", help="fit on a JSONL corpus of {text, label}")
+    p_train.add_argument("corpus")
+    p_train.add_argument("--out", default=ROUTER_PATH)
+
+    p_bench = sub.add_parser("bench", help="measure route() throughput")
+    p_bench.add_argument("--model", default=None, help="trained router to load")
+    p_bench.add_argument("-n", type=int, default=500000)
+    p_bench.add_argument("--batch-size", type=int, default=ROUTER_BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "train":
+        pairs = list(load_router_corpus(args.corpus))
+        texts = [t for t, _ in pairs]
+        labels = [l for _, l in pairs]
+        print(f"Training router on {len(texts)} texts...")
+        router = LanguageRouter().fit(texts, labels)
+        router.save(args.out)
+        print(f"Saved router to {args.out}")
+    elif args.cmd == "bench":
+        router = LanguageRouter.load(args.model) if args.model else None
+        benchmark(router, n=args.n, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# absa/significance.py
+
+import numpy as np
+from scipy.stats import binom
+
+from .config import RANDOM_STATE
+
+N_BOOTSTRAP = 10000
+_MAX_CELLS = 20_000_000   # cap on resample-index matrix size per chunk (B x n)
+
+
+def _resample_chunks(n, n_boot, seed):
+    """Yield (chunk_size, n) index matrices; chunked so B x n never exceeds _MAX_CELLS."""
+    rng = np.random.default_rng(seed)
+    per_chunk = max(1, _MAX_CELLS // max(n, 1))
+    done = 0
+    while done < n_boot:
+        b = min(per_chunk, n_boot - done)
+        yield rng.integers(0, n, size=(b, n), dtype=np.int32)
+        done += b
+
+
+def _encode(y_true, y_pred):
+    labels, inv = np.unique(np.concatenate([np.asarray(y_true), np.asarray(y_pred)]), return_inverse=True)
+    n = len(y_true)
+    return inv[:n], inv[n:], len(labels)
+
+
+def _macro_f1_from_codes(t_idx, p_idx, k):
+    """Macro-F1 per resample row from (B, n) matrices of true/pred class codes."""
+    B = t_idx.shape[0]
+    offs = (np.arange(B) * k)[:, None]
+    tp = np.bincount((offs + t_idx)[t_idx == p_idx], minlength=B * k).reshape(B, k)
+    true_cnt = np.bincount((offs + t_idx).ravel(), minlength=B * k).reshape(B, k)
+    pred_cnt = np.bincount((offs + p_idx).ravel(), minlength=B * k).reshape(B, k)
+    denom = true_cnt + pred_cnt
+    f1 = np.where(denom > 0, 2 * tp / np.maximum(denom, 1), 0.0)
+    present = true_cnt > 0
+    return (f1 * present).sum(axis=1) / np.maximum(present.sum(axis=1), 1)
+
+
+def bootstrap_scores(y_true, y_pred, metric="accuracy", n_boot=N_BOOTSTRAP, seed=RANDOM_STATE):
+    """
+    Metric on n_boot resamples of the test set, computed with index matrices
+    instead of a Python loop. metric: "accuracy" or "macro_f1".
+    """
+    t, p, k = _encode(y_true, y_pred)
+    correct = (t == p).astype(np.float32)
+    out = []
+    for idx in _resample_chunks(len(t), n_boot, seed):
+        if metric == "accuracy":
+            out.append(correct[idx].mean(axis=1))
+        else:
+            out.append(_macro_f1_from_codes(t[idx], p[idx], k))
+    return np.concatenate(out)
+
+
+def bootstrap_ci(y_true, y_pred, metric="accuracy", n_boot=N_BOOTSTRAP, alpha=0.05, seed=RANDOM_STATE):
+    """Percentile bootstrap CI: (point estimate, low, high)."""
+    scores = bootstrap_scores(y_true, y_pred, metric=metric, n_boot=n_boot, seed=seed)
+    t, p, k = _encode(y_true, y_pred)
+    if metric == "accuracy":
+        point = float((t == p).mean())
+    else:
+        point = float(_macro_f1_from_codes(t[None, :], p[None, :], k)[0])
+    low, high = np.quantile(scores, [alpha / 2, 1 - alpha / 2])
+    return point, float(low), float(high)
+
+
+def paired_bootstrap(y_true, pred_a, pred_b, metric="accuracy", n_boot=N_BOOTSTRAP, seed=RANDOM_STATE):
+    """
+    Paired bootstrap test of A vs B: both models are scored on the same resamples.
+    Returns (mean delta A-B, CI low, CI high, two-sided p-value).
+    """
+    y_true = np.asarray(y_true)
+    a = bootstrap_scores(y_true, pred_a, metric=metric, n_boot=n_boot, seed=seed)
+    b = bootstrap_scores(y_true, pred_b, metric=metric, n_boot=n_boot, seed=seed)
+    delta = a - b
+    low, high = np.quantile(delta, [0.025, 0.975])
+    p = 2 * min((delta <= 0).mean(), (delta >= 0).mean())
+    return float(delta.mean()), float(low), float(high), float(min(p, 1.0))
+
+
+def mcnemar(y_true, pred_a, pred_b):
+    """
+    Exact McNemar test on the discordant pairs.
+    Returns (b, c, p-value) where b = A right/B wrong and c = A wrong/B right.
+    """
+    y_true = np.asarray(y_true)
+    a_ok = np.asarray(pred_a) == y_true
+    b_ok = np.asarray(pred_b) == y_true
+    b = int((a_ok & ~b_ok).sum())
+    c = int((~a_ok & b_ok).sum())
+    if b + c == 0:
+        return b, c, 1.0
+    p = 2 * binom.cdf(min(b, c), b + c, 0.5)
+    return b, c, float(min(p, 1.0))
+
+
+def compare_models(y_true, predictions, reference=None, n_boot=N_BOOTSTRAP):
+    """
+    Print paired comparisons of every model against `reference`
+    (default: the most accurate one). predictions: {name: y_pred}.
+    """
+    y_true = np.asarray(y_true)
+    if reference is None:
+        reference = max(predictions, key=lambda name: (np.asarray(predictions[name]) == y_true).mean())
+    print(f"\n=== Paired comparison vs {reference} (bootstrap n={n_boot}, McNemar) ===")
+    rows = []
+    for name, pred in predictions.items():
+        if name == reference:
+            continue
+        d, lo, hi, p_boot = paired_bootstrap(y_true, predictions[reference], pred, n_boot=n_boot)
+        b, c, p_mc = mcnemar(y_true, predictions[reference], pred)
+        print(f"{name:>10}: Δacc={d:+.4f} [{lo:+.4f}, {hi:+.4f}]  p_boot={p_boot:.4f}  "
+              f"McNemar b={b} c={c} p={p_mc:.4f}")
+        rows.append({"model": name, "reference": reference, "delta": d, "ci_low": lo, "ci_high": hi,
+                     "p_bootstrap": p_boot, "mcnemar_b": b, "mcnemar_c": c, "p_mcnemar": p_mc})
+    return rows
@@ -0,0 +1,228 @@
+# absa/spacy_preprocess.py
+
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+from functools import lru_cache
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import DATA_PATH, RANDOM_STATE, TEST_SIZE, WINDOW_SIZE, SPACY_MODEL, SPACY_CACHE_PATH
+from absa.preprocess import clean_text
+
+# Lemmas only need tok2vec + tagger + attribute_ruler + lemmatizer; the parser and
+# NER are most of en_core_web_sm's run time and their output is never used.
+SPACY_DISABLE = ("parser", "ner")
+SPACY_BATCH_SIZE = 1000
+
+# spaCy's stop list contains the negations; dropping them flips aspect polarity.
+KEEP_WORDS = frozenset({"not", "no", "never", "n't", "nor", "without", "nothing", "none", "neither"})
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=None)
+def load_spacy(model=SPACY_MODEL, disable=SPACY_DISABLE):
+    """spaCy pipeline with the unused components disabled, loaded once per process."""
+    import spacy
+    return spacy.load(model, disable=list(disable))
+
+
+@lru_cache(maxsize=None)
+def pipeline_version(model=SPACY_MODEL):
+    """
+    spaCy and pipeline versions for cache keys: a new model release or spaCy
+    upgrade changes lemmas/stop words, so its results must not be served from an
+    old cache. Installed pipeline packages are versioned by their package
+    metadata (the same number as nlp.meta["version"]), so a warm cache does not
+    pay for spacy.load; pipelines loaded from a path are loaded to read nlp.meta.
+    """
+    import spacy
+    version = spacy.util.get_package_version(model) if spacy.util.is_package(model) else None
+    if version is None:
+        version = load_spacy(model).meta.get("version", "")
+    return f"spacy-{spacy.__version__}|{model}-{version}"
+
+
+def doc_to_text(doc, lemmas=True, drop_stopwords=True):
+    """Lower-cased lemmas (or words), stop words dropped except negations, whitespace tokens skipped."""
+    out = []
+    for tok in doc:
+        if tok.is_space:
+            continue
+        word = tok.lower_
+        if drop_stopwords and tok.is_stop and word not in KEEP_WORDS:
+            continue
+        lemma = tok.lemma_.lower() if lemmas and word not in KEEP_WORDS else ""
+        out.append(lemma or word)   # no lemma without a lemmatizer in the pipeline
+    return " ".join(out)
+
+
+class SpacyPreprocessor:
+    """
+    spaCy counterpart of clean_text(): tags stripped, then lemmas with stop words
+    removed. Texts go through nlp.pipe in batches (n_process > 1 fans them out to
+    worker processes), each distinct text once; results are cached by a hash of
+    the text and the settings, in memory and optionally in SQLite (cache_path),
+    so repeated sentences and re-runs skip spaCy entirely. Keys include the spaCy
+    and pipeline versions, so an upgrade re-parses instead of reusing old output.
+
+    Call it on a single text (usable as clean_fn for
+    build_apc_dataset_with_windows) after warming it with process(texts).
+    """
+
+    def __init__(self, model=SPACY_MODEL, batch_size=SPACY_BATCH_SIZE, n_process=1,
+                 lemmas=True, drop_stopwords=True, cache_path=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.lemmas = lemmas
+        self.drop_stopwords = drop_stopwords
+        self._prefix = None
+        self.cache = {}
+        self.store = None
+        if cache_path:
+            from absa.translate import KeyValueCache
+            self.store = KeyValueCache(cache_path, "spacy_clean", value="clean")
+        self.stats = {"texts": 0, "memory_hits": 0, "store_hits": 0, "parsed": 0}
+
+    def _key(self, text):
+        if self._prefix is None:
+            self._prefix = f"{pipeline_version(self.model)}|{int(self.lemmas)}{int(self.drop_stopwords)}|".encode("utf-8")
+        return hashlib.sha1(self._prefix + text.encode("utf-8")).hexdigest()
+
+    def process(self, texts):
+        texts = texts if isinstance(texts, list) else list(texts)
+        keys = [self._key(t) for t in texts]
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in self.cache and k not in missing:
+                missing[k] = t
+        self.stats["texts"] += len(texts)
+        self.stats["memory_hits"] += len(texts) - len(missing)
+
+        if missing and self.store is not None:
+            found = self.store.get_many(missing)
+            self.cache.update(found)
+            self.stats["store_hits"] += len(found)
+            missing = {k: t for k, t in missing.items() if k not in found}
+
+        if missing:
+            nlp = load_spacy(self.model)
+            inputs = (_SPACE_RE.sub(" ", _TAG_RE.sub(" ", t)).strip() for t in missing.values())
+            docs = nlp.pipe(inputs, batch_size=self.batch_size, n_process=self.n_process)
+            new = [(k, doc_to_text(doc, self.lemmas, self.drop_stopwords)) for k, doc in zip(missing, docs)]
+            self.cache.update(new)
+            if self.store is not None:
+                self.store.put_many(new)
+            self.stats["parsed"] += len(new)
+
+        return [self.cache[k] for k in keys]
+
+    def __call__(self, text):
+        hit = self.cache.get(self._key(text))
+        return hit if hit is not None else self.process([text])[0]
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+
+# ------------------------------------------
+# Benchmark vs. the regex-only clean_text()
+# ------------------------------------------
+
+def benchmark(data_path=DATA_PATH, repeat=3, n_process=2, batch_size=SPACY_BATCH_SIZE,
+              cache_path=None, accuracy=True):
+    """
+    Throughput of clean_text() vs SpacyPreprocessor on every text the window
+    dataset cleans (sentences, windows, terms), cold (in-process and with
+    n_process workers), from the in-memory cache and from the SQLite cache;
+    with accuracy=True also the LinearSVC window accuracy of both cleaners.
+    """
+    from absa.data_loader import load_semeval_xml
+    from absa.aspect_windows import apc_raw_texts
+
+    parsed = load_semeval_xml(data_path)
+    texts = list(apc_raw_texts(parsed, WINDOW_SIZE))
+    n = len(texts)
+    print(f"Benchmarking on {len(parsed)} sentences from {data_path}: {n} texts "
+          f"({len(set(texts))} distinct)")
+
+    def timed(fn, runs=1):
+        best = float("inf")
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    load_spacy()   # model load is a one-off cost, kept out of the per-text numbers
+    results = {"regex": timed(lambda: [clean_text(t) for t in texts], repeat)}
+    results["spacy"] = timed(lambda: SpacyPreprocessor(batch_size=batch_size).process(texts))
+    if n_process > 1:
+        results[f"spacy_x{n_process}"] = timed(
+            lambda: SpacyPreprocessor(batch_size=batch_size, n_process=n_process).process(texts))
+
+    warm = SpacyPreprocessor(batch_size=batch_size)
+    warm.process(texts)
+    results["spacy_memory_cache"] = timed(lambda: [warm(t) for t in texts], repeat)
+
+    tmp_store = cache_path is None
+    cache_path = cache_path or f"spacy_bench_{os.getpid()}.sqlite"
+    try:
+        SpacyPreprocessor(batch_size=batch_size, cache_path=cache_path).process(texts)
+        results["spacy_sqlite_cache"] = timed(
+            lambda: SpacyPreprocessor(batch_size=batch_size, cache_path=cache_path).process(texts), repeat)
+    finally:
+        if tmp_store:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(cache_path + suffix):
+                    os.remove(cache_path + suffix)
+
+    for name, secs in results.items():
+        print(f"{name:>20}: {secs:.3f}s ({n / secs:,.0f} texts/s)")
+
+    if accuracy:
+        from sklearn.model_selection import train_test_split
+        from sklearn.svm import LinearSVC
+        from sklearn.metrics import accuracy_score
+        from absa.aspect_windows import build_apc_dataset_with_windows
+        from absa.features import build_vectorizer
+
+        for name, clean_fn in (("regex", clean_text), ("spacy", warm)):
+            df = build_apc_dataset_with_windows(parsed, window_size=WINDOW_SIZE, clean_fn=clean_fn)
+            df = df[df["polarity"] != "conflict"].reset_index(drop=True)
+            X_train, X_test, y_train, y_test = train_test_split(
+                df["window"].values, df["polarity"].values,
+                test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=df["polarity"].values)
+            vec = build_vectorizer()
+            clf = LinearSVC(C=1.0).fit(vec.fit_transform(X_train), y_train)
+            acc = accuracy_score(y_test, clf.predict(vec.transform(X_test)))
+            results[f"{name}_accuracy"] = acc
+            print(f"{name:>20}: window accuracy {acc:.4f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="spaCy preprocessing (nlp.pipe, parser/NER disabled) "
+                                                 "vs the regex-only clean_text")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--n-process", type=int, default=2, help="nlp.pipe worker processes")
+    parser.add_argument("--batch-size", type=int, default=SPACY_BATCH_SIZE)
+    parser.add_argument("--cache", default=None, help=f"SQLite cache to time (e.g. {SPACY_CACHE_PATH}); "
+                                                      "default: a temporary file")
+    parser.add_argument("--no-accuracy", action="store_true", help="skip the LinearSVC comparison")
+    args = parser.parse_args(argv)
+    benchmark(args.data, args.repeat, args.n_process, args.batch_size, args.cache, not args.no_accuracy)
+
+
+if __name__ == "__main__":
+    main()
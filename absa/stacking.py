@@ -0,0 +1,297 @@
+# absa/stacking.py
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import RANDOM_STATE, STACKING_CACHE_DIR
+
+N_FOLDS = 5
+
+
+def _scores(model, X):
+    """decision_function (or predict_proba) as a float32 (n, k) block; binary -> (n, 1)."""
+    s = model.decision_function(X) if hasattr(model, "decision_function") else model.predict_proba(X)
+    s = np.asarray(s, dtype=np.float32)
+    return s.reshape(s.shape[0], -1)
+
+
+def _fit_fold(model, X, y, train_idx, test_idx):
+    model.fit(X[train_idx], y[train_idx])
+    return test_idx, _scores(model, X[test_idx])
+
+
+def _fit_full(model, X, y):
+    return model.fit(X, y)
+
+
+def data_fingerprint(X, y):
+    """sha1 over the feature matrix and labels, so cached scores are never reused on other data."""
+    import scipy.sparse as sp
+
+    h = hashlib.sha1()
+    h.update(repr(X.shape).encode())
+    if sp.issparse(X):
+        X = sp.csr_matrix(X)
+        parts = (X.data, X.indices, X.indptr)
+    else:
+        parts = (np.ascontiguousarray(X),)
+    for a in parts:
+        h.update(np.ascontiguousarray(a).view(np.uint8))
+    h.update("\n".join(map(str, y)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _model_key(name, model, fingerprint, cv, seed):
+    params = repr(sorted(model.get_params(deep=True).items()))
+    raw = f"{name}|{type(model).__name__}|{params}|{fingerprint}|{cv}|{seed}"
+    return f"{name}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]}"
+
+
+class StackingEngine:
+    """
+    Stacking where each base learner's out-of-fold decision scores are computed
+    once and cached (in memory, and on disk when cache_dir is set):
+
+        engine = StackingEngine(get_stacking_models()).fit(X_train, y_train)
+        engine.fit_meta(LinearSVC())                   # no base model is retrained
+        engine.add_model("nb", ComplementNB(), X_train, y_train)   # only nb is trained
+
+    All (learner, fold) fits plus the full-data refits run in one joblib Parallel
+    call. The cache key covers the learner's parameters, the data fingerprint and
+    the fold setup, so changing any of them recomputes just that learner.
+    """
+
+    def __init__(self, base_models, meta_model=None, cv=N_FOLDS, n_jobs=-1,
+                 cache_dir=None, random_state=RANDOM_STATE):
+        self.base_models = dict(base_models)
+        if meta_model is None:
+            from sklearn.linear_model import LogisticRegression
+            meta_model = LogisticRegression(max_iter=1000)
+        self.meta_model = meta_model
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+        self.oof_ = {}       # name -> (n_train, k) out-of-fold scores
+        self.fitted_ = {}    # name -> learner refit on all training data
+        self._fingerprint = None
+        self.y_ = None
+
+    # ---------- base learners ----------
+
+    def _cache_path(self, name):
+        key = _model_key(name, self.base_models[name], self._fingerprint, self.cv, self.random_state)
+        return os.path.join(self.cache_dir, key + ".joblib")
+
+    def _load_cached(self, name):
+        if not self.cache_dir:
+            return False
+        path = self._cache_path(name)
+        if not os.path.exists(path):
+            return False
+        import joblib
+        obj = joblib.load(path)
+        self.oof_[name], self.fitted_[name] = obj["oof"], obj["model"]
+        return True
+
+    def _store(self, name):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(name)
+        tmp = path + ".tmp"
+        import joblib
+        joblib.dump({"oof": self.oof_[name], "model": self.fitted_[name]}, tmp, compress=3)
+        os.replace(tmp, path)
+
+    def fit_base(self, X, y, names=None):
+        """Compute OOF scores + full refits for the learners that aren't cached yet."""
+        y = np.asarray(y)
+        fingerprint = data_fingerprint(X, y)
+        if fingerprint != self._fingerprint:
+            self.oof_, self.fitted_ = {}, {}
+            self._fingerprint, self.y_ = fingerprint, y
+        self.classes_ = np.unique(y)
+
+        names = list(names or self.base_models)
+        todo = [n for n in names if n not in self.oof_ and not self._load_cached(n)]
+        self.last_trained_ = todo
+        if not todo:
+            return self
+
+        from joblib import Parallel, delayed
+        from sklearn.base import clone
+        from sklearn.model_selection import StratifiedKFold
+
+        folds = list(StratifiedKFold(self.cv, shuffle=True, random_state=self.random_state)
+                     .split(np.zeros(len(y)), y))
+        tasks = [delayed(_fit_fold)(clone(self.base_models[n]), X, y, tr, te) for n in todo for tr, te in folds]
+        tasks += [delayed(_fit_full)(clone(self.base_models[n]), X, y) for n in todo]
+        out = Parallel(n_jobs=self.n_jobs)(tasks)
+
+        for i, name in enumerate(todo):
+            fold_out = out[i * len(folds):(i + 1) * len(folds)]
+            oof = np.zeros((len(y), fold_out[0][1].shape[1]), dtype=np.float32)
+            for test_idx, scores in fold_out:
+                oof[test_idx] = scores
+            self.oof_[name] = oof
+            self.fitted_[name] = out[len(todo) * len(folds) + i]
+            self._store(name)
+        return self
+
+    def add_model(self, name, model, X, y, refit_meta=True):
+        """Add one base learner; only it is trained (the others' cached scores are reused)."""
+        self.base_models[name] = model
+        self.fit_base(X, y, names=[name])
+        if refit_meta:
+            self.fit_meta()
+        return self
+
+    def remove_model(self, name, refit_meta=True):
+        self.base_models.pop(name)
+        self.oof_.pop(name, None)
+        self.fitted_.pop(name, None)
+        if refit_meta:
+            self.fit_meta()
+        return self
+
+    # ---------- meta learner ----------
+
+    def meta_features(self):
+        return np.hstack([self.oof_[n] for n in self.base_models])
+
+    def fit_meta(self, meta_model=None):
+        """(Re)train the meta learner on the cached OOF scores; optionally swap it first."""
+        if meta_model is not None:
+            self.meta_model = meta_model
+        self.meta_model.fit(self.meta_features(), self.y_)
+        return self
+
+    def fit(self, X, y):
+        return self.fit_base(X, y).fit_meta()
+
+    # ---------- inference ----------
+
+    def transform(self, X):
+        return np.hstack([_scores(self.fitted_[n], X) for n in self.base_models])
+
+    def predict(self, X):
+        return self.meta_model.predict(self.transform(X))
+
+    def save(self, path):
+        """Inference state only (fitted learners + meta learner); OOF scores stay in the cache."""
+        import joblib
+        joblib.dump({"names": list(self.base_models), "fitted": self.fitted_, "meta": self.meta_model},
+                    path, compress=3)
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+        obj = joblib.load(path)
+        engine = cls({n: obj["fitted"][n] for n in obj["names"]}, obj["meta"])
+        engine.fitted_ = obj["fitted"]
+        return engine
+
+
+def benchmark(X_train, y_train, X_test, y_test, n_jobs=-1, cv=N_FOLDS, cache_dir=None):
+    """
+    Training time and accuracy of StackingEngine vs sklearn's StackingClassifier on
+    the same folds, for a full fit, a meta-learner swap and adding one base learner.
+    """
+    from sklearn.ensemble import StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.naive_bayes import ComplementNB
+    from sklearn.svm import LinearSVC
+    from absa.models import get_stacking_models
+
+    def sk_fit(estimators, final):
+        clf = StackingClassifier(
+            estimators=list(estimators.items()), final_estimator=final,
+            cv=StratifiedKFold(cv, shuffle=True, random_state=RANDOM_STATE),
+            stack_method="auto", n_jobs=n_jobs,
+        )
+        t0 = time.perf_counter()
+        clf.fit(X_train, y_train)
+        return clf, time.perf_counter() - t0
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+
+    rows = []
+    extra = ("nb", ComplementNB())
+
+    sk, t = sk_fit(get_stacking_models(), LogisticRegression(max_iter=1000))
+    rows.append(("sklearn", "fit", t, accuracy_score(y_test, sk.predict(X_test))))
+    engine = StackingEngine(get_stacking_models(), n_jobs=n_jobs, cv=cv, cache_dir=cache_dir)
+    t = timed(lambda: engine.fit(X_train, y_train))
+    cached = len(engine.base_models) - len(engine.last_trained_)
+    if cached:
+        print(f"engine: {cached} base learner(s) loaded from {cache_dir}")
+    rows.append(("engine", "fit", t, accuracy_score(y_test, engine.predict(X_test))))
+
+    sk, t = sk_fit(get_stacking_models(), LinearSVC())
+    rows.append(("sklearn", "swap meta", t, accuracy_score(y_test, sk.predict(X_test))))
+    t = timed(lambda: engine.fit_meta(LinearSVC()))
+    rows.append(("engine", "swap meta", t, accuracy_score(y_test, engine.predict(X_test))))
+
+    sk, t = sk_fit({**get_stacking_models(), extra[0]: extra[1]}, LinearSVC())
+    rows.append(("sklearn", "add model", t, accuracy_score(y_test, sk.predict(X_test))))
+    t = timed(lambda: engine.add_model(*extra, X_train, y_train))
+    rows.append(("engine", "add model", t, accuracy_score(y_test, engine.predict(X_test))))
+
+    print(f"\n{'impl':<8} {'step':<10} {'train s':>8} {'accuracy':>9}")
+    for impl, step, t, acc in rows:
+        print(f"{impl:<8} {step:<10} {t:8.2f} {acc:9.4f}")
+    return engine, rows
+
+
+def main(argv=None):
+    from absa.config import DATA_PATH, TEST_SIZE, WINDOW_SIZE
+
+    parser = argparse.ArgumentParser(description="Stacking ensemble with cached out-of-fold scores")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--cv", type=int, default=N_FOLDS)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--cache-dir", default=STACKING_CACHE_DIR)
+    parser.add_argument("--compact-features", action="store_true")
+    parser.add_argument("--out", help="save the fitted engine (joblib)")
+    args = parser.parse_args(argv)
+
+    from absa.data_loader import load_semeval_xml
+    from absa.aspect_windows import build_apc_dataset_with_windows
+    from absa.features import build_vectorizer
+    from sklearn.model_selection import train_test_split
+
+    df = build_apc_dataset_with_windows(load_semeval_xml(args.data), window_size=WINDOW_SIZE)
+    df = df[df["polarity"] != "conflict"].reset_index(drop=True)
+    X_train_texts, X_test_texts, y_train, y_test = train_test_split(
+        df["window"].values, df["polarity"].values,
+        test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=df["polarity"].values,
+    )
+    vectorizer = build_vectorizer(compact=args.compact_features)
+    X_train = vectorizer.fit_transform(X_train_texts)
+    X_test = vectorizer.transform(X_test_texts)
+    print(f"Train {X_train.shape}, test {X_test.shape}")
+
+    engine, _ = benchmark(X_train, y_train, X_test, y_test, n_jobs=args.n_jobs, cv=args.cv,
+                          cache_dir=args.cache_dir)
+    if args.out:
+        engine.save(args.out)
+        print(f"Saved stacking engine to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
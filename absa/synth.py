@@ -0,0 +1,297 @@
+# absa/synth.py
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+# Allow running as script
+if __name__ == "__main__" and __package__ is None:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absa.config import DATA_PATH, ARABIC_PATH, RANDOM_STATE
+from absa.data_loader import load_semeval_xml
+from absa.jsonl_loader import iter_labeled_sentences
+
+POLARITIES = ("positive", "negative", "neutral", "conflict")
+BLOCK_SIZE = 10000
+_TOKEN_RE = re.compile(r"\S+")
+
+
+def _template(text, aspects):
+    """
+    Split a sentence around its aspect spans: (segments, n_slots) where
+    text == segments[0] + term_1 + segments[1] + ... + term_n + segments[n].
+    Spans whose offsets don't match the term (the XML loader strips text, so a
+    few SemEval offsets are shifted) are re-located with str.find or dropped.
+    """
+    spans = []
+    for a in aspects:
+        start, end, term = a["from"], a["to"], a["term"]
+        if text[start:end] != term:
+            start = text.find(term)
+            if start < 0:
+                continue
+            end = start + len(term)
+        spans.append((start, end))
+    spans.sort()
+    segments, last = [], 0
+    for start, end in spans:
+        if start < last:   # overlapping span
+            continue
+        segments.append(text[last:start])
+        last = end
+    segments.append(text[last:])
+    return tuple(segments)
+
+
+class CorpusSynthesizer:
+    """
+    Generate an arbitrarily large aspect corpus by recombining real data: each
+    synthetic sentence is a real sentence template (the text between its aspect
+    spans) with every aspect slot refilled by a real aspect term of the drawn
+    polarity. Offsets are computed while the text is assembled, so
+    text[from:to] == term always holds.
+
+    Arabic sentences (sentence-level labels only) become one-slot templates whose
+    slot is the sentence's longest token, refilled from Arabic tokens of the same label.
+
+    aspect_density: mean aspects per English sentence (Poisson); None keeps the
+                    empirical per-sentence distribution.
+    label_weights:  {polarity: weight}; None keeps the empirical label mix.
+    arabic_ratio:   fraction of generated sentences drawn from the Arabic templates.
+    The polarities are drawn independently of the template text, so the output is
+    for scale testing, not for measuring accuracy.
+    """
+
+    def __init__(self, parsed, arabic=(), aspect_density=None, label_weights=None,
+                 arabic_ratio=0.0, seed=RANDOM_STATE):
+        self.seed = seed
+        self.aspect_density = aspect_density
+        self.arabic_ratio = arabic_ratio if arabic else 0.0
+
+        buckets = {}
+        pools = {p: [] for p in POLARITIES}
+        for item in parsed:
+            segs = _template(item["text"], item["aspects"])
+            buckets.setdefault(len(segs) - 1, []).append(segs)
+            for a in item["aspects"]:
+                if a["polarity"] in pools and item["text"].find(a["term"]) >= 0:
+                    pools[a["polarity"]].append(a["term"])
+        self.buckets = buckets
+        self.pools = {p: terms for p, terms in pools.items() if terms}
+
+        keys = np.array(sorted(buckets))
+        self.bucket_keys = keys
+        self.bucket_probs = np.array([len(buckets[k]) for k in keys], dtype=float)
+        self.bucket_probs /= self.bucket_probs.sum()
+        # nearest available slot count for any requested count 0..max
+        want = np.arange(keys.max() + 1)
+        self._nearest = keys[np.abs(want[:, None] - keys[None, :]).argmin(axis=1)]
+
+        self.polarities = tuple(self.pools)
+        if label_weights is None:
+            counts = Counter({p: len(t) for p, t in self.pools.items()})
+        else:
+            unknown = set(label_weights) - set(self.polarities)
+            if unknown:
+                raise ValueError(f"No aspect terms with polarity {sorted(unknown)} in the source data")
+            counts = Counter(label_weights)
+        self.weights = np.array([counts.get(p, 0) for p in self.polarities], dtype=float)
+        if self.weights.sum() <= 0:
+            raise ValueError("label_weights must have a positive total")
+        self.weights /= self.weights.sum()
+
+        self.ar_templates = []
+        ar_pools = {}
+        for sentence, label in arabic:
+            toks = [m for m in _TOKEN_RE.finditer(sentence) if len(m.group()) >= 3]
+            if not toks:
+                continue
+            for m in toks:
+                ar_pools.setdefault(label, []).append(m.group())
+            m = max(toks, key=lambda m: len(m.group()))
+            self.ar_templates.append((sentence[:m.start()], sentence[m.end():], label))
+        self.ar_pools = ar_pools
+        self.ar_labels = tuple(ar_pools)
+        if self.ar_templates:
+            w = np.array([self.weights[self.polarities.index(l)] if l in self.polarities else 0.0
+                          for l in self.ar_labels])
+            # Arabic only has positive/negative; fall back to its own mix if the skew excludes both
+            if w.sum() <= 0:
+                w = np.array([len(ar_pools[l]) for l in self.ar_labels], dtype=float)
+            self.ar_weights = w / w.sum()
+        else:
+            self.arabic_ratio = 0.0
+
+    @classmethod
+    def from_files(cls, xml_path=DATA_PATH, arabic_path=ARABIC_PATH, **kwargs):
+        parsed = load_semeval_xml(xml_path)
+        arabic = list(iter_labeled_sentences(arabic_path)) if arabic_path and os.path.exists(arabic_path) else []
+        return cls(parsed, arabic, **kwargs)
+
+    def _draw_counts(self, rng, b):
+        if self.aspect_density is None:
+            return rng.choice(self.bucket_keys, size=b, p=self.bucket_probs)
+        k = np.minimum(rng.poisson(self.aspect_density, size=b), len(self._nearest) - 1)
+        return self._nearest[k]
+
+    def generate(self, n, block=BLOCK_SIZE, start_id=1):
+        """Yield n synthetic sentences in the load_semeval_xml() structure."""
+        rng = np.random.default_rng(self.seed)
+        pools = [self.pools[p] for p in self.polarities]
+        ar_pools = [self.ar_pools[l] for l in self.ar_labels]
+        sent_id = start_id
+        done = 0
+        while done < n:
+            b = min(block, n - done)
+            is_ar = rng.random(b) < self.arabic_ratio
+            k = self._draw_counts(rng, b)
+            k[is_ar] = 1
+            tpl_u = rng.random(b)
+            slot_start = np.concatenate([[0], np.cumsum(k)])
+            n_slots = int(slot_start[-1])
+            pol = rng.choice(len(pools), size=n_slots, p=self.weights)
+            term_u = rng.random(n_slots)
+            if is_ar.any():
+                ar_pol = rng.choice(len(ar_pools), size=b, p=self.ar_weights)
+
+            for i in range(b):
+                s = slot_start[i]
+                if is_ar[i]:
+                    left, right, _ = self.ar_templates[int(tpl_u[i] * len(self.ar_templates))]
+                    pool = ar_pools[ar_pol[i]]
+                    term = pool[int(term_u[s] * len(pool))]
+                    text = left + term + right
+                    aspects = [{"term": term, "polarity": self.ar_labels[ar_pol[i]],
+                                "from": len(left), "to": len(left) + len(term)}]
+                else:
+                    bucket = self.buckets[int(k[i])]
+                    segs = bucket[int(tpl_u[i] * len(bucket))]
+                    parts = [segs[0]]
+                    pos = len(segs[0])
+                    aspects = []
+                    for j in range(1, len(segs)):
+                        p = pol[s + j - 1]
+                        pool = pools[p]
+                        term = pool[int(term_u[s + j - 1] * len(pool))]
+                        aspects.append({"term": term, "polarity": self.polarities[p],
+                                        "from": pos, "to": pos + len(term)})
+                        parts.append(term)
+                        parts.append(segs[j])
+                        pos += len(term) + len(segs[j])
+                    text = "".join(parts)
+                yield {"id": str(sent_id), "text": text, "aspects": aspects}
+                sent_id += 1
+            done += b
+
+
+# ---------- writers (streaming) ----------
+
+def _xml_sentence(item):
+    out = [f'  <sentence id={quoteattr(str(item["id"]))}>\n    <text>{escape(item["text"])}</text>\n']
+    if item["aspects"]:
+        out.append("    <aspectTerms>\n")
+        for a in item["aspects"]:
+            out.append(f'      <aspectTerm term={quoteattr(a["term"])} polarity={quoteattr(a["polarity"])} '
+                       f'from="{a["from"]}" to="{a["to"]}"/>\n')
+        out.append("    </aspectTerms>\n")
+    out.append("  </sentence>\n")
+    return "".join(out)
+
+
+def _jsonl_sentence(item):
+    return json.dumps({"id": item["id"], "sentence": item["text"], "aspect_terms": item["aspects"]},
+                      ensure_ascii=False) + "\n"
+
+
+def write_corpus(items, xml_path=None, jsonl_path=None, progress_every=0):
+    """
+    Stream items to SemEval XML and/or aspect JSONL in a single pass
+    (either path may be None). Returns the number of sentences written.
+    """
+    xml_f = open(xml_path, "w", encoding="utf-8") if xml_path else None
+    jsonl_f = open(jsonl_path, "w", encoding="utf-8") if jsonl_path else None
+    n = 0
+    t0 = time.perf_counter()
+    try:
+        if xml_f:
+            xml_f.write('<?xml version="1.0" encoding="utf-8"?>\n<sentences>\n')
+        for item in items:
+            if xml_f:
+                xml_f.write(_xml_sentence(item))
+            if jsonl_f:
+                jsonl_f.write(_jsonl_sentence(item))
+            n += 1
+            if progress_every and n % progress_every == 0:
+                print(f"{n:,} sentences ({n / (time.perf_counter() - t0):,.0f}/s)")
+        if xml_f:
+            xml_f.write("</sentences>\n")
+    finally:
+        if xml_f:
+            xml_f.close()
+        if jsonl_f:
+            jsonl_f.close()
+    return n
+
+
+def write_semeval_xml(items, path):
+    return write_corpus(items, xml_path=path)
+
+
+def write_aspect_jsonl(items, path):
+    return write_corpus(items, jsonl_path=path)
+
+
+def _parse_weights(spec):
+    """'positive=0.6,negative=0.3,neutral=0.1' -> dict"""
+    if not spec:
+        return None
+    weights = {}
+    for part in spec.split(","):
+        label, _, w = part.partition("=")
+        weights[label.strip()] = float(w)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a large synthetic SemEval-XML / aspect-JSONL corpus.")
+    parser.add_argument("-n", "--sentences", type=int, default=1_000_000)
+    parser.add_argument("--xml-out", help="SemEval XML output path")
+    parser.add_argument("--jsonl-out", help="aspect JSONL output path (load_jsonl_aspects format)")
+    parser.add_argument("--data", default=DATA_PATH, help="source SemEval XML")
+    parser.add_argument("--arabic", default=ARABIC_PATH, help="source Arabic sentence JSONL ('' to skip)")
+    parser.add_argument("--arabic-ratio", type=float, default=0.0)
+    parser.add_argument("--density", type=float, default=None,
+                        help="mean aspects per sentence (default: same distribution as the source)")
+    parser.add_argument("--labels", default=None,
+                        help="label skew, e.g. positive=0.7,negative=0.2,neutral=0.1 (default: source mix)")
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    args = parser.parse_args(argv)
+    if not args.xml_out and not args.jsonl_out:
+        parser.error("give --xml-out and/or --jsonl-out")
+
+    synth = CorpusSynthesizer.from_files(
+        args.data, args.arabic,
+        aspect_density=args.density,
+        label_weights=_parse_weights(args.labels),
+        arabic_ratio=args.arabic_ratio,
+        seed=args.seed,
+    )
+    print(f"Templates: {sum(len(b) for b in synth.buckets.values())} English, {len(synth.ar_templates)} Arabic; "
+          f"terms: {', '.join(f'{p}={len(t)}' for p, t in synth.pools.items())}")
+    t0 = time.perf_counter()
+    n = write_corpus(synth.generate(args.sentences), args.xml_out, args.jsonl_out,
+                     progress_every=max(args.sentences // 10, BLOCK_SIZE))
+    elapsed = time.perf_counter() - t0
+    print(f"Wrote {n:,} sentences in {elapsed:.1f}s ({n / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# absa/term_eval.py
+
+import json
+
+import numpy as np
+from lxml import etree
+
+POLARITIES = ("positive", "neutral", "negative", "conflict")
+_POL_INDEX = {p: i for i, p in enumerate(POLARITIES)}
+_OTHER = len(POLARITIES)   # bucket for unexpected polarity strings
+_FLUSH_EVERY = 65536
+
+
+def normalize_term(t):
+    return t.lower().strip()
+
+
+def iter_gold_xml(xml_path):
+    """
+    Stream SemEval XML with iterparse, yielding (position, sentence_id, text, {(term, polarity), ...}).
+    Sentences with empty text are skipped, like sentence_extraction.py does, so
+    position is the 1-based line of sentences.txt, i.e. the id label.py assigns.
+    """
+    pos = 0
+    for _, s in etree.iterparse(xml_path, events=("end",), tag="sentence"):
+        text_node = s.find("text")
+        text = text_node.text.strip() if text_node is not None and text_node.text else ""
+        if not text:
+            s.clear()
+            continue
+        pos += 1
+        terms = set()
+        aspect_node = s.find("aspectTerms")
+        if aspect_node is not None:
+            for term in aspect_node.findall("aspectTerm"):
+                terms.add((normalize_term(term.get("term")), term.get("polarity").strip()))
+        yield pos, s.get("id"), text, terms
+        s.clear()
+        while s.getprevious() is not None:
+            del s.getparent()[0]
+
+
+def build_gold_index(xml_path, key="index"):
+    """
+    Hash index over gold sentences: join_key -> (position, text, frozenset of (term, polarity)).
+    key: "index" (1-based position), "id" (XML sentence id) or "text" (normalized sentence).
+    """
+    index = {}
+    for pos, sent_id, text, terms in iter_gold_xml(xml_path):
+        k = _gold_key(key, pos, sent_id, text)
+        index[k] = (pos, text, frozenset(terms))
+    return index
+
+
+def _gold_key(key, pos, sent_id, text):
+    if key == "index":
+        return str(pos)
+    if key == "id":
+        return str(sent_id)
+    return " ".join(text.lower().split())
+
+
+def _pred_key(key, entry):
+    if key == "text":
+        return " ".join(entry.get("sentence", "").lower().split())
+    return str(entry.get("id"))
+
+
+def iter_predictions(pred_path):
+    """Stream prediction JSONL; malformed lines are skipped."""
+    with open(pred_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class TermEvaluator:
+    """
+    Term+polarity scoring joined on sentence id. Predictions are streamed, so memory is
+    the gold index + a seen-id set bounded by the gold size + at most show_max mismatches.
+    TP/FP/FN are kept per polarity as polarity-index buffers folded into numpy counters
+    with np.bincount.
+    """
+
+    def __init__(self, gold_index, show_max=50):
+        self.gold = gold_index
+        self.show_max = show_max
+        self.counts = np.zeros((3, len(POLARITIES) + 1), dtype=np.int64)   # rows: tp, fp, fn
+        self._buf = ([], [], [])
+        self.seen = set()
+        self.mismatches = []
+        self.n_mismatches = 0
+        self.n_pred = 0
+        self.unmatched = 0     # prediction ids with no gold sentence
+        self.duplicates = 0    # repeated prediction ids (first one wins)
+
+    def _flush(self):
+        for row, buf in enumerate(self._buf):
+            if buf:
+                self.counts[row] += np.bincount(buf, minlength=self.counts.shape[1])
+                buf.clear()
+
+    def _score(self, pos, text, gold_set, pred_set):
+        tp, fp, fn = self._buf
+        pol = _POL_INDEX.get
+        tp.extend(pol(p, _OTHER) for _, p in gold_set & pred_set)
+        missing = gold_set - pred_set
+        extra = pred_set - gold_set
+        fp.extend(pol(p, _OTHER) for _, p in extra)
+        fn.extend(pol(p, _OTHER) for _, p in missing)
+        if missing or extra:
+            self.n_mismatches += 1
+            if len(self.mismatches) < self.show_max:
+                self.mismatches.append({
+                    "index": pos,
+                    "sentence": text,
+                    "gold": sorted(gold_set),
+                    "pred": sorted(pred_set),
+                    "missing": sorted(missing),
+                    "extra": sorted(extra),
+                })
+        if len(tp) + len(fp) + len(fn) >= _FLUSH_EVERY:
+            self._flush()
+
+    def consume(self, predictions, key="index"):
+        for entry in predictions:
+            self.n_pred += 1
+            k = _pred_key(key, entry)
+            gold = self.gold.get(k)
+            if gold is None:
+                self.unmatched += 1
+                continue
+            if k in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(k)
+            pos, text, gold_set = gold
+            pred_set = {(normalize_term(p["term"]), p["polarity"]) for p in entry.get("aspect_terms", [])}
+            self._score(pos, text, gold_set, pred_set)
+        return self
+
+    def finish(self, missing_as_fn=False):
+        """
+        By default only sentences that have a prediction are scored (label.py
+        labels a prefix of the corpus); the rest are counted in n_missing. With
+        missing_as_fn=True their gold terms count as false negatives instead
+        (e.g. to charge a run for LLM batches it skipped).
+        """
+        self.n_missing = 0
+        for k in self.gold.keys() - self.seen:
+            self.n_missing += 1
+            if missing_as_fn:
+                pos, text, gold_set = self.gold[k]
+                self._score(pos, text, gold_set, frozenset())
+        self._flush()
+        self.mismatches.sort(key=lambda m: m["index"])
+        return self.metrics()
+
+    def metrics(self):
+        tp, fp, fn = self.counts[:, :len(POLARITIES)].astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+            r = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+            f1 = np.where(p + r > 0, 2 * p * r / (p + r), 0.0)
+        TP, FP, FN = self.counts.sum(axis=1)
+        micro_p = TP / (TP + FP) if TP + FP else 0.0
+        micro_r = TP / (TP + FN) if TP + FN else 0.0
+        micro_f1 = 2 * micro_p * micro_r / (micro_p + micro_r) if micro_p + micro_r else 0.0
+        support = tp + fn
+        present = support > 0
+        return {
+            "tp": int(TP), "fp": int(FP), "fn": int(FN),
+            "micro": {"precision": micro_p, "recall": micro_r, "f1": micro_f1},
+            "macro": {
+                "precision": float(p[present].mean()) if present.any() else 0.0,
+                "recall": float(r[present].mean()) if present.any() else 0.0,
+                "f1": float(f1[present].mean()) if present.any() else 0.0,
+            },
+            "per_polarity": {
+                pol: {"precision": float(p[i]), "recall": float(r[i]), "f1": float(f1[i]),
+                      "support": int(support[i])}
+                for i, pol in enumerate(POLARITIES)
+            },
+        }
@@ -0,0 +1,100 @@
+# absa/testing.py
+
+import json
+import time
+import random
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .llm import _approx_tokens
+
+
+class MockLLMServer:
+    """
+    Local OpenAI-compatible server for tests and offline runs (HTTP/1.1 keep-alive).
+    reply(messages) -> content; fail_rate of requests get fail_status instead
+    (with a Retry-After header if retry_after is set); garbage=True answers 200
+    with a body that is not JSON; latency seconds per request. Counts
+    connections and requests.
+
+        with MockLLMServer(fail_rate=0.5) as a, MockLLMServer() as b:
+            client = LLMClient([Provider("a", a.base_url, "m"), Provider("b", b.base_url, "m")])
+    """
+
+    def __init__(self, reply=None, fail_rate=0.0, fail_status=503, latency=0.0, seed=0,
+                 retry_after=None, garbage=False):
+        self.reply = reply or (lambda messages: "ok")
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.garbage = garbage
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "failed": 0}
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # headers and body go out in separate writes; without this, Nagle +
+                # delayed ACK add ~40ms to every request on a kept-alive connection
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with mock.lock:
+                    mock.stats["connections"] += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if mock.latency:
+                    time.sleep(mock.latency)
+                with mock.lock:
+                    mock.stats["requests"] += 1
+                    fail = mock.rng.random() < mock.fail_rate
+                    mock.stats["failed"] += fail
+                if fail:
+                    status, out = mock.fail_status, {"error": {"message": "mock failure"}}
+                else:
+                    content = mock.reply(req["messages"])
+                    status, out = 200, {
+                        "model": req.get("model"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": _approx_tokens(req["messages"]),
+                                  "completion_tokens": len(content) // 4 + 1},
+                    }
+                body = json.dumps(out).encode("utf-8")
+                if mock.garbage and not fail:
+                    body = b"<html>502 Bad Gateway</html>"
+                self.send_response(status)
+                if fail and mock.retry_after is not None:
+                    self.send_header("Retry-After", str(mock.retry_after))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -2,36 +2,71 @@
 
 import os
 import sys
-import numpy as np
-import pandas as pd
-from jsonl_loader import load_jsonl_aspects
-
-from sklearn.model_selection import train_test_split
+import argparse
 
 # Allow running as script
 if __name__ == "__main__" and __package__ is None:
     # Add parent dir to path if running directly: python -m absa.train
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from absa.config import AMAZON_PATH,DATA_PATH, RANDOM_STATE, TEST_SIZE, WINDOW_SIZE
-from absa.data_loader import load_semeval_xml
-from absa.aspect_windows import build_apc_dataset_with_windows
-from absa.features import build_vectorizer
-from absa.models import get_base_models, get_ensemble
-from absa.evaluate import evaluate_model, summarize_results
-from absa.fasttext_model import load_fasttext_model, build_fasttext_matrix, train_fasttext_svm
-
+from absa.config import AMAZON_PATH,DATA_PATH, RANDOM_STATE, TEST_SIZE, WINDOW_SIZE, STACKING_CACHE_DIR, \
+    SPACY_CACHE_PATH
+from absa.profiling import add_profile_args, report_from_args
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and compare the English aspect polarity models.")
+    parser.add_argument("--data", default=DATA_PATH, help="SemEval XML (e.g. a corpus from absa.synth)")
+    parser.add_argument("--jsonl", default=AMAZON_PATH, help="aspect JSONL merged with the XML")
+    parser.add_argument("--compact-features", action="store_true",
+                        help="float32 TF-IDF with a per-row cap on char n-grams")
+    parser.add_argument("--spill", metavar="DIR",
+                        help="write the transformed TF-IDF matrices to memory-mapped CSR files in DIR")
+    parser.add_argument("--spacy", action="store_true",
+                        help="clean with spaCy lemmas / stop-word removal instead of the regex cleaner")
+    parser.add_argument("--spacy-procs", type=int, default=1, help="nlp.pipe worker processes for --spacy")
+    add_profile_args(parser, default_report="train_report.json")
+    args = parser.parse_args(argv)
+
+    # sklearn / pandas / lxml load here, after argument parsing, so --help stays instant
+    from sklearn.model_selection import train_test_split
+    from absa.data_loader import load_semeval_xml
+    from absa.jsonl_loader import load_jsonl_aspects
+    from absa.aspect_windows import apc_raw_texts, build_apc_dataset_with_windows
+    from absa.preprocess import clean_text
+    from absa.features import build_vectorizer, transform_to_memmap
+    from absa.models import get_base_models, get_ensemble, get_stacking_models
+    from absa.stacking import StackingEngine
+    from absa.calibration import CalibratedVotingEnsemble
+    from absa.evaluate import evaluate_model, summarize_results
+    from absa.significance import compare_models
+    from absa.fasttext_model import load_fasttext_model, build_fasttext_matrix, train_fasttext_svm
+
+    report = report_from_args("train", args)
 
-def main():
     # ============================
     # 1. Load and build dataset
     # ============================
-    print(f"Loading XML data from: {DATA_PATH}")
-    parsed_xml = load_semeval_xml(DATA_PATH)
-    parsed_jsonl = load_jsonl_aspects(AMAZON_PATH)
+    print(f"Loading XML data from: {args.data}")
+    with report.stage("load_xml") as rec:
+        parsed_xml = load_semeval_xml(args.data)
+        rec["items"] = len(parsed_xml)
+    with report.stage("load_jsonl") as rec:
+        parsed_jsonl = load_jsonl_aspects(args.jsonl)
+        rec["items"] = len(parsed_jsonl)
     parsed = parsed_jsonl + parsed_xml
 
-    df = build_apc_dataset_with_windows(parsed, window_size=WINDOW_SIZE)
+    clean_fn = clean_text
+    if args.spacy:
+        from absa.spacy_preprocess import SpacyPreprocessor
+        clean_fn = SpacyPreprocessor(n_process=args.spacy_procs, cache_path=SPACY_CACHE_PATH)
+        with report.stage("spacy_preprocess") as rec:
+            clean_fn.process(apc_raw_texts(parsed, WINDOW_SIZE))
+            rec.update(clean_fn.stats, items=clean_fn.stats["texts"])
+        print(f"spaCy preprocessing: {clean_fn.stats}")
+
+    with report.stage("build_windows", items=len(parsed)):
+        df = build_apc_dataset_with_windows(parsed, window_size=WINDOW_SIZE, clean_fn=clean_fn)
     df = df[df["polarity"]!="conflict"].reset_index(drop=True)
     # Optionally: drop 'conflict' if it’s too rare and hurting training
     # df = df[df["polarity"] != "conflict"].reset_index(drop=True)
@@ -45,60 +80,93 @@ def main():
     labels = df["polarity"].values
 
     # Stratified split for fair evaluation
-    X_train_texts, X_test_texts, y_train, y_test = train_test_split(
-        texts,
-        labels,
-        test_size=TEST_SIZE,
-        random_state=RANDOM_STATE,
-        stratify=labels
-    )
-    X_train_raw, X_test_raw, _, _ = train_test_split(
-        texts_raw, labels,
-        test_size=TEST_SIZE,
-        random_state=RANDOM_STATE,
-        stratify=labels
-    )
+    with report.stage("split", items=len(labels)):
+        X_train_texts, X_test_texts, y_train, y_test = train_test_split(
+            texts,
+            labels,
+            test_size=TEST_SIZE,
+            random_state=RANDOM_STATE,
+            stratify=labels
+        )
+        X_train_raw, X_test_raw, _, _ = train_test_split(
+            texts_raw, labels,
+            test_size=TEST_SIZE,
+            random_state=RANDOM_STATE,
+            stratify=labels
+        )
     # ====================================
     # 2. Classical ML: TF-IDF (word+char)
     # ====================================
     print("\nBuilding TF-IDF (word + char) vectorizer...")
-    vectorizer = build_vectorizer()
+    vectorizer = build_vectorizer(compact=args.compact_features)
 
     print("Fitting TF-IDF on training data...")
-    X_train_vec = vectorizer.fit_transform(X_train_texts)
-    X_test_vec = vectorizer.transform(X_test_texts)
+    if args.spill:
+        with report.stage("tfidf_fit", items=len(X_train_texts)):
+            vectorizer.fit(X_train_texts)
+        with report.stage("tfidf_transform", items=len(X_train_texts) + len(X_test_texts)):
+            X_train_vec = transform_to_memmap(vectorizer, X_train_texts, os.path.join(args.spill, "train"))
+            X_test_vec = transform_to_memmap(vectorizer, X_test_texts, os.path.join(args.spill, "test"))
+        print(f"TF-IDF matrices spilled to {args.spill}")
+    else:
+        with report.stage("tfidf_fit", items=len(X_train_texts)):
+            X_train_vec = vectorizer.fit_transform(X_train_texts)
+        with report.stage("tfidf_transform", items=len(X_test_texts)):
+            X_test_vec = vectorizer.transform(X_test_texts)
 
     # 2.1 Train individual models
     base_models = get_base_models()
     results = []
 
     for name, model in base_models.items():
-        res = evaluate_model(name, model, X_train_vec, y_train, X_test_vec, y_test)
+        with report.stage(f"model:{name}", items=len(y_train)):
+            res = evaluate_model(name, model, X_train_vec, y_train, X_test_vec, y_test)
         results.append(res)
 
     # 2.2 Train ensemble
     ensemble = get_ensemble(base_models)
-    res_ens = evaluate_model("ensemble", ensemble, X_train_vec, y_train, X_test_vec, y_test)
+    with report.stage("model:ensemble", items=len(y_train)):
+        res_ens = evaluate_model("ensemble", ensemble, X_train_vec, y_train, X_test_vec, y_test)
     results.append(res_ens)
 
+    # 2.3 Stacking (SVM, LogReg, SGD, Ridge); OOF scores cached across runs
+    stacking = StackingEngine(get_stacking_models(), cache_dir=STACKING_CACHE_DIR)
+    with report.stage("model:stacking", items=len(y_train)):
+        res_stack = evaluate_model("stacking", stacking, X_train_vec, y_train, X_test_vec, y_test)
+    results.append(res_stack)
+
+    # 2.4 Calibrated soft voting over the same learners (reuses the cached OOF scores)
+    soft = CalibratedVotingEnsemble(get_stacking_models(), cache_dir=STACKING_CACHE_DIR)
+    with report.stage("model:soft_voting", items=len(y_train)):
+        res_soft = evaluate_model("soft_voting", soft, X_train_vec, y_train, X_test_vec, y_test)
+    results.append(res_soft)
+
     summary_df = summarize_results(results)
+    with report.stage("significance", items=len(y_test)):
+        compare_models(y_test, {r["model"]: r["y_pred"] for r in results})
 
     # ====================================
     # 3. FastText + SVM comparison
     # ====================================
     print("\nLoading FastText model...")
-    ft_model = load_fasttext_model()
+    with report.stage("fasttext_load"):
+        ft_model = load_fasttext_model()
 
     print("Building FastText sentence vectors for train and test...")
-    X_train_ft = build_fasttext_matrix(X_train_raw, ft_model)
-    X_test_ft = build_fasttext_matrix(X_test_raw, ft_model)
+    with report.stage("fasttext_vectors", items=len(X_train_raw) + len(X_test_raw)):
+        X_train_ft = build_fasttext_matrix(X_train_raw, ft_model)
+        X_test_ft = build_fasttext_matrix(X_test_raw, ft_model)
 
-    ft_clf, ft_acc = train_fasttext_svm(X_train_ft, y_train, X_test_ft, y_test)
+    with report.stage("model:fasttext_svm", items=len(y_train)):
+        ft_clf, ft_acc = train_fasttext_svm(X_train_ft, y_train, X_test_ft, y_test)
 
     print("\n=== FINAL COMPARISON ===")
     print(summary_df.sort_values("accuracy", ascending=False))
     print(f"\nFastText + SVM accuracy: {ft_acc:.4f}")
 
+    if args.profile is not None:
+        report.write_json(args.report)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,190 @@
+# absa/translate.py
+
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .arabic import normalize_arabic
+from .router import EN, DIALECT
+from .llm import get_client
+from .prompts import format_batch, parse_batch
+from .config import TRANSLATION_CACHE_PATH, TRANSLATE_BATCH_SIZE, TRANSLATE_CONCURRENCY, ROUTER_CONFIDENCE
+
+SYSTEM_PROMPT = """
+You translate Arabic dialect text (Gulf, Egyptian, Levantine, ...) into Modern Standard Arabic.
+Keep the meaning and the sentiment exactly. Do not add or drop product features.
+You receive numbered lines "<n>: <text>". Answer with the same numbers, one line each:
+<n>: <MSA translation>
+"""
+
+
+def cache_key(text: str) -> str:
+    """Key on the normalized text so spelling/diacritic variants share one entry."""
+    return hashlib.sha1(normalize_arabic(text).encode("utf-8")).hexdigest()
+
+
+class KeyValueCache:
+    """
+    Persistent key -> text store (SQLite, one table).
+    Safe to share between the worker threads of one client.
+    """
+
+    def __init__(self, path: str, table: str, value: str = "value"):
+        self.path = path
+        self.table = table
+        self.value = value
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, {value} TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                q = f"SELECT key, {self.value} FROM {self.table} WHERE key IN (%s)" % ",".join("?" * len(part))
+                found.update(self._conn.execute(q, part).fetchall())
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.value}) VALUES (?, ?)", list(items)
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class TranslationCache(KeyValueCache):
+    """Normalized Arabic key -> MSA translation."""
+
+    def __init__(self, path: str = TRANSLATION_CACHE_PATH):
+        super().__init__(path, table="translations", value="msa")
+
+
+class Translator:
+    """
+    Dialect -> MSA stage with a persistent cache and batched, concurrency-limited
+    requests.
+
+    translate(texts, labels, confidence) only sends texts that the router
+    labelled as dialect, or Arabic texts it was unsure about; English and
+    confident-MSA texts pass through untouched. Everything already in the
+    cache is served without network access; offline=True never calls out.
+    """
+
+    def __init__(self, endpoint=None, cache=None, batch_size: int = TRANSLATE_BATCH_SIZE,
+                 max_concurrency: int = TRANSLATE_CONCURRENCY,
+                 confidence_threshold: float = ROUTER_CONFIDENCE, offline: bool = False):
+        # Qwen first for dialect text, failing over to the other configured providers
+        self.endpoint = endpoint if endpoint is not None else get_client(("qwen", "openai"))
+        self.cache = cache if cache is not None else TranslationCache()
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.confidence_threshold = confidence_threshold
+        self.offline = offline
+        self.stats = {
+            "texts": 0,
+            "skipped": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "requests": 0,
+            "failed_requests": 0,
+            "added_latency_sec": 0.0,
+        }
+
+    def needs_translation(self, label, confidence) -> bool:
+        if label == EN:
+            return False
+        if label == DIALECT:
+            return True
+        return confidence < self.confidence_threshold
+
+    def _request(self, texts):
+        try:
+            content = self.endpoint.complete(SYSTEM_PROMPT, format_batch(texts))
+            return parse_batch(content, len(texts))
+        except Exception as e:
+            print(f"⚠ Translation request failed ({len(texts)} texts): {e}")
+            return None
+
+    def translate(self, texts, labels=None, confidence=None):
+        """
+        texts: list of raw texts.
+        labels/confidence: router output aligned with texts (LanguageRouter.predict_with_confidence);
+        if omitted every text is treated as dialect.
+        Returns a list aligned with texts: MSA translation, or the original text
+        when it was skipped or could not be translated.
+        """
+        start = time.perf_counter()
+        texts = list(texts)
+        n = len(texts)
+        if labels is None:
+            labels = [DIALECT] * n
+        if confidence is None:
+            confidence = [0.0] * n
+
+        out = list(texts)
+        todo = [i for i in range(n) if self.needs_translation(labels[i], confidence[i])]
+        self.stats["texts"] += n
+        self.stats["skipped"] += n - len(todo)
+
+        keys = {i: cache_key(texts[i]) for i in todo}
+        cached = self.cache.get_many(keys.values())
+
+        pending = {}   # key -> first raw text seen for it
+        for i in todo:
+            k = keys[i]
+            if k in cached:
+                out[i] = cached[k]
+                self.stats["cache_hits"] += 1
+            else:
+                pending.setdefault(k, texts[i])
+                self.stats["cache_misses"] += 1
+
+        if pending and not self.offline:
+            pending_keys = list(pending)
+            batches = [pending_keys[j:j + self.batch_size]
+                       for j in range(0, len(pending_keys), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                results = pool.map(lambda b: self._request([pending[k] for k in b]), batches)
+                new = []
+                for batch_keys, translated in zip(batches, results):
+                    self.stats["requests"] += 1
+                    if translated is None:
+                        self.stats["failed_requests"] += 1
+                        continue
+                    new.extend((k, t) for k, t in zip(batch_keys, translated) if t)
+            if new:
+                self.cache.put_many(new)
+                cached.update(new)
+                for i in todo:
+                    if keys[i] in cached:
+                        out[i] = cached[keys[i]]
+
+        self.stats["added_latency_sec"] += time.perf_counter() - start
+        return out
+
+    def hit_rate(self) -> float:
+        looked_up = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return self.stats["cache_hits"] / looked_up if looked_up else 0.0
+
+    def report(self):
+        s = self.stats
+        print(f"Translation: {s['texts']} texts, {s['skipped']} skipped by router, "
+              f"cache hit rate {self.hit_rate():.1%}, {s['requests']} requests "
+              f"({s['failed_requests']} failed), added latency {s['added_latency_sec']:.2f}s")
+        return dict(s, hit_rate=self.hit_rate())
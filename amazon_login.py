@@ -1,89 +1,35 @@
-import os
 import time
-import pickle
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
+import session_manager
+from session_manager import BrowserPool, CookieJar, COOKIES_FILE
 
-COOKIES_FILE = "amazon_cookies.pkl"
 
-
-# -------------------------------
-#  Launch Selenium Browser
-# -------------------------------
-def launch_browser():
-    options = webdriver.ChromeOptions()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("user-agent=Mozilla/5.0")
-    # options.add_argument("--headless")  # optional
-
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
-
-    driver.implicitly_wait(5)
-    return driver
+# One warm browser for the whole run; cookies are validated from their expiry
+# stamps and the login flow only re-runs when they have actually expired.
+POOL = BrowserPool(size=1, jar=CookieJar(COOKIES_FILE))
 
 
 # -------------------------------
 #  Manual Login + Save Cookies
 # -------------------------------
 def login_and_save_cookies():
-    driver = launch_browser()
-
-    print("🔐 Opening Amazon login page — please login manually.")
-    driver.get("https://www.amazon.ae/ap/signin")
-
-    input("👉 After fully logged in, press ENTER to save cookies...")
-
-    cookies = driver.get_cookies()
-    pickle.dump(cookies, open(COOKIES_FILE, "wb"))
-    print("✔ Cookies saved to amazon_cookies.pkl")
-
-    driver.quit()
-
-
-# -------------------------------
-#  Load Cookies Into Driver
-# -------------------------------
-def load_cookies(driver):
-    cookies = pickle.load(open(COOKIES_FILE, "rb"))
-
-    driver.get("https://www.amazon.ae/")
-    time.sleep(2)
-
-    for cookie in cookies:
-        cookie.pop("sameSite", None)  # fix selenium edge-case
-        try:
-            driver.add_cookie(cookie)
-        except:
-            pass
-
-    driver.get("https://www.amazon.ae/")
-    time.sleep(2)
-    print("✔ Cookies loaded — session restored.")
+    session_manager.login_and_save_cookies(POOL.jar)
 
 
 # -------------------------------
 #  Scrape ALL Review Pages
 # -------------------------------
-def get_all_reviews(asin, max_pages=50):
-    if not os.path.exists(COOKIES_FILE):
-        print("❌ No cookies found — starting login flow.")
-        login_and_save_cookies()
-
-    driver = launch_browser()
-    load_cookies(driver)
+def get_all_reviews(asin, max_pages=50, pool=POOL):
+    with pool.session(f"reviews {asin}") as driver:
+        url = f"{pool.base_url}/product-reviews/{asin}/?sortBy=recent&reviewerType=all_reviews"
+        pool.first_page(driver, url)
+        time.sleep(2)
+        return _scrape_review_pages(driver, max_pages)
 
-    url = f"https://www.amazon.ae/product-reviews/{asin}/?sortBy=recent&reviewerType=all_reviews"
-    driver.get(url)
-    time.sleep(2)
 
+def _scrape_review_pages(driver, max_pages):
     all_reviews = []
     page = 1
 
@@ -115,7 +61,6 @@ def get_all_reviews(asin, max_pages=50):
             print("✔ Reached last page.")
             break
 
-    driver.quit()
     return all_reviews
 
 
@@ -125,7 +70,10 @@ def get_all_reviews(asin, max_pages=50):
 if __name__ == "__main__":
     asin = "B0DPQW3VH6"  # your test ASIN
 
-    reviews = get_all_reviews(asin)
+    try:
+        reviews = get_all_reviews(asin)
+    finally:
+        POOL.close()
 
     print("\n============================")
     print("TOTAL REVIEWS SCRAPED:", len(reviews))
@@ -1,5 +1,7 @@
-import json
-import xml.etree.ElementTree as ET
+import argparse
+
+from absa.term_eval import build_gold_index, iter_predictions, TermEvaluator, POLARITIES
+from absa.profiling import add_profile_args, report_from_args
 
 # ======================================
 # CONFIG
@@ -7,112 +9,66 @@ import xml.etree.ElementTree as ET
 XML_FILE = "Laptop_Train_v2.xml"
 PRED_FILE = "aspect_results.jsonl"
 SHOW_MAX = 50   # max number of mismatches to print
+# How predictions are joined to gold sentences:
+#   "index" — prediction "id" is the 1-based line of sentences.txt (what label.py writes;
+#             empty-text XML sentences have no line and are skipped)
+#   "id"    — prediction "id" is the XML sentence id
+#   "text"  — match on the normalized sentence text
+JOIN_KEY = "index"
 # ======================================
 
 
-def load_gold_aspects_by_index(xml_path):
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    gold_list = []
-    texts = []  # also store original sentence text for debugging
-
-    for s in root.findall("sentence"):
-        text_node = s.find("text")
-        text_value = text_node.text.strip() if text_node is not None else ""
-
-        aspect_terms = []
-        aspect_node = s.find("aspectTerms")
-
-        if aspect_node is not None:
-            for term in aspect_node.findall("aspectTerm"):
-                aspect_terms.append({
-                    "term": term.get("term").strip(),
-                    "polarity": term.get("polarity").strip()
-                })
-
-        texts.append(text_value)
-        gold_list.append(aspect_terms)
-
-    return gold_list, texts
-
-
-def load_pred_aspects_by_index(pred_path):
-    preds = []
-    with open(pred_path, "r", encoding="utf-8") as f:
-        for line in f:
-            entry = json.loads(line)
-            preds.append(entry.get("aspect_terms", []))
-    return preds
-
-
-def normalize_term(t):
-    return t.lower().strip()
-
-
-def evaluate_and_collect_errors(gold_list, pred_list, texts):
-    tp = fp = fn = 0
-    mismatches = []
-
-    n = min(len(gold_list), len(pred_list))
-
-    for i in range(n):
-        gold_terms = gold_list[i]
-        pred_terms = pred_list[i]
-
-        gold_set = {(normalize_term(g["term"]), g["polarity"]) for g in gold_terms}
-        pred_set = {(normalize_term(p["term"]), p["polarity"]) for p in pred_terms}
-
-        # Score
-        tp += len(gold_set & pred_set)
-        fp += len(pred_set - gold_set)
-        fn += len(gold_set - pred_set)
-
-        if gold_set != pred_set:
-            mismatches.append({
-                "index": i + 1,
-                "sentence": texts[i],
-                "gold": list(gold_set),
-                "pred": list(pred_set),
-                "missing": list(gold_set - pred_set),
-                "extra": list(pred_set - gold_set)
-            })
-
-    precision = tp / (tp + fp + 1e-9)
-    recall = tp / (tp + fn + 1e-9)
-    f1 = 2 * precision * recall / (precision + recall + 1e-9)
-
-    return precision, recall, f1, tp, fp, fn, mismatches
-
-
-def main():
-    gold_list, texts = load_gold_aspects_by_index(XML_FILE)
-    pred_list = load_pred_aspects_by_index(PRED_FILE)
-
-    precision, recall, f1, tp, fp, fn, mismatches = evaluate_and_collect_errors(gold_list, pred_list, texts)
-
-    print("\n===== ABSA Evaluation (Term + Polarity, index-aligned) =====")
-    print(f"True Positives:  {tp}")
-    print(f"False Positives: {fp}")
-    print(f"False Negatives: {fn}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score aspect_results.jsonl against the gold XML.")
+    parser.add_argument("--missing-as-fn", action="store_true",
+                        help="count the gold terms of sentences without a prediction as false negatives")
+    add_profile_args(parser, default_report="eval_report.json")
+    args = parser.parse_args(argv)
+    report = report_from_args("eval", args)
+
+    with report.stage("load_gold") as rec:
+        gold_index = build_gold_index(XML_FILE, key=JOIN_KEY)
+        rec["items"] = len(gold_index)
+    evaluator = TermEvaluator(gold_index, show_max=SHOW_MAX)
+    with report.stage("score") as rec:
+        evaluator.consume(iter_predictions(PRED_FILE), key=JOIN_KEY)
+        m = evaluator.finish(missing_as_fn=args.missing_as_fn)
+        rec["items"] = evaluator.n_pred
+
+    print(f"\n===== ABSA Evaluation (Term + Polarity, joined on {JOIN_KEY}) =====")
+    print(f"Predictions read: {evaluator.n_pred}  "
+          f"(unmatched ids: {evaluator.unmatched}, duplicates: {evaluator.duplicates})")
+    scored = "scored as false negatives" if args.missing_as_fn else "not scored; --missing-as-fn to count them"
+    print(f"Gold sentences without prediction: {evaluator.n_missing} ({scored})")
+    print(f"True Positives:  {m['tp']}")
+    print(f"False Positives: {m['fp']}")
+    print(f"False Negatives: {m['fn']}")
+    print("------------------------------------------")
+    print(f"Precision: {m['micro']['precision']:.4f}")
+    print(f"Recall:    {m['micro']['recall']:.4f}")
+    print(f"F1 Score:  {m['micro']['f1']:.4f}")
+    print(f"Macro F1:  {m['macro']['f1']:.4f}")
     print("------------------------------------------")
-    print(f"Precision: {precision:.4f}")
-    print(f"Recall:    {recall:.4f}")
-    print(f"F1 Score:  {f1:.4f}")
+    for pol in POLARITIES:
+        s = m["per_polarity"][pol]
+        print(f"{pol:>9}: P={s['precision']:.4f} R={s['recall']:.4f} F1={s['f1']:.4f} (support {s['support']})")
     print("============================================\n")
 
     # Print mismatches
-    print(f"=== Showing up to {SHOW_MAX} mismatches ({len(mismatches)} total) ===\n")
-    for m in mismatches[:SHOW_MAX]:
-        print(f"Sentence #{m['index']}: {m['sentence']}")
-        print(f"  GOLD: {m['gold']}")
-        print(f"  PRED: {m['pred']}")
-        print(f"  Missing aspects: {m['missing']}")
-        print(f"  Extra aspects:   {m['extra']}")
+    print(f"=== Showing up to {SHOW_MAX} mismatches ({evaluator.n_mismatches} total) ===\n")
+    for mm in evaluator.mismatches:
+        print(f"Sentence #{mm['index']}: {mm['sentence']}")
+        print(f"  GOLD: {mm['gold']}")
+        print(f"  PRED: {mm['pred']}")
+        print(f"  Missing aspects: {mm['missing']}")
+        print(f"  Extra aspects:   {mm['extra']}")
         print("---------------------------------------------------------")
 
-    if len(mismatches) > SHOW_MAX:
-        print(f"\n... {len(mismatches) - SHOW_MAX} more mismatches not printed.\n")
+    if evaluator.n_mismatches > SHOW_MAX:
+        print(f"\n... {evaluator.n_mismatches - SHOW_MAX} more mismatches not printed.\n")
+
+    if args.profile is not None:
+        report.write_json(args.report)
 
 
 if __name__ == "__main__":
@@ -2,20 +2,15 @@ import os
 import json
 from time import sleep
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+
+from absa.llm import get_client
 
 # ===========================
 # Load API Key
 # ===========================
 load_dotenv(".env")
 
-llm = ChatOpenAI(
-    api_key=os.getenv("QWEN_API_KEY"),
-    model="qwen-plus-2025-04-28",
-    base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1",
-    max_retries=3,
-    timeout=None
-)
+client = get_client(("qwen", "openai"))   # providers/keys in absa/config.py LLM_PROVIDERS
 
 # ===========================
 # Config
@@ -178,5 +173,4 @@ Sentence #18: Plus it is small and reasonably light so I can take it with me to
 
 """
 
-response = llm.invoke(INSTRUCTIONS)
-print(response.content)
\ No newline at end of file
+print(client.chat([{"role": "user", "content": INSTRUCTIONS}]))
\ No newline at end of file
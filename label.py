@@ -1,10 +1,13 @@
-import os
 import json
+import argparse
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 from typing import List, Literal
 
+from absa.jobs import run_batches
+from absa.llm import get_client
+from absa.prompts import add_offsets
+
 # ===========================
 # Pydantic Schemas
 # ===========================
@@ -28,14 +31,11 @@ class Reviews(BaseModel):
 
 load_dotenv(".env")
 
-llm = ChatOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    model="gpt-4.1",
-    max_retries=3,
-    timeout=None
-)
-
-llm = llm.with_structured_output(Reviews, strict=True)
+# gpt-4.1 only, so one output file holds the gold labels of one model; --failover also
+# lets qwen answer while OpenAI is down (absa/config.py LLM_PROVIDERS)
+PROVIDERS = ("openai",)
+FAILOVER_PROVIDERS = ("openai", "qwen")
+client = None   # set in main()
 
 
 # ===========================
@@ -44,8 +44,13 @@ llm = llm.with_structured_output(Reviews, strict=True)
 
 INPUT_FILE = "amazon_reviews.txt"
 OUTPUT_FILE = "aspect_results.jsonl"
-CHECKPOINT_FILE = "checkpoint.txt"
 BATCH_SIZE = 20
+WORKERS = 4   # batches in flight at once
+# Batch states + results live in OUTPUT_FILE.journal.sqlite (absa/jobs.py): rerunning
+# resumes where it stopped and retries failed batches; OUTPUT_FILE is rewritten atomically.
+# Output of a run from before the journal (resumed via checkpoint.txt) is adopted by
+# sentence id on the first journaled run, and the old file is kept as OUTPUT_FILE.pre-journal.
+CHECKPOINT_FILE = "checkpoint.txt"
 
 
 # ===========================
@@ -75,26 +80,10 @@ Guidelines:
 6. If a sentence contains no explicit aspects, return an empty list.
 7. The extracted term MUST be a literal substring of the sentence. Do NOT remove or add quotes. Do NOT remove or add quotes.
 
-Return the output in this exact JSON format
+Return the output in this exact JSON format:
+{"data": [{"id": <id>, "sentence": "<text>", "aspect_terms": [{"term": "...", "polarity": "positive|neutral|negative"}]}]}
 """
 
-# ===========================
-# Utility: Compute Offsets
-# ===========================
-
-def add_offsets(sentence: str, aspect_list: List[dict]):
-    for asp in aspect_list:
-        term = asp["term"]
-        idx = sentence.lower().find(term.lower())
-        if idx == -1:
-            asp["from"] = -1
-            asp["to"] = -1
-        else:
-            asp["from"] = idx
-            asp["to"] = idx + len(term)
-    return aspect_list
-
-
 # ===========================
 # Load Sentences
 # ===========================
@@ -105,22 +94,25 @@ def load_sentences(path):
 
 
 # ===========================
-# Extract Batch (Safe Mode)
+# Extract Batch (raises on failure; the job journal records and retries it)
 # ===========================
 
-def extract_batch_safe(sentences_batch, global_offset):
+def extract_batch(sentences_batch, global_offset):
     numbered = [
         {"id": global_offset + i + 1, "sentence": s}
         for i, s in enumerate(sentences_batch)
     ]
 
-    prompt = INSTRUCTIONS + "\n\nSentences:\n" + json.dumps(numbered, ensure_ascii=False)
+    # Instructions as a fixed system message (identical prefix on every call, so the
+    # provider can cache it); the batch itself as compact JSON.
+    messages = [
+        {"role": "system", "content": INSTRUCTIONS},
+        {"role": "user", "content": "Sentences:\n" + json.dumps(numbered, ensure_ascii=False, separators=(",", ":"))},
+    ]
 
-    try:
-        parsed = llm.invoke(prompt)
-    except Exception as e:
-        print(f"❌ LLM failed on batch starting at {global_offset}: {e}")
-        return None  # skip batch safely
+    # JSON mode, validated against the Reviews schema
+    content = client.chat(messages, response_format={"type": "json_object"})
+    parsed = Reviews.model_validate_json(content)
 
     results = []
     for r in parsed.data:
@@ -135,41 +127,21 @@ def extract_batch_safe(sentences_batch, global_offset):
 # Main Execution (Fault-Tolerant)
 # ===========================
 
-def main():
+def main(argv=None):
+    global client
+    parser = argparse.ArgumentParser(description="Label sentences with aspect terms and polarity via the LLM")
+    parser.add_argument("--failover", action="store_true",
+                        help="fall back to qwen when OpenAI fails (the output then mixes two models)")
+    args = parser.parse_args(argv)
+    client = get_client(FAILOVER_PROVIDERS if args.failover else PROVIDERS)
+
     # Load sentences
     sentences = load_sentences(INPUT_FILE)
     total = len(sentences)
     print(f"Loaded {total} sentences.")
 
-    # Load checkpoint (resume safely)
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, "r") as ck:
-            start_index = int(ck.read().strip())
-        print(f"🔄 Resuming from sentence {start_index}...")
-    else:
-        start_index = 0
-
-    with open(OUTPUT_FILE, "a", encoding="utf-8") as out:
-        for start in range(start_index, total, BATCH_SIZE):
-            batch = sentences[start : start + BATCH_SIZE]
-
-            print(f"Processing batch {start} → {start + len(batch)}...")
-
-            results = extract_batch_safe(batch, global_offset=start)
-
-            if results is None:
-                print("⚠ Skipping batch due to failure.")
-            else:
-                for r in results:
-                    out.write(json.dumps(r, ensure_ascii=False) + "\n")
-                out.flush()  # MAKE SURE it's physically written to disk
-
-            # Update checkpoint
-            with open(CHECKPOINT_FILE, "w") as ck:
-                ck.write(str(start + BATCH_SIZE))
-
-    print("✔ Completed. Results saved to:", OUTPUT_FILE)
-    print("✔ Checkpoint saved to:", CHECKPOINT_FILE)
+    run_batches(sentences, extract_batch, OUTPUT_FILE, BATCH_SIZE, n_workers=WORKERS,
+                legacy_index=lambda r: r["id"] - 1, checkpoint_path=CHECKPOINT_FILE)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
-import xml.etree.ElementTree as ET
 import json
-import random
+import argparse
+
+from absa.finetune import FineTuneBuilder, iter_items
 
 # ================================================================
 # CONFIG
@@ -9,123 +10,38 @@ XML_FILE = "Laptop_Train_v2.xml"
 OUTPUT_JSONL = "laptop_batched_train.jsonl"
 
 # How many sentences per batch (model must learn multiple patterns)
-BATCH_SIZES = [2, 3, 4, 5, 6]  
-EXAMPLES_PER_BATCH_SIZE = 15    # total ≈ 75 training examples
-
-
-# ================================================================
-# 1) Parse the SemEval XML
-# ================================================================
-def load_sentences_from_xml(path):
-    tree = ET.parse(path)
-    root = tree.getroot()
-
-    dataset = []
-    for sentence in root.iter("sentence"):
-        sent_id = sentence.attrib["id"]
-        text = sentence.find("text").text
-
-        aspects_list = []
-        opinions = sentence.find("aspectTerms")
-        if opinions is not None:
-            for op in opinions.iter("aspectTerm"):
-                aspects_list.append({
-                    "term": op.attrib["term"],
-                    "polarity": op.attrib["polarity"]
-                })
-
-        dataset.append({
-            "id": sent_id,
-            "sentence": text,
-            "aspect_terms": aspects_list
-        })
-
-    return dataset
-
-
-# ================================================================
-# 2) Build training samples in OpenAI FT format
-# ================================================================
-def make_training_example(batch_items):
-
-    # System prompt (same as your fine-tune)
-    system_prompt = """
-You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
-Your task is to identify all explicit aspect terms in each sentence and assign
-their sentiment polarity.
-
-Return exactly one JSON array called "results", with one item per sentence.
-"""
+BATCH_SIZES = [2, 3, 4, 5, 6]
+TOKEN_BUDGET = 1024     # max estimated tokens per example
+SEED = 42               # same seed -> same file
+MAX_EXAMPLES = 75       # training examples written; --all uses every sentence exactly once
 
-    # Build user input JSON
-    user_batch = {
-        "batch": [
-            {
-                "id": item["id"],
-                "sentence": item["sentence"]
-            }
-            for item in batch_items
-        ]
-    }
-
-    # Build assistant output JSON array
-    assistant_results = []
-    for item in batch_items:
-        assistant_results.append({
-            "id": item["id"],
-            "sentence": item["sentence"],
-            "aspect_terms": item["aspect_terms"]  # already structured
-        })
-
-    # Final fine-tuning example
-    example = {
-        "messages": [
-            {"role": "system", "content": system_prompt.strip()},
-            {"role": "user", "content": json.dumps(user_batch, ensure_ascii=False)},
-            {"role": "assistant", "content": json.dumps({"results": assistant_results}, ensure_ascii=False)}
-        ]
-    }
-
-    return example
-
-
-# ================================================================
-# 3) Build batched training dataset
-# ================================================================
-def build_batched_dataset(data):
-    examples = []
-
-    for batch_size in BATCH_SIZES:
-        for _ in range(EXAMPLES_PER_BATCH_SIZE):
-            sampled = random.sample(data, batch_size)
-            example = make_training_example(sampled)
-            examples.append(example)
-
-    return examples
-
-
-# ================================================================
-# 4) Save JSONL
-# ================================================================
-def save_jsonl(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        for obj in data:
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+# For sharding, validation splits and exact token counts use:
+#   python -m absa.finetune --xml Laptop_Train_v2.xml --out-dir finetune_data
 
 
 # ================================================================
 # MAIN
 # ================================================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the batched fine-tuning file")
+    parser.add_argument("--all", action="store_true",
+                        help=f"pack every sentence (~10x the examples) instead of the first {MAX_EXAMPLES}")
+    args = parser.parse_args()
+    max_examples = None if args.all else MAX_EXAMPLES
+
     print("Loading XML...")
-    data = load_sentences_from_xml(XML_FILE)
-    print(f"Loaded {len(data)} sentences.")
+    builder = FineTuneBuilder(BATCH_SIZES, TOKEN_BUDGET, SEED).add(iter_items(XML_FILE))
+    print(f"Loaded {len(builder.items)} sentences ({builder.duplicates} duplicates dropped).")
 
     print("Building batched training examples...")
-    examples = build_batched_dataset(data)
-    print(f"Generated {len(examples)} fine-tuning samples.")
-
-    print(f"Saving to {OUTPUT_JSONL}...")
-    save_jsonl(examples, OUTPUT_JSONL)
+    n_examples = total_tokens = 0
+    with open(OUTPUT_JSONL, "w", encoding="utf-8") as f:
+        for example, tokens, _ in builder.pack(builder.split()[0]):
+            if max_examples is not None and n_examples >= max_examples:
+                break
+            f.write(json.dumps(example, ensure_ascii=False) + "\n")
+            n_examples += 1
+            total_tokens += tokens
+    print(f"Generated {n_examples} fine-tuning samples (~{total_tokens:,} tokens).")
 
     print("Done! →", OUTPUT_JSONL)
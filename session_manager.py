@@ -0,0 +1,273 @@
+import os
+import time
+import queue
+import pickle
+import threading
+from contextlib import contextmanager
+
+
+COOKIES_FILE = "amazon_cookies.pkl"
+BASE_URL = "https://www.amazon.ae"        # point at a local mock site for offline runs
+SIGNIN_PATH = "/ap/signin"
+# Tiny same-origin resource used when CDP is unavailable: Selenium only accepts
+# cookies for the domain currently loaded, but it does not need the full home page.
+COOKIE_BOOTSTRAP_PATH = "/favicon.ico"
+# Cookies that must be present and unexpired for the session to count as logged in.
+# Empty tuple = only check expiry of whatever is stored.
+REQUIRED_COOKIES = ()
+EXPIRY_MARGIN = 300   # seconds; treat cookies expiring this soon as already expired
+POOL_SIZE = 1
+
+
+# -------------------------------
+#  Driver binary (resolved once)
+# -------------------------------
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """
+    ChromeDriverManager().install() hits the network and the disk cache on every call.
+    Resolve it once per process and reuse the path for every browser we launch.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def launch_browser(headless=False, extra_args=()):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("user-agent=Mozilla/5.0")
+    for arg in extra_args:
+        options.add_argument(arg)
+    if headless:
+        options.add_argument("--headless=new")
+
+    driver = webdriver.Chrome(
+        service=Service(get_driver_path()),
+        options=options
+    )
+    driver.implicitly_wait(5)
+    return driver
+
+
+# -------------------------------
+#  Persistent Cookie Jar
+# -------------------------------
+class CookieJar:
+    """
+    Cookies saved by the manual login flow, validated locally from their
+    `expiry` timestamps so we never load a page just to find out they are stale.
+    """
+
+    def __init__(self, path=COOKIES_FILE, required=REQUIRED_COOKIES, margin=EXPIRY_MARGIN):
+        self.path = path
+        self.required = tuple(required)
+        self.margin = margin
+        self._cookies = None
+        self._mtime = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            self._cookies, self._mtime = None, None
+            return None
+        mtime = os.path.getmtime(self.path)
+        if self._cookies is None or mtime != self._mtime:
+            with open(self.path, "rb") as f:
+                self._cookies = pickle.load(f)
+            self._mtime = mtime
+        return self._cookies
+
+    def save(self, cookies):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(cookies, f)
+        os.replace(tmp, self.path)
+        self._cookies = cookies
+        self._mtime = os.path.getmtime(self.path)
+
+    def expires_at(self):
+        """Earliest expiry among the cookies that matter (None = session cookies only)."""
+        cookies = self.load() or []
+        if self.required:
+            cookies = [c for c in cookies if c.get("name") in self.required]
+        expiries = [c["expiry"] for c in cookies if c.get("expiry") is not None]
+        return min(expiries) if expiries else None
+
+    def is_valid(self, now=None):
+        cookies = self.load()
+        if not cookies:
+            return False
+        names = {c.get("name") for c in cookies}
+        if any(name not in names for name in self.required):
+            return False
+        expiry = self.expires_at()
+        if expiry is None:
+            return True
+        now = time.time() if now is None else now
+        return expiry > now + self.margin
+
+
+def login_and_save_cookies(jar, driver_factory=launch_browser, base_url=BASE_URL):
+    driver = driver_factory()
+    try:
+        print("🔐 Opening Amazon login page — please login manually.")
+        driver.get(base_url + SIGNIN_PATH)
+        input("👉 After fully logged in, press ENTER to save cookies...")
+        jar.save(driver.get_cookies())
+        print(f"✔ Cookies saved to {jar.path}")
+    finally:
+        driver.quit()
+
+
+def ensure_cookies(jar, driver_factory=launch_browser, base_url=BASE_URL):
+    """Run the manual login flow only when the stored cookies are missing or expired."""
+    if jar.is_valid():
+        return False
+    print("❌ Cookies missing or expired — starting login flow.")
+    login_and_save_cookies(jar, driver_factory=driver_factory, base_url=base_url)
+    return True
+
+
+def _to_cdp_cookie(cookie, base_url):
+    c = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if cookie.get("domain"):
+        c["domain"] = cookie["domain"]
+    else:
+        c["url"] = base_url
+    if cookie.get("expiry") is not None:
+        c["expires"] = cookie["expiry"]
+    return c
+
+
+def inject_cookies(driver, cookies, base_url=BASE_URL):
+    """
+    Put cookies into the browser without loading the home page.
+    Chrome accepts them through CDP before any navigation; other drivers fall
+    back to one request for a tiny same-origin resource.
+    """
+    if hasattr(driver, "execute_cdp_cmd"):
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setCookies",
+                {"cookies": [_to_cdp_cookie(c, base_url) for c in cookies]}
+            )
+            return
+        except Exception:
+            pass
+
+    driver.get(base_url + COOKIE_BOOTSTRAP_PATH)
+    for cookie in cookies:
+        cookie = dict(cookie)
+        cookie.pop("sameSite", None)  # fix selenium edge-case
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            pass
+
+
+# -------------------------------
+#  Warm Browser Pool
+# -------------------------------
+class BrowserPool:
+    """
+    Launches browsers lazily (at most `size`), primes them with the cookie jar
+    once, and hands them out again and again instead of quitting after each job.
+
+        pool = BrowserPool()
+        with pool.session("reviews B0DPQW3VH6") as driver:
+            pool.first_page(driver, url)
+            ...
+        pool.close()
+    """
+
+    def __init__(self, size=POOL_SIZE, jar=None, driver_factory=launch_browser, base_url=BASE_URL):
+        self.size = size
+        self.jar = jar if jar is not None else CookieJar()
+        self.driver_factory = driver_factory
+        self.base_url = base_url
+        self.timings = []     # one dict per job: {"job", "time_to_first_page", "total"}
+
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._cookie_stamp = {}   # id(driver) -> jar mtime the driver was primed with
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _prime(self, driver):
+        if self._cookie_stamp.get(id(driver)) == self.jar._mtime:
+            return
+        inject_cookies(driver, self.jar.load() or [], base_url=self.base_url)
+        self._cookie_stamp[id(driver)] = self.jar._mtime
+
+    def acquire(self):
+        ensure_cookies(self.jar, driver_factory=self.driver_factory, base_url=self.base_url)
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_launch = len(self._all) < self.size
+                if can_launch:
+                    driver = self.driver_factory()
+                    self._all.append(driver)
+            if not can_launch:
+                driver = self._idle.get()
+        self._prime(driver)
+        return driver
+
+    def release(self, driver):
+        self._idle.put(driver)
+
+    @contextmanager
+    def session(self, job="job"):
+        # the clock starts before acquire(): browser launch and cookie priming are part of the job's cost
+        start = time.perf_counter()
+        driver = self.acquire()
+        record = {"job": job, "time_to_first_page": None, "total": None}
+        self._local.record = record
+        self._local.start = start
+        try:
+            yield driver
+        finally:
+            record["total"] = time.perf_counter() - start
+            self.timings.append(record)
+            ttfp = record["time_to_first_page"]
+            ttfp_txt = f"{ttfp:.2f}s" if ttfp is not None else "n/a"
+            print(f"⏱ {job}: time-to-first-page {ttfp_txt}, total {record['total']:.2f}s")
+            self._local.record = None
+            self.release(driver)
+
+    def first_page(self, driver, url):
+        """driver.get() that stamps time-to-first-page on the current session's job."""
+        driver.get(url)
+        record = getattr(self._local, "record", None)
+        if record is not None and record["time_to_first_page"] is None:
+            record["time_to_first_page"] = time.perf_counter() - self._local.start
+        return driver
+
+    def close(self):
+        with self._lock:
+            for driver in self._all:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self._all = []
+            self._cookie_stamp = {}
+        self._idle = queue.LifoQueue()
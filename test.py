@@ -1,50 +1,17 @@
 import json
+import argparse
 import xml.etree.ElementTree as ET
 
-SYSTEM_PROMPT = """
-You are an expert annotator for Aspect-Based Sentiment Analysis (ABSA).
-Your task is to identify all explicit aspect terms in each sentence and assign
-their sentiment polarity.
+from absa.prompts import ABSA_SYSTEM_PROMPT, SENTENCE_SYSTEM_PROMPT
 
-An "aspect term" is any product feature, component, service, or entity that
-the writer is directly evaluating. Use natural, meaningful noun phrases,
-not artificially reduced terms.
+# The prompt the current fine-tuned model was trained and is called with.
+SYSTEM_PROMPT = ABSA_SYSTEM_PROMPT
+# --compact-prompt: short prompt instead of the full guidelines in every line
+# (~73% fewer training tokens, see python -m absa.prompts). Only for a new
+# fine-tune, which must then be called with SENTENCE_SYSTEM_PROMPT as well.
+COMPACT_SYSTEM_PROMPT = SENTENCE_SYSTEM_PROMPT
 
-Guidelines:
-
-1. Only extract explicit aspects that appear literally in the text.
-2. Use natural noun phrases:
-   - Good: “battery life”, “customer service”, “build quality”
-   - Bad: “life”, “service”, “quality” (too minimal and unclear)
-3. Ignore vague nouns by themselves:
-   - “problem”, “issue”, “experience”, “thing”, etc.
-   unless they refer to a specific concrete target.
-4. Do NOT extract aspects that are only implied.
-5. Polarity must be one of: "positive", "negative", "neutral".
-6. A sentence may contain multiple aspects.
-7. If a sentence contains no explicit aspects, return an empty list.
-8. The extracted term MUST be a literal substring of the sentence. Do NOT remove or add quotes. Do NOT remove or add quotes.
-
-Return the output in this exact JSON format:
-
-[
-  {
-    "id": <sentence_id>,
-    "sentence": "<text>",
-    "aspect_terms": [
-        {"term": "...", "polarity": "..."},
-        {"term": "...", "polarity": "..."}
-    ]
-  }
-]
-
-If a sentence has no aspects, return:
-
-"aspect_terms": []
-
-"""
-
-def convert_xml(xml_path, output_path):
+def convert_xml(xml_path, output_path, system_prompt=SYSTEM_PROMPT):
     tree = ET.parse(xml_path)
     root = tree.getroot()
 
@@ -80,7 +47,7 @@ def convert_xml(xml_path, output_path):
             # Build training example
             example = {
                 "messages": [
-                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": review_text},
                     {"role": "assistant", "content": assistant_json}
                 ]
@@ -91,5 +58,10 @@ def convert_xml(xml_path, output_path):
 
 # -------- RUN --------
 if __name__ == "__main__":
-    convert_xml("Laptop_Train_v2.xml", "train.jsonl")
+    parser = argparse.ArgumentParser(description="Convert the SemEval XML to one-sentence fine-tuning lines")
+    parser.add_argument("--compact-prompt", action="store_true",
+                        help="use the short system prompt (new fine-tunes only)")
+    args = parser.parse_args()
+    convert_xml("Laptop_Train_v2.xml", "train.jsonl",
+                COMPACT_SYSTEM_PROMPT if args.compact_prompt else SYSTEM_PROMPT)
     print("Done. Output written to train.jsonl")
\ No newline at end of file
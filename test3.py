@@ -4,8 +4,8 @@ from typing import List, Literal
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from absa.jobs import run_batches
+from absa.llm import get_client
 
 # ============================
 # Config
@@ -15,6 +15,7 @@ INPUT_FILE = "amazon_reviews_arabic.jsonl"
 OUTPUT_FILE = "arabic_classification.jsonl"
 
 BATCH_SIZE = 20
+WORKERS = 4   # batches in flight at once
 MAX_SENTENCES = 5000  # <-- change this to limit how many sentences you label (None for all)
 
 
@@ -36,21 +37,13 @@ class BatchClassification(BaseModel):
 
 
 # ============================
-# 2. LLM Init with Structured Output
+# 2. LLM Client
 # ============================
 
 load_dotenv(".env")
 
-llm_raw = ChatOpenAI(
-    api_key=os.getenv("QWEN_API_KEY"),
-    base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1",
-    model="qwen-plus-2025-04-28",
-    temperature=0,
-    max_tokens=3000,
-)
-
-# Force the LLM to return a BatchClassification object
-llm = llm_raw.with_structured_output(BatchClassification, strict=True)
+# Qwen first, failing over to the other configured providers (absa/config.py LLM_PROVIDERS)
+client = get_client(("qwen", "openai"))
 
 
 # ============================
@@ -99,75 +92,52 @@ def iter_sentences(path: str, max_sentences: int | None = None):
             count += 1
 
 
-def batch(iterator, size: int):
-    """Yield lists of items of length up to size."""
-    current = []
-    for item in iterator:
-        current.append(item)
-        if len(current) == size:
-            yield current
-            current = []
-    if current:
-        yield current
-
-
 # ============================
 # 5. Main Classification Logic
 # ============================
 
+def classify_batch(chunk, start):
+    """Labels for one batch as jsonl records; raises so the job journal can retry it."""
+    # Build the prompt with indexed sentences
+    # Example:
+    # 0: sentence...
+    # 1: sentence...
+    prompt_lines = []
+    for i, s in enumerate(chunk):
+        prompt_lines.append(f"{i}: {s}")
+    user_prompt = "صنّف الجمل التالية إلى إيجابية أو سلبية:\n\n" + "\n".join(prompt_lines)
+
+    # JSON mode, validated against the schema
+    content = client.chat(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        max_tokens=3000,
+        response_format={"type": "json_object"},
+    )
+    result = BatchClassification.model_validate_json(content)
+
+    # Map index -> label (safety in case the model returns an invalid index)
+    records = []
+    for item in result.results:
+        if 0 <= item.index < len(chunk):
+            records.append({"sentence": chunk[item.index], "label": item.label})
+    return records
+
+
 def classify_reviews(
     input_path: str = INPUT_FILE,
     output_path: str = OUTPUT_FILE,
     batch_size: int = BATCH_SIZE,
     max_sentences: int | None = MAX_SENTENCES,
 ):
-    # Open output file in write mode.
-    # If you want to resume runs, change "w" -> "a" and handle skipping.
-    with open(output_path, "w", encoding="utf-8") as out_f:
-
-        sentence_iter = iter_sentences(input_path, max_sentences=max_sentences)
-
-        total_processed = 0
-
-        for chunk_idx, chunk in enumerate(batch(sentence_iter, batch_size)):
-            # Build the prompt with indexed sentences
-            # Example:
-            # 0: sentence...
-            # 1: sentence...
-            prompt_lines = []
-            for i, s in enumerate(chunk):
-                prompt_lines.append(f"{i}: {s}")
-            user_prompt = "صنّف الجمل التالية إلى إيجابية أو سلبية:\n\n" + "\n".join(prompt_lines)
-
-            # Call the structured LLM
-            result: BatchClassification = llm.invoke(
-                [
-                    SystemMessage(content=SYSTEM_PROMPT),
-                    HumanMessage(content=user_prompt),
-                ]
-            )
-
-            # Map index -> label, then write each as a jsonl line
-            for item in result.results:
-                idx = item.index
-                label = item.label
-
-                # Safety in case the model returns an invalid index
-                if 0 <= idx < len(chunk):
-                    sentence = chunk[idx]
-                    record = {
-                        "sentence": sentence,
-                        "label": label,
-                    }
-                    out_f.write(json.dumps(record, ensure_ascii=False) + "\n")
-
-            out_f.flush()  # ensure data is written to disk batch by batch
-
-            total_processed += len(chunk)
-            print(f"✓ Processed batch {chunk_idx + 1}, total sentences: {total_processed}")
-
-        print(f"✔ Done! Total classified sentences: {total_processed}")
-        print(f"✔ Output saved to: {output_path}")
+    # Batch states + results are journaled in output_path.journal.sqlite (absa/jobs.py):
+    # rerunning resumes where it stopped and retries failed batches, and the output
+    # file is rewritten atomically.
+    sentences = list(iter_sentences(input_path, max_sentences=max_sentences))
+    run_batches(sentences, classify_batch, output_path, batch_size, n_workers=WORKERS)
+    print(f"✔ Output saved to: {output_path}")
 
 
 # ============================
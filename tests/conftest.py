@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Scripts and the absa package are imported from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+# tests/test_active.py
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from absa.active import ActiveSelector, _score_texts, uncertainty
+from absa.aspect_lexicon import AspectLexicon
+from absa.aspect_windows import char_to_token_window
+from absa.config import WINDOW_SIZE
+from absa.preprocess import clean_text
+
+WINDOWS = ["the screen is great", "battery life is awful", "the keyboard is fine", "the price is terrible"]
+POLARITY = ["positive", "negative", "positive", "negative"]
+TEXTS = [
+    "The screen is great but the battery life is awful and the rest of this long review talks about shipping",
+    "Nothing here names a known aspect at all",
+]
+
+
+def fitted():
+    vec = TfidfVectorizer().fit(WINDOWS + TEXTS)
+    return vec, LogisticRegression().fit(vec.transform(WINDOWS), POLARITY)
+
+
+def test_sentences_are_scored_by_their_most_uncertain_aspect_window():
+    vec, model = fitted()
+    lexicon = AspectLexicon().update(["screen", "battery life"])
+    projection = np.eye(len(vec.get_feature_names_out()), 4, dtype=np.float32)
+
+    u, _, _ = _score_texts(vec, model, projection, TEXTS, -1.0, extractor=lexicon)
+
+    windows = [clean_text(char_to_token_window(TEXTS[0], s["from"], s["to"], window_size=WINDOW_SIZE))
+               for s in lexicon.predict_spans(TEXTS[0])]
+    assert len(windows) == 2
+    assert u[0] == uncertainty(model, vec.transform(windows)).max()
+    # no candidate span: falls back to the whole sentence
+    assert u[1] == uncertainty(model, vec.transform([clean_text(TEXTS[1])]))[0]
+
+
+def test_selector_uses_extractor():
+    vec, model = fitted()
+    lexicon = AspectLexicon().update(["screen", "battery life"])
+    with_windows = ActiveSelector(vec, model, k=2, extractor=lexicon)
+    whole = ActiveSelector(vec, model, k=2)
+    records = [{"id": i, "text": t} for i, t in enumerate(TEXTS)]
+    with_windows.consume(records, progress_every=0)
+    whole.consume(records, progress_every=0)
+
+    scores = lambda sel: {item[2]: item[0] for item in sel.heap}
+    assert scores(with_windows)[1] == scores(whole)[1]
+    assert scores(with_windows)[0] != scores(whole)[0]
@@ -0,0 +1,94 @@
+# tests/test_aggregate.py
+
+import json
+
+import numpy as np
+
+from absa.aggregate import AspectAggregator
+
+
+def write_shard(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r) + "\n")
+
+
+def test_second_run_with_same_shard_path_is_merged(tmp_path):
+    shard = tmp_path / "part-00000.jsonl"
+    agg = AspectAggregator()
+
+    write_shard(shard, [{"id": 1, "asin": "A", "aspect": "screen", "polarity": "positive"}])
+    assert agg.merge_shards([str(shard)]) == 1
+    assert agg.merge_shards([str(shard)]) == 0            # same content: skipped
+
+    # the next pipeline run rewrites part-00000.jsonl with new rows
+    write_shard(shard, [{"id": 2, "asin": "A", "aspect": "screen", "polarity": "negative"}])
+    assert agg.merge_shards([str(shard)]) == 1
+    assert agg.counts_for("A", "screen") == {"positive": 1, "neutral": 0, "negative": 1, "samples": [1, 2]}
+
+
+def test_sources_survive_save_and_load(tmp_path):
+    shard = tmp_path / "part-00000.jsonl"
+    write_shard(shard, [{"id": 1, "asin": "A", "aspect": "screen", "polarity": "positive"}])
+    agg = AspectAggregator()
+    agg.merge_shards([str(shard)])
+    agg.save(str(tmp_path / "state.npz"))
+
+    again = AspectAggregator.load(str(tmp_path / "state.npz"))
+    assert again.merge_shards([str(shard)]) == 0
+
+
+def test_top_aspects_beyond_top_k(tmp_path):
+    agg = AspectAggregator(top_k=10)
+    rows = [{"id": i, "asin": "A", "aspect": f"aspect{a}", "polarity": "positive"}
+            for a in range(25) for i in range(a + 1)]
+    agg.merge_rows(rows)
+
+    assert len(agg.top_aspects("A")) == 10
+    top = agg.top_aspects("A", k=20)
+    assert len(top) == 20
+    assert [t[0] for t in top[:3]] == ["aspect24", "aspect23", "aspect22"]
+    assert len(agg.top_aspects(k=20)) == 20
+
+
+def test_string_sentence_ids(tmp_path):
+    agg = AspectAggregator()
+    agg.merge_rows([{"id": "R1-s0", "asin": "A", "aspect": "screen", "polarity": "positive"},
+                    {"id": 7, "asin": "A", "aspect": "screen", "polarity": "negative"},
+                    {"asin": "A", "aspect": "screen", "polarity": "neutral"}])
+    assert agg.counts_for("A", "screen") == {"positive": 1, "neutral": 1, "negative": 1, "samples": ["R1-s0", 7]}
+
+    agg.save(str(tmp_path / "state.npz"))
+    again = AspectAggregator.load(str(tmp_path / "state.npz"))
+    again.merge_rows([{"id": "R2-s1", "asin": "A", "aspect": "screen", "polarity": "positive"}])
+    assert again.counts_for("A", "screen")["samples"] == ["R1-s0", 7, "R2-s1"]
+
+
+def test_state_with_raw_integer_samples_still_loads(tmp_path):
+    agg = AspectAggregator()
+    agg.merge_rows([{"id": i, "asin": "A", "aspect": "screen", "polarity": "positive"} for i in (40, 12)])
+    agg.save(str(tmp_path / "state.npz"))
+
+    # rewrite it the way states were saved before sample ids were interned
+    with np.load(str(tmp_path / "state.npz")) as z:
+        arrays = dict(z)
+    meta = json.loads(str(arrays["meta"]))
+    del meta["sample_ids"]
+    arrays["meta"] = np.array(json.dumps(meta))
+    arrays["samples"] = np.array([[40, 12, -1, -1, -1]])
+    np.savez_compressed(str(tmp_path / "old.npz"), **arrays)
+
+    old = AspectAggregator.load(str(tmp_path / "old.npz"))
+    assert old.counts_for("A", "screen")["samples"] == [40, 12]
+
+
+def test_merge_reranks_only_touched_asins():
+    agg = AspectAggregator(top_k=2)
+    agg.merge_rows([{"id": 1, "asin": "A", "aspect": "screen", "polarity": "positive"},
+                    {"id": 2, "asin": "B", "aspect": "price", "polarity": "negative"}])
+    top_b = agg.top_aspects("B")
+    agg.merge_rows([{"id": i, "asin": "A", "aspect": "battery", "polarity": "negative"} for i in range(3, 6)])
+
+    assert agg.top_aspects("B") == top_b
+    assert [t[0] for t in agg.top_aspects("A")] == ["battery", "screen"]
+    assert agg.asin_rows == {0: [0, 2], 1: [1]}
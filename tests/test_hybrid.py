@@ -0,0 +1,96 @@
+# tests/test_hybrid.py
+
+import numpy as np
+import pytest
+
+from absa.hybrid import FakeLLM, HybridClassifier, LLMPolarityLabeler
+from absa.translate import KeyValueCache
+
+SENTENCES = ["The screen is bright.", "Battery dies fast.", "Keys feel okay.", "Fans are loud."]
+TERMS = ["screen", "battery", "keys", "fans"]
+LOCAL = np.array(["positive", "positive", "neutral", "positive"])
+CONFIDENCE = np.array([0.95, 0.40, 0.80, 0.20])
+GOLD = {"The screen is bright. ||| screen": "positive", "Battery dies fast. ||| battery": "negative",
+        "Keys feel okay. ||| keys": "neutral", "Fans are loud. ||| fans": "negative"}
+
+
+class IdentityVectorizer:
+    def transform(self, windows):
+        return np.arange(len(windows))
+
+
+class FixedConfidenceEnsemble:
+    """split_by_confidence() of CalibratedVotingEnsemble with preset labels and confidences."""
+
+    def split_by_confidence(self, X, threshold):
+        unsure = CONFIDENCE[X] < threshold
+        return np.flatnonzero(~unsure), np.flatnonzero(unsure), LOCAL[X], CONFIDENCE[X]
+
+
+class RecordingLLM(FakeLLM):
+    """FakeLLM that records the lines it was asked and leaves the terms in `silent` unanswered."""
+
+    def __init__(self, silent=()):
+        super().__init__(GOLD, accuracy=1.0, latency=0.0, per_item=0.0)
+        self.silent = set(silent)
+        self.asked = []
+
+    def complete(self, system, user):
+        self.asked.extend(line.partition(": ")[2] for line in user.splitlines())
+        reply = super().complete(system, user)
+        lines = [l for l, body in zip(reply.splitlines(), user.splitlines())
+                 if body.rpartition(" ||| ")[2] not in self.silent]
+        return "\n".join(lines)
+
+
+def make_hybrid(tmp_path, llm, threshold=0.6):
+    cache = KeyValueCache(str(tmp_path / "labels.sqlite"), table="polarity")
+    labeler = LLMPolarityLabeler(endpoint=llm, cache=cache, batch_size=2, max_concurrency=1)
+    return HybridClassifier(IdentityVectorizer(), FixedConfidenceEnsemble(), labeler, threshold=threshold)
+
+
+def test_only_low_confidence_aspects_are_escalated(tmp_path):
+    llm = RecordingLLM()
+    labels, escalated = make_hybrid(tmp_path, llm).predict(SENTENCES, SENTENCES, TERMS)
+
+    assert escalated.tolist() == [False, True, False, True]
+    assert sorted(llm.asked) == ["Battery dies fast. ||| battery", "Fans are loud. ||| fans"]
+    assert labels.tolist() == ["positive", "negative", "neutral", "negative"]
+
+
+def test_cache_prevents_repeat_calls(tmp_path):
+    llm = RecordingLLM()
+    hybrid = make_hybrid(tmp_path, llm)
+    hybrid.predict(SENTENCES, SENTENCES, TERMS)
+    calls = llm.calls
+
+    labels, _ = hybrid.predict(SENTENCES, SENTENCES, TERMS)
+    assert llm.calls == calls
+    assert hybrid.labeler.stats["cache_hits"] == 2
+    assert labels.tolist() == ["positive", "negative", "neutral", "negative"]
+
+    # a new labeler over the same cache file does not call out either
+    fresh = RecordingLLM()
+    make_hybrid(tmp_path, fresh).predict(SENTENCES, SENTENCES, TERMS)
+    assert fresh.calls == 0
+
+
+def test_unanswered_pairs_keep_local_label(tmp_path):
+    llm = RecordingLLM(silent={"fans"})
+    hybrid = make_hybrid(tmp_path, llm)
+    labels, escalated = hybrid.predict(SENTENCES, SENTENCES, TERMS)
+
+    assert escalated[3]
+    assert labels[3] == "positive"                # local label, the LLM gave no answer
+    assert labels[1] == "negative"
+    # nothing was cached for the unanswered pair, so it is asked again next time
+    llm.asked.clear()
+    hybrid.predict(SENTENCES, SENTENCES, TERMS)
+    assert llm.asked == ["Fans are loud. ||| fans"]
+
+
+@pytest.mark.parametrize("threshold, expected", [(0.0, 0), (0.5, 2), (1.0, 4)])
+def test_threshold_controls_escalated_fraction(tmp_path, threshold, expected):
+    llm = RecordingLLM()
+    _, escalated = make_hybrid(tmp_path, llm, threshold=threshold).predict(SENTENCES, SENTENCES, TERMS)
+    assert escalated.sum() == expected == len(llm.asked)
@@ -0,0 +1,67 @@
+# tests/test_jobs.py
+
+import json
+
+from absa.jobs import run_batches, journal_path
+
+
+def label(batch, start):
+    return [{"id": start + i + 1, "sentence": s, "aspects": []} for i, s in enumerate(batch)]
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_fresh_run_labels_everything(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    items = [f"s{i}" for i in range(10)]
+    run_batches(items, label, out, 3)
+    assert [r["id"] for r in read_jsonl(out)] == list(range(1, 11))
+
+
+def test_pre_journal_output_is_adopted_not_relabeled(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    checkpoint = str(tmp_path / "checkpoint.txt")
+    items = [f"s{i}" for i in range(10)]
+
+    # old label.py run: batches 0 and 2 written (batch 1 failed), checkpoint at 9
+    old = [{"id": i + 1, "sentence": items[i], "aspects": ["paid"]} for i in (0, 1, 2, 6, 7, 8)]
+    with open(out, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in old)
+    with open(checkpoint, "w") as f:
+        f.write("9")
+
+    seen = []
+
+    def process(batch, start):
+        seen.append(start)
+        return label(batch, start)
+
+    run_batches(items, process, out, 3, legacy_index=lambda r: r["id"] - 1, checkpoint_path=checkpoint)
+
+    assert sorted(seen) == [3, 9]                            # the failed batch and the unstarted one
+    rows = read_jsonl(out)
+    assert [r["id"] for r in rows] == list(range(1, 11))
+    assert [r["id"] for r in rows if r["aspects"] == ["paid"]] == [1, 2, 3, 7, 8, 9]
+    assert read_jsonl(out + ".pre-journal") == old
+
+
+def test_unmapped_output_is_backed_up_before_export(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": 1, "aspects": ["paid"]}) + "\n")
+
+    run_batches(["a", "b"], label, out, 2)
+
+    assert read_jsonl(out + ".pre-journal") == [{"id": 1, "aspects": ["paid"]}]
+    assert len(read_jsonl(out)) == 2
+
+
+def test_resume_with_journal_does_not_back_up_again(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    run_batches(["a", "b"], label, out, 1)
+    run_batches(["a", "b"], label, out, 1)
+    assert not (tmp_path / "out.jsonl.pre-journal").exists()
+    assert (tmp_path / journal_path("out.jsonl")).exists()
@@ -0,0 +1,100 @@
+# tests/test_llm.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from absa import llm
+from absa.llm import LLMClient, LLMError, Provider, get_client
+from absa.testing import MockLLMServer
+
+
+def provider(name, server, **kwargs):
+    return Provider(name, server.base_url, "mock-model", **kwargs)
+
+
+def test_fails_over_to_next_provider():
+    with MockLLMServer(fail_rate=1.0, fail_status=503) as a, \
+            MockLLMServer(reply=lambda messages: "from b") as b:
+        pa, pb = provider("a", a), provider("b", b)
+        client = LLMClient([pa, pb])
+
+        assert client.complete("sys", "hello") == "from b"
+        assert a.stats["requests"] == 1 and b.stats["requests"] == 1
+        assert pa.stats["failures"] == 1
+        assert not pa.healthy()
+
+
+def test_client_errors_are_not_retried():
+    with MockLLMServer(fail_rate=1.0, fail_status=400) as a, MockLLMServer() as b:
+        client = LLMClient([provider("a", a), provider("b", b)])
+
+        with pytest.raises(LLMError) as err:
+            client.complete("sys", "bad request")
+        assert err.value.status == 400
+        assert a.stats["requests"] == 1
+        assert b.stats["requests"] == 0
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_errors_raise_immediately(status):
+    with MockLLMServer(fail_rate=1.0, fail_status=status) as a, MockLLMServer() as b:
+        pa = provider("a", a)
+        client = LLMClient([pa, provider("b", b)])
+
+        with pytest.raises(LLMError) as err:
+            client.complete("sys", "hello")
+        assert err.value.status == status
+        assert a.stats["requests"] == 1 and b.stats["requests"] == 0
+        assert pa.healthy()                           # no cooldown: nothing to wait out
+
+
+def test_get_client_requires_a_configured_provider(monkeypatch):
+    monkeypatch.setattr(llm, "_providers", {})
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("QWEN_API_KEY", raising=False)
+    with pytest.raises(LLMError, match="OPENAI_API_KEY, QWEN_API_KEY"):
+        get_client(("openai", "qwen"))
+
+    monkeypatch.setattr(llm, "_providers", {})
+    monkeypatch.setenv("QWEN_API_KEY", "k")
+    assert [p.name for p in get_client(("openai", "qwen")).providers] == ["qwen"]
+
+
+def test_retry_after_sets_cooldown():
+    with MockLLMServer(fail_rate=1.0, fail_status=429, retry_after=2) as a, MockLLMServer() as b:
+        pa = provider("a", a)
+        client = LLMClient([pa, provider("b", b)])
+
+        assert client.complete("sys", "one") == "ok"
+        assert 1.5 < pa.down_until - time.monotonic() <= 2.0
+        # while cooling down, requests go straight to b
+        for _ in range(3):
+            client.complete("sys", "more")
+        assert a.stats["requests"] == 1
+        assert b.stats["requests"] == 4
+
+
+def test_undecodable_body_fails_over():
+    with MockLLMServer(garbage=True) as a, MockLLMServer(reply=lambda messages: "from b") as b:
+        assert LLMClient([provider("a", a), provider("b", b)]).complete("sys", "hi") == "from b"
+
+        with pytest.raises(LLMError, match="undecodable"):
+            LLMClient([provider("a2", a)], max_attempts=1).complete("sys", "hi")
+
+
+def test_connections_are_reused():
+    with MockLLMServer() as server:
+        p = provider("a", server, max_concurrency=4)
+        client = LLMClient([p])
+        for _ in range(20):
+            client.complete("sys", "sequential")
+        assert server.stats["connections"] == 1
+        assert p.stats["connections"] == 1
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: client.complete("sys", f"parallel {i}"), range(100)))
+        assert server.stats["requests"] == 120
+        assert server.stats["connections"] <= 4
+        p.close()
@@ -0,0 +1,109 @@
+# tests/test_pipeline.py
+
+import json
+import threading
+
+import pytest
+
+from absa.pipeline import Pipeline, ShardWriter, read_reviews, run
+
+
+class StubExtractor:
+    """Marks the first word of every review as its aspect; raises on reviews containing `fail_on`."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def predict_spans(self, text):
+        if self.fail_on and self.fail_on in text:
+            raise ValueError(f"cannot tag {text!r}")
+        first = text.split()[0]
+        return [{"term": first, "from": 0, "to": len(first)}]
+
+
+def run_with_timeout(*args, timeout=10, **kwargs):
+    """run() in a thread; fails the test instead of hanging when the pipeline deadlocks."""
+    result = {}
+
+    def target():
+        try:
+            result["stats"] = run(*args, **kwargs)
+        except BaseException as e:
+            result["error"] = e
+
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "pipeline.run() hung"
+    return result
+
+
+def write_reviews(path, texts):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, text in enumerate(texts):
+            f.write(json.dumps({"id": i, "text": text}) + "\n")
+
+
+def test_run_writes_one_row_per_aspect(tmp_path):
+    src = tmp_path / "reviews.jsonl"
+    write_reviews(src, [f"screen number {i} is fine" for i in range(50)])
+    writer = ShardWriter(str(tmp_path / "out"))
+
+    result = run_with_timeout(Pipeline(extractor=StubExtractor()), read_reviews(str(src)), writer,
+                              batch_size=4, queue_size=2)
+
+    assert "error" not in result
+    assert result["stats"]["total"] == {"reviews": 50, "rows": 50, "sec": result["stats"]["total"]["sec"]}
+
+
+def test_stage_error_is_raised_not_hung(tmp_path):
+    src = tmp_path / "reviews.jsonl"
+    write_reviews(src, [f"review {i}" for i in range(200)])
+    writer = ShardWriter(str(tmp_path / "out"))
+
+    result = run_with_timeout(Pipeline(extractor=StubExtractor(fail_on="review 7")),
+                              read_reviews(str(src)), writer, batch_size=4, queue_size=2)
+
+    assert isinstance(result.get("error"), ValueError)
+    assert writer._f is None                      # writer closed before re-raising
+
+
+def test_malformed_input_line_is_raised_not_hung(tmp_path):
+    src = tmp_path / "reviews.jsonl"
+    write_reviews(src, [f"review {i}" for i in range(20)])
+    with open(src, "a", encoding="utf-8") as f:
+        f.write('{"id": 20, "text": \n')
+
+    result = run_with_timeout(Pipeline(extractor=StubExtractor()), read_reviews(str(src)),
+                              ShardWriter(str(tmp_path / "out")), batch_size=4, queue_size=2)
+
+    assert isinstance(result.get("error"), json.JSONDecodeError)
+
+
+def test_lexicon_pipeline_when_no_tagger_exists(tmp_path):
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from absa.aspect_lexicon import AspectLexicon
+    from absa.pipeline import load_pipeline
+
+    lexicon_path = str(tmp_path / "lexicon.json")
+    AspectLexicon().update(["battery life", "screen"]).save(lexicon_path)
+    windows = ["<ASP> screen </ASP> is great", "<ASP> battery </ASP> is awful"]
+    vec = TfidfVectorizer().fit(windows)
+    model = LogisticRegression().fit(vec.transform(windows), ["positive", "negative"])
+    en_model_path = str(tmp_path / "en.joblib")
+    joblib.dump({"vectorizer": vec, "model": model}, en_model_path)
+
+    pipe = load_pipeline(router_path=str(tmp_path / "none"), extractor="auto",
+                         tagger_path=str(tmp_path / "none"), lexicon_path=lexicon_path,
+                         en_model_path=en_model_path, ar_model_path=str(tmp_path / "none"))
+    assert isinstance(pipe.extractor, AspectLexicon)
+
+    src = tmp_path / "reviews.jsonl"
+    write_reviews(src, ["The battery life is awful", "Great screen", "Nothing to see here"] * 5)
+    writer = ShardWriter(str(tmp_path / "out"))
+    result = run_with_timeout(pipe, read_reviews(str(src)), writer, batch_size=4, queue_size=2)
+
+    assert "error" not in result
+    assert result["stats"]["total"]["rows"] == 10
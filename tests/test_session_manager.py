@@ -0,0 +1,121 @@
+# tests/test_session_manager.py
+
+import time
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from session_manager import BrowserPool, CookieJar, COOKIE_BOOTSTRAP_PATH
+
+LAUNCH_DELAY = 0.05
+
+
+class MockSite(BaseHTTPRequestHandler):
+    """Tiny stand-in for the shop: every path returns a small page and is logged."""
+
+    hits = []
+
+    def do_GET(self):
+        MockSite.hits.append((self.path, self.headers.get("Cookie")))
+        body = b"<html><body>ok</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDriver:
+    """The slice of the Selenium WebDriver API the pool uses, over plain HTTP (no CDP)."""
+
+    def __init__(self):
+        self.cookies = []
+        self.quit_called = False
+
+    def get(self, url):
+        req = urllib.request.Request(url)
+        if self.cookies:
+            req.add_header("Cookie", "; ".join(f"{c['name']}={c['value']}" for c in self.cookies))
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            resp.read()
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def site():
+    MockSite.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockSite)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def jar(tmp_path):
+    jar = CookieJar(str(tmp_path / "cookies.pkl"))
+    jar.save([{"name": "session-id", "value": "abc", "expiry": int(time.time()) + 3600}])
+    return jar
+
+
+def make_factory(launched):
+    def factory():
+        time.sleep(LAUNCH_DELAY)
+        driver = FakeDriver()
+        launched.append(driver)
+        return driver
+    return factory
+
+
+def test_pool_launches_once_and_primes_cookies_once(site, jar):
+    launched = []
+    pool = BrowserPool(size=1, jar=jar, driver_factory=make_factory(launched), base_url=site)
+    for i in range(3):
+        with pool.session(f"job {i}") as driver:
+            pool.first_page(driver, f"{site}/product/{i}")
+    pool.close()
+
+    assert len(launched) == 1
+    assert launched[0].quit_called
+    paths = [p for p, _ in MockSite.hits]
+    assert paths.count(COOKIE_BOOTSTRAP_PATH) == 1
+    assert "/" not in paths                       # the home page is never loaded
+    assert all(cookie == "session-id=abc" for p, cookie in MockSite.hits if p.startswith("/product"))
+
+
+def test_time_to_first_page_includes_launch(site, jar):
+    pool = BrowserPool(size=1, jar=jar, driver_factory=make_factory([]), base_url=site)
+    for i in range(2):
+        with pool.session(f"job {i}") as driver:
+            pool.first_page(driver, f"{site}/product/{i}")
+    pool.close()
+
+    cold, warm = pool.timings
+    assert cold["time_to_first_page"] >= LAUNCH_DELAY
+    assert warm["time_to_first_page"] < cold["time_to_first_page"]
+    assert cold["total"] >= cold["time_to_first_page"]
+
+
+def test_cookie_jar_validates_expiry_locally(tmp_path):
+    jar = CookieJar(str(tmp_path / "cookies.pkl"), margin=300)
+    assert not jar.is_valid()
+    now = time.time()
+    jar.save([{"name": "a", "value": "1", "expiry": int(now) + 100}])
+    assert not jar.is_valid(now=now)              # inside the margin
+    jar.save([{"name": "a", "value": "1", "expiry": int(now) + 3600}])
+    assert jar.is_valid(now=now)
+    assert not CookieJar(jar.path, required=("session-token",)).is_valid(now=now)
@@ -0,0 +1,42 @@
+# tests/test_spacy_preprocess.py
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from absa.spacy_preprocess import SpacyPreprocessor, pipeline_version
+
+
+def save_pipeline(path, version):
+    nlp = spacy.blank("en")
+    nlp.meta["version"] = version
+    nlp.to_disk(path)
+    return str(path)
+
+
+def test_version_in_cache_key(tmp_path):
+    old = save_pipeline(tmp_path / "old", "3.7.0")
+    new = save_pipeline(tmp_path / "new", "3.8.0")
+    assert spacy.__version__ in pipeline_version(old)
+    assert "3.7.0" in pipeline_version(old) and "3.8.0" in pipeline_version(new)
+
+
+def test_model_upgrade_misses_sqlite_cache(tmp_path):
+    cache = str(tmp_path / "clean.sqlite")
+    text = ["The screen is not bright"]
+    old = save_pipeline(tmp_path / "old", "3.7.0")
+    new = save_pipeline(tmp_path / "new", "3.8.0")
+
+    first = SpacyPreprocessor(old, cache_path=cache)
+    expected = first.process(text)
+    first.close()
+
+    again = SpacyPreprocessor(old, cache_path=cache)
+    assert again.process(text) == expected
+    assert again.stats["store_hits"] == 1
+    again.close()
+
+    upgraded = SpacyPreprocessor(new, cache_path=cache)
+    upgraded.process(text)
+    assert upgraded.stats["store_hits"] == 0 and upgraded.stats["parsed"] == 1
+    upgraded.close()
@@ -0,0 +1,62 @@
+# tests/test_term_eval.py
+
+import pytest
+
+from absa.term_eval import TermEvaluator, build_gold_index
+
+GOLD_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<sentences>
+  <sentence id="10"><text>The screen is great.</text>
+    <aspectTerms><aspectTerm term="screen" polarity="positive" from="4" to="10"/></aspectTerms>
+  </sentence>
+  <sentence id="11"><text>  </text></sentence>
+  <sentence id="12"><text>Battery life is poor.</text>
+    <aspectTerms><aspectTerm term="Battery life" polarity="negative" from="0" to="12"/></aspectTerms>
+  </sentence>
+  <sentence id="13"><text>Keyboard and trackpad are fine.</text>
+    <aspectTerms>
+      <aspectTerm term="Keyboard" polarity="neutral" from="0" to="8"/>
+      <aspectTerm term="trackpad" polarity="neutral" from="13" to="21"/>
+    </aspectTerms>
+  </sentence>
+</sentences>
+"""
+
+# label.py ids: 1-based lines of sentences.txt, which has no line for the empty sentence
+PERFECT = [
+    {"id": 1, "sentence": "The screen is great.", "aspect_terms": [{"term": "screen", "polarity": "positive"}]},
+    {"id": 2, "sentence": "Battery life is poor.",
+     "aspect_terms": [{"term": "battery life", "polarity": "negative"}]},
+]
+
+
+@pytest.fixture
+def gold(tmp_path):
+    path = tmp_path / "gold.xml"
+    path.write_text(GOLD_XML, encoding="utf-8")
+    return build_gold_index(str(path), key="index")
+
+
+def test_index_join_skips_empty_sentences(gold):
+    assert sorted(gold) == ["1", "2", "3"]
+    assert gold["2"][1] == "Battery life is poor."
+
+
+def test_unlabeled_sentences_are_not_scored_by_default(gold):
+    evaluator = TermEvaluator(gold).consume(PERFECT)
+    m = evaluator.finish()
+
+    assert evaluator.n_missing == 1
+    assert (m["tp"], m["fp"], m["fn"]) == (2, 0, 0)
+    assert m["micro"]["f1"] == 1.0
+    assert evaluator.mismatches == []
+
+
+def test_missing_as_fn_opt_in(gold):
+    evaluator = TermEvaluator(gold).consume(PERFECT)
+    m = evaluator.finish(missing_as_fn=True)
+
+    assert evaluator.n_missing == 1
+    assert (m["tp"], m["fp"], m["fn"]) == (2, 0, 2)
+    assert m["micro"]["precision"] == 1.0
+    assert m["micro"]["recall"] == 0.5
@@ -0,0 +1,65 @@
+# tests/test_translate.py
+
+import pytest
+
+from absa.llm import LLMClient, Provider
+from absa.router import EN, MSA, DIALECT
+from absa.testing import MockLLMServer
+from absa.translate import Translator, TranslationCache
+
+DIALECT_TEXTS = ["الشاشه حلوه واجد", "البطاريه مو زينه", "الكيبورد تمام", "السعر غالي شوي", "الصوت يجنن"]
+
+
+def fake_msa(messages):
+    """Answer every "<i>: <text>" line of the batch with "<i>: MSA(<text>)"."""
+    lines = messages[-1]["content"].splitlines()
+    return "\n".join(f"{head}: MSA({text.strip()})" for head, _, text in (l.partition(":") for l in lines))
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(reply=fake_msa) as mock:
+        yield mock
+
+
+def make_translator(server, cache_path, **kwargs):
+    endpoint = LLMClient([Provider("fake", server.base_url, "fake", api_key="test")])
+    return Translator(endpoint=endpoint, cache=TranslationCache(str(cache_path)), **kwargs)
+
+
+def test_batches_misses_under_batch_size(server, tmp_path):
+    translator = make_translator(server, tmp_path / "cache.sqlite", batch_size=2, max_concurrency=2)
+    out = translator.translate(DIALECT_TEXTS)
+
+    assert out == [f"MSA({t})" for t in DIALECT_TEXTS]
+    assert server.stats["requests"] == 3          # 5 texts in batches of 2
+    assert translator.stats["cache_misses"] == 5
+    assert translator.stats["failed_requests"] == 0
+
+
+def test_cache_hits_across_runs_without_network(server, tmp_path):
+    path = tmp_path / "cache.sqlite"
+    make_translator(server, path, batch_size=2).translate(DIALECT_TEXTS)
+    sent = server.stats["requests"]
+
+    # a fresh translator over the same cache file, offline: everything is served locally
+    again = make_translator(server, path, offline=True)
+    out = again.translate(DIALECT_TEXTS + DIALECT_TEXTS[:2])
+
+    assert server.stats["requests"] == sent
+    assert again.hit_rate() == 1.0
+    assert out == [f"MSA({t})" for t in DIALECT_TEXTS + DIALECT_TEXTS[:2]]
+
+
+def test_confident_router_labels_skip_translation(server, tmp_path):
+    translator = make_translator(server, tmp_path / "cache.sqlite", confidence_threshold=0.9)
+    texts = ["great screen", "الشاشة رائعة", "الشاشة جيدة", "الشاشه حلوه"]
+    labels = [EN, MSA, MSA, DIALECT]
+    confidence = [0.99, 0.95, 0.5, 0.99]
+
+    out = translator.translate(texts, labels, confidence)
+
+    assert out[:2] == texts[:2]                   # English and confident MSA pass through
+    assert out[2:] == [f"MSA({t})" for t in texts[2:]]
+    assert translator.stats["skipped"] == 2
+    assert server.stats["requests"] == 1
@@ -1,10 +1,19 @@
 import re
-import spacy
-from spacy.lang.en.stop_words import STOP_WORDS
+from functools import lru_cache
 
-nlp = spacy.load("en_core_web_sm")
+# spaCy is loaded on first use, not at import time (spacy.load alone takes seconds)
+@lru_cache(maxsize=None)
+def get_nlp():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+@lru_cache(maxsize=None)
+def stop_words():
+    from spacy.lang.en.stop_words import STOP_WORDS
+    return STOP_WORDS
 
 def clean_english(text):
+    STOP_WORDS = stop_words()
     text = text.lower()
     text = re.sub(r"<[^>]+>", " ", text)
     text = re.sub(r"[^a-z0-9\s]", " ", text)
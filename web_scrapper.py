@@ -1,15 +1,12 @@
-import os
 import time
 import json
-import pickle
 import re
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
-COOKIES_FILE = "amazon_cookies.pkl"
+import session_manager
+from session_manager import BrowserPool, CookieJar, COOKIES_FILE
+
 OUTPUT_FILE = "amazon_reviews_arabic.jsonl"
 
 # 50 Arabic keywords
@@ -34,88 +31,39 @@ def is_arabic(text):
 
 
 ##############################################
-# Browser launcher — clean session
+# Warm browser pool — launched once, reused by every job
 ##############################################
 def launch_browser():
-    options = webdriver.ChromeOptions()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("user-agent=Mozilla/5.0")
-
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
+    return session_manager.launch_browser(
+        extra_args=("--disable-blink-features=AutomationControlled",)
     )
-    driver.implicitly_wait(5)
-    return driver
-
-
-##############################################
-# Manual login (one time only)
-##############################################
-def login_and_save_cookies():
-    driver = launch_browser()
-    print("🔐 Please log in manually to Amazon...")
-
-    driver.get("https://www.amazon.ae/ap/signin")
-    input("👉 After FULL login, press ENTER to save cookies...")
-
-    cookies = driver.get_cookies()
-    pickle.dump(cookies, open(COOKIES_FILE, "wb"))
-
-    print("✔ Cookies saved.")
-    driver.quit()
-
-
-##############################################
-# Load cookies
-##############################################
-def load_cookies(driver):
-    cookies = pickle.load(open(COOKIES_FILE, "rb"))
-
-    driver.get("https://www.amazon.ae/")
-    time.sleep(2)
 
-    for cookie in cookies:
-        cookie.pop("sameSite", None)
-        try:
-            driver.add_cookie(cookie)
-        except:
-            pass
 
-    driver.get("https://www.amazon.ae/")
-    time.sleep(2)
-    print("✔ Cookies loaded — logged in.")
+POOL = BrowserPool(size=1, jar=CookieJar(COOKIES_FILE), driver_factory=launch_browser)
 
 
 ##############################################
 # Extract ASINs from a keyword
 ##############################################
-def get_asins_from_keyword(keyword, max_items=10):
-    if not os.path.exists(COOKIES_FILE):
-        login_and_save_cookies()
+def get_asins_from_keyword(keyword, max_items=10, pool=POOL):
+    search_url = f"{pool.base_url}/s?k={keyword.replace(' ', '+')}"
+    print("\n🔍 Searching keyword:", keyword)
 
-    driver = launch_browser()
-    load_cookies(driver)
+    with pool.session(f"search {keyword}") as driver:
+        pool.first_page(driver, search_url)
+        time.sleep(2)
 
-    search_url = f"https://www.amazon.ae/s?k={keyword.replace(' ', '+')}"
-    print("\n🔍 Searching keyword:", keyword)
-    driver.get(search_url)
-    time.sleep(2)
-
-    blocks = driver.find_elements(By.CSS_SELECTOR, "div[data-component-type='s-search-result']")
-    asins = []
-
-    for block in blocks:
-        asin = block.get_attribute("data-asin")
-        if asin and len(asin) == 10:
-            asins.append(asin)
-            print("→ ASIN:", asin)
-        if len(asins) >= max_items:
-            break
+        blocks = driver.find_elements(By.CSS_SELECTOR, "div[data-component-type='s-search-result']")
+        asins = []
+
+        for block in blocks:
+            asin = block.get_attribute("data-asin")
+            if asin and len(asin) == 10:
+                asins.append(asin)
+                print("→ ASIN:", asin)
+            if len(asins) >= max_items:
+                break
 
-    driver.quit()
     return asins
 
 
@@ -130,13 +78,16 @@ def append_review(review_obj):
 ##############################################
 # Scrape all reviews (Arabic only)
 ##############################################
-def get_all_reviews(asin, max_pages=50):
-    driver = launch_browser()
-    load_cookies(driver)
+def get_all_reviews(asin, max_pages=50, pool=POOL):
+    url = f"{pool.base_url}/product-reviews/{asin}/?sortBy=recent&reviewerType=all_reviews"
+
+    with pool.session(f"reviews {asin}") as driver:
+        pool.first_page(driver, url)
+        time.sleep(2)
+        _scrape_arabic_pages(driver, asin, max_pages)
 
-    url = f"https://www.amazon.ae/product-reviews/{asin}/?sortBy=recent&reviewerType=all_reviews"
-    driver.get(url)
-    time.sleep(2)
+
+def _scrape_arabic_pages(driver, asin, max_pages):
 
     page = 1
 
@@ -178,8 +129,6 @@ def get_all_reviews(asin, max_pages=50):
             print("✔ Last page reached.")
             break
 
-    driver.quit()
-
 
 ##############################################
 # Run pipeline for all 10 Arabic keywords
@@ -191,16 +140,22 @@ def run_pipeline():
     # Clear file at start
     open(OUTPUT_FILE, "w", encoding="utf-8").close()
 
-    for keyword in ARABIC_KEYWORDS:
-        asins = get_asins_from_keyword(keyword)
+    try:
+        for keyword in ARABIC_KEYWORDS:
+            asins = get_asins_from_keyword(keyword)
 
-        for asin in asins:
-            print("\n==============================")
-            print("📦 Scraping Arabic reviews for:", asin)
-            print("==============================")
+            for asin in asins:
+                print("\n==============================")
+                print("📦 Scraping Arabic reviews for:", asin)
+                print("==============================")
 
-            get_all_reviews(asin)
+                get_all_reviews(asin)
+    finally:
+        POOL.close()
 
+    ttfp = [t["time_to_first_page"] for t in POOL.timings if t["time_to_first_page"] is not None]
+    if ttfp:
+        print(f"⏱ {len(ttfp)} jobs, mean time-to-first-page {sum(ttfp) / len(ttfp):.2f}s")
     print("\n🎉 DONE — Arabic reviews saved to:", OUTPUT_FILE)
 
 